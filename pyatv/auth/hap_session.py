@@ -21,7 +21,7 @@ class HAPSession:
         self,
     ) -> None:
         """Initialize a new HAPSession instance."""
-        self._encrypted_data = b""
+        self._encrypted_data = bytearray()
         self.chacha20: Optional[Chacha20Cipher] = None
 
     def enable(self, output_key: bytes, input_key: bytes) -> None:
@@ -35,32 +35,66 @@ class HAPSession:
 
         self._encrypted_data += data
 
-        output = b""
-        while self._encrypted_data:
-            length = self._encrypted_data[0:2]
-            block_length = (
-                int.from_bytes(length, byteorder="little") + self.AUTH_TAG_LENGTH
-            )
-            if len(self._encrypted_data) < block_length + 2:
-                return output
-
-            block = self._encrypted_data[2 : 2 + block_length]
-            output += self.chacha20.decrypt(block, aad=length)
-
-            self._encrypted_data = self._encrypted_data[2 + block_length :]
-        return output
+        # Decrypt all complete blocks and remove them from buffer once at the end,
+        # so that data is not moved around for each block
+        blocks = []
+        lengths = []
+        offset = 0
+        with memoryview(self._encrypted_data) as buffer:
+            while len(buffer) - offset >= 2:
+                length = bytes(buffer[offset : offset + 2])
+                block_end = (
+                    offset
+                    + 2
+                    + int.from_bytes(length, byteorder="little")
+                    + self.AUTH_TAG_LENGTH
+                )
+                if len(buffer) < block_end:
+                    break
+
+                blocks.append(buffer[offset + 2 : block_end])
+                lengths.append(length)
+                offset = block_end
+            try:
+                output = self.chacha20.decrypt_many(blocks, lengths)
+            except Exception:
+                # Views of the blocks might still be referenced (e.g. by traceback),
+                # so drop the data by replacing the buffer instead of resizing it
+                self._encrypted_data = bytearray()
+                raise
+            finally:
+                blocks.clear()  # Release views before resizing buffer
+        del self._encrypted_data[0:offset]
+        return b"".join(output)
+
+    def encrypted_size(self, length: int) -> int:
+        """Return size of data with specified length once encrypted."""
+        if self.chacha20 is None:
+            return length
+        frames = -(-length // self.FRAME_LENGTH)
+        return length + frames * (2 + self.AUTH_TAG_LENGTH)
 
     def encrypt(self, data: bytes) -> bytes:
         """Encrypt outgoing data."""
         if self.chacha20 is None:
             return data
 
-        output = b""
-        while data:
-            frame = data[0 : self.FRAME_LENGTH]
-            data = data[self.FRAME_LENGTH :]
+        output = bytearray()
+        self.encrypt_into(data, output)
+        return bytes(output)
 
-            length = int.to_bytes(len(frame), 2, byteorder="little")
-            frame = self.chacha20.encrypt(frame, aad=length)
-            output += length + frame
-        return output
+    def encrypt_into(self, data: bytes, output: bytearray) -> None:
+        """Encrypt outgoing data and append it to a buffer.
+
+        Several messages can be encrypted into the same buffer and sent at once.
+        """
+        if self.chacha20 is None:
+            output += data
+            return
+
+        with memoryview(data) as view:
+            for offset in range(0, len(view), self.FRAME_LENGTH):
+                frame = view[offset : offset + self.FRAME_LENGTH]
+                length = int.to_bytes(len(frame), 2, byteorder="little")
+                output += length
+                self.chacha20.encrypt_into(frame, output, aad=length)
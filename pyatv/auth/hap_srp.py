@@ -1,10 +1,12 @@
 """SRP implementation for HAP."""
 
+import asyncio
 import binascii
+from collections import deque
 import hashlib
 import logging
 import os
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Deque, Dict, Optional, Tuple
 import uuid
 
 from cryptography.exceptions import InvalidSignature
@@ -25,9 +27,22 @@ from pyatv import exceptions
 from pyatv.auth.hap_pairing import HapCredentials
 from pyatv.auth.hap_tlv8 import TlvValue, read_tlv, write_tlv
 from pyatv.support import chacha20, log_binary, opack
+from pyatv.support.cache import Cache
 
 _LOGGER = logging.getLogger(__name__)
 
+# Number of ephemeral key pairs generated ahead of time
+KEY_POOL_SIZE = 2
+
+# Number of credentials to keep loaded long-term keys for
+LONG_TERM_KEY_CACHE_SIZE = 16
+
+# Signing key (used by pair-setup) and key used for key exchange (by pair-verify)
+EphemeralKeys = Tuple[Ed25519PrivateKey, X25519PrivateKey]
+
+# Public key of device and private key of client from credentials
+LongTermKeys = Tuple[Ed25519PublicKey, Ed25519PrivateKey]
+
 
 def hkdf_expand(salt: str, info: str, shared_secret: bytes) -> bytes:
     """Derive encryption keys from shared secret."""
@@ -41,12 +56,88 @@ def hkdf_expand(salt: str, info: str, shared_secret: bytes) -> bytes:
     return hkdf.derive(shared_secret)
 
 
+def generate_ephemeral_keys() -> EphemeralKeys:
+    """Generate new ephemeral keys."""
+    return (
+        Ed25519PrivateKey.from_private_bytes(os.urandom(32)),
+        X25519PrivateKey.from_private_bytes(os.urandom(32)),
+    )
+
+
+class EphemeralKeyPool:
+    """Pool of ephemeral keys generated ahead of time.
+
+    Every taken key is replaced by the event loop after the current callback has
+    finished, i.e. while waiting for a response from the device. If the pool is
+    empty, keys are generated right away.
+    """
+
+    def __init__(self, size: int = KEY_POOL_SIZE) -> None:
+        """Initialize a new EphemeralKeyPool instance."""
+        if size < 0:
+            raise ValueError(f"invalid pool size: {size}")
+        self.size = size
+        self._keys: Deque[EphemeralKeys] = deque()
+        self._refill_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __len__(self) -> int:
+        """Return number of keys in pool."""
+        return len(self._keys)
+
+    def get(self) -> EphemeralKeys:
+        """Take keys from pool."""
+        keys = self._keys.popleft() if self._keys else generate_ephemeral_keys()
+        self._schedule_refill()
+        return keys
+
+    def fill(self) -> None:
+        """Generate keys until pool is full."""
+        self._refill_loop = None
+        while len(self._keys) < self.size:
+            self._keys.append(generate_ephemeral_keys())
+
+    def _schedule_refill(self) -> None:
+        if self.size == 0:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No event loop, refill next time keys are taken
+
+        # A refill scheduled on another (e.g. closed) loop might never run
+        if self._refill_loop is not loop:
+            loop.call_soon(self.fill)
+            self._refill_loop = loop
+
+
+DEFAULT_KEY_POOL = EphemeralKeyPool()
+
+_LONG_TERM_KEYS = Cache(limit=LONG_TERM_KEY_CACHE_SIZE)
+
+
+def load_long_term_keys(credentials: HapCredentials) -> LongTermKeys:
+    """Return long-term keys from credentials, cached between verifications."""
+    # Credentials contain the secret key, so do not keep them in plain text
+    identifier = hashlib.sha256(str(credentials).encode("utf-8")).hexdigest()
+    if identifier in _LONG_TERM_KEYS:
+        return _LONG_TERM_KEYS.get(identifier)
+
+    keys = (
+        Ed25519PublicKey.from_public_bytes(bytes(credentials.ltpk)),
+        Ed25519PrivateKey.from_private_bytes(bytes(credentials.ltsk)),
+    )
+    _LONG_TERM_KEYS.put(identifier, keys)
+    return keys
+
+
 # pylint: disable=too-many-instance-attributes
 class SRPAuthHandler:
     """Handle SRP crypto routines for auth and key derivation."""
 
-    def __init__(self):
+    def __init__(self, key_pool=None):
         """Initialize a new SRPAuthHandler."""
+        self.key_pool = DEFAULT_KEY_POOL if key_pool is None else key_pool
         self.pairing_id = str(uuid.uuid4()).encode()
         self._signing_key = None
         self._auth_private = None
@@ -65,7 +156,7 @@ class SRPAuthHandler:
 
     def initialize(self):
         """Initialize operation by generating new keys."""
-        self._signing_key = Ed25519PrivateKey.from_private_bytes(os.urandom(32))
+        self._signing_key, self._verify_private = self.key_pool.get()
         self._auth_private = self._signing_key.private_bytes(
             encoding=serialization.Encoding.Raw,
             format=serialization.PrivateFormat.Raw,
@@ -74,7 +165,6 @@ class SRPAuthHandler:
         self._auth_public = self._signing_key.public_key().public_bytes(
             encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw
         )
-        self._verify_private = X25519PrivateKey.from_private_bytes(os.urandom(32))
         self._verify_public = self._verify_private.public_key()
         self._public_bytes = self._verify_public.public_bytes(
             encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw
@@ -101,7 +191,7 @@ class SRPAuthHandler:
             raise exceptions.AuthenticationError("incorrect device response")
 
         info = session_pub_key + bytes(identifier) + self._public_bytes
-        ltpk = Ed25519PublicKey.from_public_bytes(bytes(credentials.ltpk))
+        ltpk, ltsk = load_long_term_keys(credentials)
 
         try:
             ltpk.verify(bytes(signature), bytes(info))
@@ -110,9 +200,7 @@ class SRPAuthHandler:
 
         device_info = self._public_bytes + credentials.client_id + session_pub_key
 
-        device_signature = Ed25519PrivateKey.from_private_bytes(credentials.ltsk).sign(
-            device_info
-        )
+        device_signature = ltsk.sign(device_info)
 
         tlv = write_tlv(
             {
@@ -136,7 +224,10 @@ class SRPAuthHandler:
         return output_key, input_key
 
     def step1(self, pin):
-        """First pairing step."""
+        """First pairing step.
+
+        Calculates SRP client public value (use an executor).
+        """
         context = SRPContext(
             "Pair-Setup",
             str(pin),
@@ -149,7 +240,10 @@ class SRPAuthHandler:
         )
 
     def step2(self, atv_pub_key, atv_salt):
-        """Second pairing step."""
+        """Second pairing step.
+
+        Calculates SRP session key (use an executor).
+        """
         pk_str = binascii.hexlify(atv_pub_key).decode()
         salt = binascii.hexlify(atv_salt).decode()
         self._session.process(pk_str, salt)
@@ -396,6 +396,9 @@ class FeatureName(Enum):
     StreamFile = 44
     """Stream local file to device."""
 
+    EnqueueFile = 67
+    """Add file to play queue."""
+
     PowerState = 32
     """Current device power state."""
 
@@ -394,6 +394,26 @@ class FacadeStream(Relayer, interface.Stream):  # pylint: disable=too-few-public
             **kwargs,
         )
 
+    @shield.guard
+    async def enqueue(
+        self,
+        file: Union[str, io.BufferedIOBase, asyncio.streams.StreamReader],
+        /,
+        metadata: Optional[interface.MediaMetadata] = None,
+        override_missing_metadata: bool = False,
+        **kwargs,
+    ) -> None:
+        """Add file to play queue.
+
+        INCUBATING METHOD - MIGHT CHANGE IN THE FUTURE!
+        """
+        await self.relay("enqueue")(
+            file,
+            metadata=metadata,
+            override_missing_metadata=override_missing_metadata,
+            **kwargs,
+        )
+
 
 class FacadeApps(Relayer, interface.Apps):
     """Facade implementation for app handling."""
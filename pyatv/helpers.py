@@ -3,8 +3,6 @@
 import asyncio
 from typing import Callable, Mapping, Optional
 
-import miniaudio
-
 import pyatv
 
 HOMESHARING_SERVICE: str = "_appletv-v2._tcp.local"
@@ -95,6 +93,9 @@ async def is_streamable(filename: str) -> bool:
     file is missing or lack of permissions.
     """
     try:
+        # Imported here to not load miniaudio unless needed
+        import miniaudio  # pylint: disable=import-outside-toplevel
+
         loop = asyncio.get_event_loop()
         await loop.run_in_executor(None, miniaudio.get_file_info, filename)
     except Exception:
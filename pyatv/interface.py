@@ -900,6 +900,24 @@ class Stream:  # pylint: disable=too-few-public-methods
         """
         raise exceptions.NotSupportedError()
 
+    @feature(67, "EnqueueFile", "Add file to play queue.")
+    async def enqueue(
+        self,
+        file: Union[str, io.BufferedIOBase, asyncio.streams.StreamReader],
+        /,
+        metadata: Optional[MediaMetadata] = None,
+        override_missing_metadata: bool = False,
+        **kwargs,
+    ) -> None:
+        """Add local or remote file to play queue.
+
+        Queued files are streamed gaplessly after each other. Playback is started
+        if nothing is playing.
+
+        INCUBATING METHOD - MIGHT CHANGE IN THE FUTURE!
+        """
+        raise exceptions.NotSupportedError()
+
 
 class DeviceListener(ABC):
     """Listener interface for generic device updates."""
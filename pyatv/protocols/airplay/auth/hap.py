@@ -1,5 +1,6 @@
 """API for performing and verifying device authentication."""
 
+import asyncio
 from copy import copy
 import logging
 from typing import Any, Dict, Optional, Tuple
@@ -69,9 +70,12 @@ class AirPlayHapPairSetupProcedure(PairSetupProcedure):
         screen must be provided.
         """
         # Step 1
-        self.srp.step1(pin_code)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.srp.step1, pin_code)
 
-        pub_key, proof = self.srp.step2(self._atv_pub_key, self._atv_salt)
+        pub_key, proof = await loop.run_in_executor(
+            None, self.srp.step2, self._atv_pub_key, self._atv_salt
+        )
         data = {
             hap_tlv8.TlvValue.SeqNo: b"\x03",
             hap_tlv8.TlvValue.PublicKey: pub_key,
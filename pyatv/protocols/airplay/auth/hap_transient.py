@@ -6,6 +6,7 @@ makes it easier to implement as the verification procedure step instead, so that
 how it works and why there's no setup procedure at all.
 """
 
+import asyncio
 import binascii
 from copy import copy
 import logging
@@ -67,9 +68,12 @@ class AirPlayHapTransientPairVerifyProcedure(PairVerifyProcedure):
         atv_salt = pairing_data[hap_tlv8.TlvValue.Salt]
         atv_pub_key = pairing_data[hap_tlv8.TlvValue.PublicKey]
 
-        self.srp.step1(TRANSIENT_PIN)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.srp.step1, TRANSIENT_PIN)
 
-        pub_key, proof = self.srp.step2(atv_pub_key, atv_salt)
+        pub_key, proof = await loop.run_in_executor(
+            None, self.srp.step2, atv_pub_key, atv_salt
+        )
         data = {
             hap_tlv8.TlvValue.SeqNo: b"\x03",
             hap_tlv8.TlvValue.PublicKey: pub_key,
@@ -1,5 +1,6 @@
 """Implementation of legacy pairing for AirPlay."""
 
+import asyncio
 import binascii
 import logging
 import plistlib
@@ -51,14 +52,17 @@ class AirPlayLegacyPairSetupProcedure(PairSetupProcedure):
         client_id = (
             binascii.hexlify(self.srp.credentials.client_id).decode("ascii").upper()
         )
-        self.srp.step1(client_id, pin_code)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.srp.step1, client_id, pin_code)
         resp = await self._send_plist(method="pin", user=client_id)
         body = decode_bplist_from_body(resp)
         if not isinstance(body, dict):
             raise exceptions.ProtocolError(f"exoected dict, got {type(body).__name__}")
 
         # Step 2
-        pub_key, key_proof = self.srp.step2(body["pk"], body["salt"])
+        pub_key, key_proof = await loop.run_in_executor(
+            None, self.srp.step2, body["pk"], body["salt"]
+        )
         await self._send_plist(
             pk=binascii.unhexlify(pub_key), proof=binascii.unhexlify(key_proof)
         )
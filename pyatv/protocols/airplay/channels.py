@@ -62,13 +62,16 @@ class EventChannel(BaseEventChannel):
 
     def handle_received(self) -> None:
         """Handle received data that was put in buffer."""
-        self.buffer: bytes
         while self.buffer:
             try:
-                request, _, self.buffer = self.parse_request(self.buffer)
-                if request is None:
+                # Only the complete request is copied from buffer and parsed
+                data = self.buffer.read_http_frame()
+                if data is None:
                     _LOGGER.debug("Not enough data to parse request on event channel")
                     break
+                request, _, _ = self.parse_request(data)
+                if request is None:
+                    raise ValueError("incomplete request on event channel")
 
                 _LOGGER.debug("Got message on event channel: %s", request)
 
@@ -240,9 +243,14 @@ class DataStreamChannel(BaseDataStreamChannel):
 
     def handle_received(self) -> None:
         """Handle received data that was put in buffer."""
-        self.buffer: bytes
-        while len(self.buffer) >= DataHeader.length:
-            message, _, self.buffer = self.decode_message(self.buffer)
+        while True:
+            frame = self.buffer.read_frame(
+                DataHeader.length, length_size=4, includes_header=True
+            )
+            if frame is None:
+                break
+
+            message, _, _ = self.decode_message(frame)
             if not message:
                 break
 
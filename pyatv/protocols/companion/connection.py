@@ -9,6 +9,7 @@ from typing import Optional
 
 from pyatv import exceptions
 from pyatv.support import chacha20, log_binary
+from pyatv.support.framing import FrameBuffer
 from pyatv.support.state_producer import StateProducer
 
 _LOGGER = logging.getLogger(__name__)
@@ -67,7 +68,7 @@ class CompanionConnection(asyncio.Protocol):
         self._listener: Optional[CompanionConnectionListener] = None
         self._device_listener = device_listener
         self.transport = None
-        self._buffer: bytes = b""
+        self._buffer: FrameBuffer = FrameBuffer()
         self._chacha: Optional[chacha20.Chacha20Cipher] = None
         self._queue: deque = deque()
 
@@ -125,24 +126,19 @@ class CompanionConnection(asyncio.Protocol):
 
     def data_received(self, data):
         """Handle data received from companion."""
-        self._buffer += data
+        self._buffer.append(data)
         log_binary(_LOGGER, "Received data", Data=data)
 
-        while len(self._buffer) >= HEADER_LENGTH:
-            payload_length = HEADER_LENGTH + int.from_bytes(
-                self._buffer[1:HEADER_LENGTH], byteorder="big"
-            )
-            if len(self._buffer) < payload_length:
+        while self._buffer:
+            frame = self._buffer.read_frame(HEADER_LENGTH, length_offset=1)
+            if frame is None:
                 _LOGGER.debug(
-                    "Require %d bytes but only %d in buffer",
-                    payload_length,
-                    len(self._buffer),
+                    "Require more data, %d bytes in buffer", len(self._buffer)
                 )
                 break
 
-            header = self._buffer[0:HEADER_LENGTH]
-            payload = self._buffer[HEADER_LENGTH:payload_length]
-            self._buffer = self._buffer[payload_length:]
+            header = frame[0:HEADER_LENGTH]
+            payload = frame[HEADER_LENGTH:]
 
             try:
                 if self._chacha and len(payload) > 0:
@@ -1,5 +1,6 @@
 """Device pairing and derivation of encryption keys."""
 
+import asyncio
 import logging
 from typing import Optional, Tuple
 
@@ -53,9 +54,12 @@ class MrpPairSetupProcedure(PairSetupProcedure):
         self, username: str, pin_code: int, _: Optional[str]
     ) -> HapCredentials:
         """Finish pairing process."""
-        self.srp.step1(pin_code)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.srp.step1, pin_code)
 
-        pub_key, proof = self.srp.step2(self._atv_pub_key, self._atv_salt)
+        pub_key, proof = await loop.run_in_executor(
+            None, self.srp.step2, self._atv_pub_key, self._atv_salt
+        )
 
         msg = messages.crypto_pairing(
             {
@@ -7,9 +7,10 @@ import logging
 from pyatv import exceptions
 from pyatv.protocols.mrp import protobuf
 from pyatv.support import chacha20, log_binary, log_protobuf
+from pyatv.support.framing import FrameBuffer
 from pyatv.support.net import tcp_keepalive
 from pyatv.support.state_producer import StateProducer
-from pyatv.support.variant import read_variant, write_variant
+from pyatv.support.variant import write_variant
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -52,7 +53,7 @@ class MrpConnection(
         self.atv = atv
         self.loop = loop
         self._log_str = ""
-        self._buffer = b""
+        self._buffer = FrameBuffer()
         self._chacha = None
         self._transport = None
 
@@ -138,24 +139,20 @@ class MrpConnection(
         """Message was received from device."""
         # A message might be split over several reads, so we store a buffer and
         # try to decode messages from that buffer
-        self._buffer += data
+        self._buffer.append(data)
         log_binary(_LOGGER, self._log_str + "<< Receive", Data=data)
 
         while self._buffer:
             # The variant tells us how much data must follow
-            length, raw = read_variant(self._buffer)
-            if len(raw) < length:
+            data = self._buffer.read_variant_frame()  # Might be encrypted
+            if data is None:
                 _LOGGER.debug(
-                    "%s Require %d bytes but only %d in buffer",
+                    "%s Require more data, %d bytes in buffer",
                     self._log_str,
-                    length,
-                    len(raw),
+                    len(self._buffer),
                 )
                 break
 
-            data = raw[:length]  # Incoming message (might be encrypted)
-            self._buffer = raw[length:]  # Buffer, might contain more messages
-
             try:
                 self._handle_message(data)
             except Exception:  # pylint: disable=broad-except
@@ -1,9 +1,22 @@
 """Support for audio streaming using Remote Audio Output Protocol (RAOP)."""
 
 import asyncio
+from collections import deque
 import io
 import logging
-from typing import Any, Dict, Generator, Mapping, Optional, Set, Tuple, Union, cast
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Generator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
 from pyatv import const, exceptions
 from pyatv.const import (
@@ -53,9 +66,24 @@ from pyatv.protocols.airplay.utils import (
     pct_to_dbfs,
     update_service_details,
 )
+from pyatv.protocols.raop.audio_cache import AudioCache
 from pyatv.protocols.raop.audio_source import AudioSource, open_source
-from pyatv.protocols.raop.protocols import StreamContext, airplayv1, airplayv2
-from pyatv.protocols.raop.stream_client import PlaybackInfo, RaopListener, StreamClient
+from pyatv.protocols.raop.fanout import FanoutReader
+from pyatv.protocols.raop.playlist import PlaylistSource
+from pyatv.protocols.raop.protocols import (
+    StreamContext,
+    StreamProtocol,
+    airplayv1,
+    airplayv2,
+)
+from pyatv.protocols.raop.read_ahead import ReadAheadHook
+from pyatv.protocols.raop.retransmit import MetricsHook
+from pyatv.protocols.raop.stream_client import (
+    PlaybackInfo,
+    RaopListener,
+    SessionLostError,
+    StreamClient,
+)
 from pyatv.support.collections import dict_merge
 from pyatv.support.device_info import lookup_model, lookup_os
 from pyatv.support.http import HttpConnection, http_connect
@@ -105,6 +133,15 @@ class RaopPushUpdater(AbstractPushUpdater):
             _LOGGER.debug("Playstatus error occurred: %s", ex)
 
 
+class QueuedFile(NamedTuple):
+    """File to stream and how to stream it."""
+
+    file: Union[str, io.BufferedIOBase, asyncio.streams.StreamReader, FanoutReader]
+    metadata: Optional[MediaMetadata]
+    override_missing_metadata: bool
+    audio_cache: Optional[AudioCache]
+
+
 class RaopPlaybackManager:
     """Manage current play state for RAOP."""
 
@@ -117,6 +154,7 @@ class RaopPlaybackManager:
         self._connection: Optional[HttpConnection] = None
         self._rtsp: Optional[RtspSession] = None
         self._stream_client: Optional[StreamClient] = None
+        self.queue: Deque[QueuedFile] = deque()
 
     @property
     def context(self) -> StreamContext:
@@ -135,6 +173,24 @@ class RaopPlaybackManager:
 
         self._is_acquired = True
 
+    @property
+    def is_acquired(self) -> bool:
+        """Return if playback manager is used for playback."""
+        return self._is_acquired
+
+    def release(self) -> None:
+        """Release playback manager but keep session for later playback."""
+        self._is_acquired = False
+
+    @property
+    def has_idle_session(self) -> bool:
+        """Return if a kept session exists that is not used for playback."""
+        return (
+            not self._is_acquired
+            and self._stream_client is not None
+            and self._stream_client.has_session
+        )
+
     async def setup(self, service: BaseService) -> Tuple[StreamClient, StreamContext]:
         """Set up a session or return active if it exists."""
         if self._stream_client and self._rtsp and self._context:
@@ -150,23 +206,28 @@ class RaopPlaybackManager:
         )
         _LOGGER.debug("Using AirPlay version %s", protocol_version)
 
-        protocol_class = (
-            airplayv1.AirPlayV1
-            if protocol_version == AirPlayMajorVersion.AirPlayV1
-            else airplayv2.AirPlayV2
-        )
+        protocol: StreamProtocol
+        if protocol_version == AirPlayMajorVersion.AirPlayV1:
+            protocol = airplayv1.AirPlayV1(self._context, self._rtsp)
+        else:
+            protocol = airplayv2.AirPlayV2(
+                self._context,
+                self._rtsp,
+                self.core.settings.protocols.raop.encryption_thread,
+            )
 
         self._stream_client = StreamClient(
-            self._rtsp,
-            self._context,
-            protocol_class(self._context, self._rtsp),
-            self.core.settings,
+            self._rtsp, self._context, protocol, self.core.settings
         )
         return self._stream_client, self._context
 
     async def teardown(self) -> None:
         """Tear down and disconnect current session."""
         if self._stream_client:
+            try:
+                await self._stream_client.end_session()
+            except Exception as ex:  # pylint: disable=broad-except
+                _LOGGER.debug("Failed to end session: %s", ex)
             self._stream_client.close()
         if self._connection:
             self._connection.close()
@@ -216,7 +277,7 @@ class RaopFeatures(Features):
         self, feature_name: FeatureName
     ) -> FeatureInfo:
         """Return current state of a feature."""
-        if feature_name == FeatureName.StreamFile:
+        if feature_name in [FeatureName.StreamFile, FeatureName.EnqueueFile]:
             return FeatureInfo(FeatureState.Available)
 
         metadata = EMPTY_METADATA
@@ -330,10 +391,29 @@ class RaopStream(Stream):
         self.listener = listener
         self.audio = audio
         self.playback_manager = playback_manager
+        self.metrics_hook: Optional[MetricsHook] = None
+        self.read_ahead_hook: Optional[ReadAheadHook] = None
+        self._playlist: Optional[PlaylistSource] = None
+        self._queue_task: Optional[asyncio.Task] = None
+        self._track_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def is_playing_queue(self) -> bool:
+        """Return if queued files are being played."""
+        return self._queue_task is not None
+
+    async def clear_queue(self) -> None:
+        """Stop playing queued files and wait for playback to stop."""
+        self.playback_manager.queue.clear()
+        queue_task, self._queue_task = self._queue_task, None
+        if queue_task:
+            queue_task.cancel()
+            await asyncio.gather(queue_task, return_exceptions=True)
+        await self._cancel_track_tasks()
 
     async def stream_file(
         self,
-        file: Union[str, io.BufferedIOBase, asyncio.streams.StreamReader],
+        file: Union[str, io.BufferedIOBase, asyncio.streams.StreamReader, FanoutReader],
         /,
         metadata: Optional[MediaMetadata] = None,
         override_missing_metadata: bool = False,
@@ -341,69 +421,261 @@ class RaopStream(Stream):
     ) -> None:
         """Stream local or remote file to device.
 
-        Supports either local file paths or a HTTP(s) address.
+        Supports either local file paths or a HTTP(s) address. A reader from an
+        AudioFanout can also be used to stream in sync to several devices. Audio from
+        local files can be cached by passing an AudioCache as audio_cache.
+
+        Pass keep_session=True to keep the streaming session when done, making next
+        call start faster (it is closed by a call without keep_session).
 
         INCUBATING METHOD - MIGHT CHANGE IN THE FUTURE!
         """
-        self.playback_manager.acquire()
-        audio_file: Optional[AudioSource] = None
-        takeover_release = self.core.takeover(
-            Audio, Metadata, PushUpdater, RemoteControl
+        await self._stream(
+            QueuedFile(
+                file, metadata, override_missing_metadata, kwargs.get("audio_cache")
+            ),
+            kwargs.get("keep_session", False),
         )
-        try:
-            client, context = await self.playback_manager.setup(self.core.service)
-            context.credentials = extract_credentials(self.core.service)
-            context.password = self.core.service.password
 
-            client.listener = self.listener
-            await client.initialize(self.core.service.properties)
+    async def enqueue(
+        self,
+        file: Union[str, io.BufferedIOBase, asyncio.streams.StreamReader],
+        /,
+        metadata: Optional[MediaMetadata] = None,
+        override_missing_metadata: bool = False,
+        **kwargs,
+    ) -> None:
+        """Add local or remote file to play queue.
+
+        Queued files are played gaplessly after each other. Playback of the queue
+        is started in the background if nothing is playing. Same arguments as for
+        stream_file are supported (except keep_session).
+
+        INCUBATING METHOD - MIGHT CHANGE IN THE FUTURE!
+        """
+        if self._queue_task is None and self.playback_manager.is_acquired:
+            raise exceptions.InvalidStateError("already streaming to device")
+
+        self.playback_manager.queue.append(
+            QueuedFile(
+                file, metadata, override_missing_metadata, kwargs.get("audio_cache")
+            )
+        )
+
+        if self._playlist:
+            self._playlist.prefetch()
+        elif self._queue_task is None:
+            self._queue_task = asyncio.ensure_future(self._play_queue())
+
+    async def _play_queue(self) -> None:
+        queue = self.playback_manager.queue
+        try:
+            # Files queued after the playlist has finished (while ending the stream)
+            # are played in a new stream, reusing the session
+            while queue:
+                try:
+                    await self._stream(queue.popleft(), True, play_queue=True)
+                except Exception as ex:  # pylint: disable=broad-except
+                    _LOGGER.debug("Failed to play queued file: %s", ex)
+                    self.listener.failed(ex)
 
-            # After initialize has been called, all the audio properties will be
-            # initialized and can be used in the miniaudio wrapper
-            audio_file = await open_source(
+                if not queue and self.playback_manager.has_idle_session:
+                    await self.playback_manager.teardown()
+        finally:
+            self._queue_task = None
+
+    async def _open_file(
+        self, queued_file: QueuedFile, context: StreamContext
+    ) -> Tuple[AudioSource, MediaMetadata]:
+        file = queued_file.file
+
+        # After initialize has been called, all the audio properties will be
+        # initialized and can be used in the miniaudio wrapper. Shared audio from
+        # a fanout is already decoded and is converted if the device expects
+        # another format (once per format, shared with other devices).
+        if isinstance(file, FanoutReader):
+            source: AudioSource = file
+            if (file.sample_rate, file.channels, file.sample_size) != (
+                context.sample_rate,
+                context.channels,
+                context.bytes_per_channel,
+            ):
+                try:
+                    source = file.fanout.create_converted_reader(
+                        context.sample_rate,
+                        context.channels,
+                        context.bytes_per_channel,
+                        self.core.settings.protocols.raop.resample_quality,
+                    )
+                finally:
+                    await file.close()
+        elif isinstance(file, str) and queued_file.audio_cache is not None:
+            source = await queued_file.audio_cache.open(
+                file,
+                context.sample_rate,
+                context.channels,
+                context.bytes_per_channel,
+            )
+        else:
+            source = await open_source(
                 file,
                 context.sample_rate,
                 context.channels,
                 context.bytes_per_channel,
             )
 
-            # If no custom metadata is provided, try to load from source. If it is
-            # provided, check if metadata should be overridden or not.
-            if metadata is None:
-                file_metadata = await audio_file.get_metadata()
-            elif override_missing_metadata:
-                file_metadata = await audio_file.get_metadata()
-                file_metadata = merge_into(file_metadata, metadata)
-            else:
-                file_metadata = metadata
-
-            # If the user didn't change volume level prior to streaming, try to extract
-            # volume level from device (if supported). Otherwise set the default level
-            # in pyatv.
-            volume = None
-            if not self.audio.has_changed_volume and "initialVolume" in client.info:
-                initial_volume = client.info["initialVolume"]
-                if not isinstance(initial_volume, float):
-                    raise exceptions.ProtocolError(
-                        f"initial volume {initial_volume} has "
-                        "incorrect type {type(initial_volume)}",
-                    )
-                context.volume = initial_volume
+            # Sources reading ahead (e.g. over a network) report buffer statistics
+            if self.read_ahead_hook and hasattr(source, "read_ahead_hook"):
+                setattr(source, "read_ahead_hook", self.read_ahead_hook)
+
+        # If no custom metadata is provided, try to load from source. If it is
+        # provided, check if metadata should be overridden or not.
+        try:
+            if queued_file.metadata is None:
+                file_metadata = await source.get_metadata()
+            elif queued_file.override_missing_metadata:
+                file_metadata = await source.get_metadata()
+                file_metadata = merge_into(file_metadata, queued_file.metadata)
             else:
-                # Try to set volume. If it fails, defer to setting it once
-                # streaming has started.
-                try:
-                    await self.audio.set_volume(self.audio.volume)
-                except Exception as ex:
-                    _LOGGER.debug("Failed to set volume (%s), delaying call", ex)
-                    volume = self.audio.volume
+                file_metadata = queued_file.metadata
+        except Exception:
+            await source.close()
+            raise
+
+        return source, file_metadata
 
-            await client.send_audio(audio_file, file_metadata, volume=volume)
+    def _track_changed(
+        self, client: StreamClient, source: AudioSource, metadata: MediaMetadata
+    ) -> None:
+        # Source might be closed once the task runs, so get duration right away
+        task = asyncio.ensure_future(
+            self._send_next_track(client, metadata, source.duration)
+        )
+        self._track_tasks.add(task)
+        task.add_done_callback(self._track_tasks.discard)
+
+    async def _send_next_track(
+        self, client: StreamClient, metadata: MediaMetadata, duration: int
+    ) -> None:
+        try:
+            await client.start_next_track(metadata, duration)
+        except Exception as ex:  # pylint: disable=broad-except
+            _LOGGER.debug("Failed to send metadata of next track: %s", ex)
+
+    async def _cancel_track_tasks(self) -> None:
+        tasks, self._track_tasks = self._track_tasks, set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _setup_client(
+        self, reuse_session: bool
+    ) -> Tuple[StreamClient, StreamContext]:
+        client, context = await self.playback_manager.setup(self.core.service)
+        client.listener = self.listener
+        client.metrics_hook = self.metrics_hook
+        if reuse_session:
+            _LOGGER.debug("Reusing existing streaming session")
+        else:
+            context.credentials = extract_credentials(self.core.service)
+            context.password = self.core.service.password
+            await client.initialize(self.core.service.properties)
+        return client, context
+
+    async def _send_audio(
+        self,
+        client: StreamClient,
+        source: AudioSource,
+        file_metadata: MediaMetadata,
+        start_time: Optional[int],
+        keep_session: bool,
+    ) -> None:
+        # If the user didn't change volume level prior to streaming, try to extract
+        # volume level from device (if supported). Otherwise set the default level
+        # in pyatv.
+        volume = None
+        if not self.audio.has_changed_volume and "initialVolume" in client.info:
+            initial_volume = client.info["initialVolume"]
+            if not isinstance(initial_volume, float):
+                raise exceptions.ProtocolError(
+                    f"initial volume {initial_volume} has "
+                    "incorrect type {type(initial_volume)}",
+                )
+            client.context.volume = initial_volume
+        else:
+            # Try to set volume. If it fails, defer to setting it once
+            # streaming has started.
+            try:
+                await self.audio.set_volume(self.audio.volume)
+            except Exception as ex:
+                _LOGGER.debug("Failed to set volume (%s), delaying call", ex)
+                volume = self.audio.volume
+
+        await client.send_audio(
+            source,
+            file_metadata,
+            volume=volume,
+            start_time=start_time,
+            keep_session=keep_session,
+        )
+
+    async def _stream(
+        self, queued_file: QueuedFile, keep_session: bool, play_queue: bool = False
+    ) -> None:
+        self.playback_manager.acquire()
+        source: Optional[AudioSource] = None
+        if isinstance(queued_file.file, FanoutReader):
+            source = queued_file.file
+        takeover_release = self.core.takeover(
+            Audio, Metadata, PushUpdater, RemoteControl
+        )
+        try:
+            # A stream client only remains between calls if a session was kept
+            reuse_session = self.playback_manager.stream_client is not None
+            client, context = await self._setup_client(reuse_session)
+
+            source, file_metadata = await self._open_file(queued_file, context)
+            start_time: Optional[int] = None
+            if isinstance(source, FanoutReader):
+                start_time = source.start_time
+
+            # Queued files are opened in advance and played back to back
+            if play_queue:
+                source = self._playlist = PlaylistSource(
+                    source,
+                    file_metadata,
+                    self.playback_manager.queue,
+                    lambda queued: self._open_file(queued, context),
+                    lambda next_source, next_metadata: self._track_changed(
+                        client, next_source, next_metadata
+                    ),
+                )
+
+            try:
+                await self._send_audio(
+                    client, source, file_metadata, start_time, keep_session
+                )
+            except SessionLostError:
+                # Receiver dropped the kept session while idle, so set up a new one
+                _LOGGER.debug("Kept streaming session was lost, setting up new session")
+                await self.playback_manager.teardown()
+                self.playback_manager.acquire()
+                client, context = await self._setup_client(reuse_session=False)
+                await self._send_audio(
+                    client, source, file_metadata, start_time, keep_session
+                )
         finally:
             takeover_release()
-            if audio_file:
-                await audio_file.close()
-            await self.playback_manager.teardown()
+            self._playlist = None
+            await self._cancel_track_tasks()
+            if source:
+                await source.close()
+            if self.playback_manager.stream_client and (
+                keep_session and self.playback_manager.stream_client.has_session
+            ):
+                self.playback_manager.release()
+            else:
+                await self.playback_manager.teardown()
 
 
 class RaopRemoteControl(RemoteControl):
@@ -418,11 +690,13 @@ class RaopRemoteControl(RemoteControl):
     # gives a better experience in Home Assistant.
     async def pause(self) -> None:
         """Press key pause."""
+        self.playback_manager.queue.clear()
         if self.playback_manager.stream_client:
             self.playback_manager.stream_client.stop()
 
     async def stop(self) -> None:
         """Press key stop."""
+        self.playback_manager.queue.clear()
         if self.playback_manager.stream_client:
             self.playback_manager.stream_client.stop()
 
@@ -534,6 +808,11 @@ def setup(  # pylint: disable=too-many-locals
             playback_manager.playback_info = None
             self._trigger()
 
+        def failed(self, exception: Exception) -> None:
+            """Playback of a queued file failed."""
+            if push_updater.active:
+                push_updater.listener.playstatus_error(push_updater, exception)
+
         @staticmethod
         def _trigger():
             """Trigger push update."""
@@ -543,8 +822,10 @@ def setup(  # pylint: disable=too-many-locals
     raop_listener = RaopStateListener()
     raop_audio = RaopAudio(playback_manager, core.state_dispatcher)
 
+    raop_stream = RaopStream(core, raop_listener, raop_audio, playback_manager)
+
     interfaces = {
-        Stream: RaopStream(core, raop_listener, raop_audio, playback_manager),
+        Stream: raop_stream,
         Features: RaopFeatures(playback_manager),
         PushUpdater: push_updater,
         Metadata: metadata,
@@ -556,6 +837,13 @@ def setup(  # pylint: disable=too-many-locals
         return True
 
     def _close() -> Set[asyncio.Task]:
+        # Stop playing queued files, which also ends the session
+        if raop_stream.is_playing_queue:
+            return {asyncio.ensure_future(raop_stream.clear_queue())}
+
+        # End kept streaming session (if any)
+        if playback_manager.has_idle_session:
+            return {asyncio.ensure_future(playback_manager.teardown())}
         return set()
 
     def _device_info() -> Dict[str, Any]:
@@ -575,6 +863,7 @@ def setup(  # pylint: disable=too-many-locals
         set(
             [
                 FeatureName.StreamFile,
+                FeatureName.EnqueueFile,
                 FeatureName.PushUpdates,
                 FeatureName.Artist,
                 FeatureName.Album,
@@ -0,0 +1,215 @@
+"""Cache of converted audio for files that are played repeatedly."""
+
+import asyncio
+from dataclasses import dataclass
+import hashlib
+import logging
+import os
+from typing import Optional, Tuple
+
+from pyatv.interface import MediaMetadata
+from pyatv.protocols.raop.audio_source import AudioSource, open_source
+from pyatv.support.cache import Cache
+
+_LOGGER = logging.getLogger(__name__)
+
+# Default maximum total size of cached audio (roughly three minutes of CD quality)
+DEFAULT_MAX_SIZE = 32 * 1024 * 1024
+
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class CachedAudio:
+    """Converted audio frames and metadata of a file."""
+
+    frames: bytes
+    metadata: MediaMetadata
+    duration: int
+
+    def __len__(self) -> int:
+        """Return size of cached audio frames."""
+        return len(self.frames)
+
+
+CacheKey = Tuple[str, int, int, int]
+
+
+def _hash_file(filename: str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, "rb") as handle:
+        while block := handle.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CachedSource(AudioSource):
+    """Audio source playing cached audio frames."""
+
+    def __init__(
+        self, audio: CachedAudio, sample_rate: int, channels: int, sample_size: int
+    ) -> None:
+        """Initialize a new CachedSource instance."""
+        self._audio = audio
+        self._frames = memoryview(audio.frames)
+        self._sample_rate = sample_rate
+        self._channels = channels
+        self._sample_size = sample_size
+        self._pos = 0
+
+    async def readframes(self, nframes: int) -> bytes:
+        """Read number of frames and advance in stream."""
+        frames = self._frames[
+            self._pos : self._pos + nframes * self._channels * self._sample_size
+        ]
+        self._pos += len(frames)
+        return frames if frames else AudioSource.NO_FRAMES  # type: ignore
+
+    def frames_ready(self, nframes: int) -> bool:
+        """Return if number of frames can be read without waiting for more data."""
+        return True
+
+    async def get_metadata(self) -> MediaMetadata:
+        """Return media metadata if available and possible."""
+        return self._audio.metadata
+
+    @property
+    def sample_rate(self) -> int:
+        """Return sample rate."""
+        return self._sample_rate
+
+    @property
+    def channels(self) -> int:
+        """Return number of audio channels."""
+        return self._channels
+
+    @property
+    def sample_size(self) -> int:
+        """Return number of bytes per sample."""
+        return self._sample_size
+
+    @property
+    def duration(self) -> int:
+        """Return duration in seconds."""
+        return self._audio.duration
+
+
+class RecordingSource(AudioSource):
+    """Audio source saving frames read from another source to a cache.
+
+    Audio is only put in the cache once all frames have been read, i.e. the file was
+    played to the end.
+    """
+
+    def __init__(self, source: AudioSource, cache: "AudioCache", key: CacheKey):
+        """Initialize a new RecordingSource instance."""
+        self.source = source
+        self._cache = cache
+        self._key = key
+        self._frames: Optional[bytearray] = bytearray()
+        self._metadata: Optional[MediaMetadata] = None
+
+    async def close(self) -> None:
+        """Close underlying resources."""
+        await self.source.close()
+
+    async def readframes(self, nframes: int) -> bytes:
+        """Read number of frames and advance in stream."""
+        frames = await self.source.readframes(nframes)
+        if self._frames is None:
+            return frames
+
+        if frames:
+            self._frames += frames
+            if len(self._frames) > self._cache.max_size:
+                _LOGGER.debug("Audio too large to be cached")
+                self._frames = None
+        else:
+            self._cache.put(
+                self._key,
+                CachedAudio(
+                    bytes(self._frames), await self.get_metadata(), self.duration
+                ),
+            )
+            self._frames = None
+        return frames
+
+    def frames_ready(self, nframes: int) -> bool:
+        """Return if number of frames can be read without waiting for more data."""
+        return self.source.frames_ready(nframes)
+
+    async def get_metadata(self) -> MediaMetadata:
+        """Return media metadata if available and possible."""
+        if self._metadata is None:
+            self._metadata = await self.source.get_metadata()
+        return self._metadata
+
+    @property
+    def sample_rate(self) -> int:
+        """Return sample rate."""
+        return self.source.sample_rate
+
+    @property
+    def channels(self) -> int:
+        """Return number of audio channels."""
+        return self.source.channels
+
+    @property
+    def sample_size(self) -> int:
+        """Return number of bytes per sample."""
+        return self.source.sample_size
+
+    @property
+    def duration(self) -> int:
+        """Return duration in seconds."""
+        return self.source.duration
+
+
+class AudioCache:
+    """LRU cache of converted audio from local files, limited in total size."""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, limit: int = 64) -> None:
+        """Initialize a new AudioCache instance."""
+        self._cache: Cache = Cache(limit=limit, max_size=max_size)
+
+    @property
+    def max_size(self) -> int:
+        """Return maximum total size of cached audio."""
+        return self._cache.max_size
+
+    @property
+    def size(self) -> int:
+        """Return total size of cached audio."""
+        return self._cache.size
+
+    def __len__(self) -> int:
+        """Return number of cached files."""
+        return len(self._cache)
+
+    def put(self, key: CacheKey, audio: CachedAudio) -> None:
+        """Put converted audio in cache."""
+        if self._cache.put(key, audio):
+            _LOGGER.debug("Cached %d bytes of audio for %s", len(audio), key)
+
+    async def open(
+        self, filename: str, sample_rate: int, channels: int, sample_size: int
+    ) -> AudioSource:
+        """Return an audio source for a file, serving audio from cache if possible.
+
+        Only local files are cached, other sources (e.g. URLs) are opened as usual.
+        """
+        if not os.path.isfile(filename):
+            return await open_source(filename, sample_rate, channels, sample_size)
+
+        loop = asyncio.get_event_loop()
+        file_hash = await loop.run_in_executor(None, _hash_file, filename)
+        key = (file_hash, sample_rate, channels, sample_size)
+
+        if key in self._cache:
+            _LOGGER.debug("Playing %s from cache", filename)
+            return CachedSource(
+                self._cache.get(key), sample_rate, channels, sample_size
+            )
+
+        source = await open_source(filename, sample_rate, channels, sample_size)
+        return RecordingSource(source, self, key)
@@ -0,0 +1,440 @@
+"""Audio codecs used to encode raw PCM frames before they are sent to a receiver."""
+
+from abc import ABC, abstractmethod
+import array
+import logging
+from struct import Struct
+import sys
+from typing import Any, List, Optional, Tuple, Union
+
+from pyatv.protocols.raop.parsers import CompressionType
+from pyatv.protocols.raop.pcm import load_numpy
+from pyatv.settings import AudioCodec as AudioCodecSetting
+from pyatv.support.rtsp import DEFAULT_RTPMAP, FRAMES_PER_PACKET
+
+_LOGGER = logging.getLogger(__name__)
+
+# Values used by AirPlay 2 to describe audio format and compression
+PCM_COMPRESSION_TYPE = 1
+ALAC_COMPRESSION_TYPE = 2
+PCM_44100_16_2_AUDIO_FORMAT = 0x800
+ALAC_44100_16_2_AUDIO_FORMAT = 0x40000
+
+# Parameters announced in the ALAC "magic cookie" (fmtp) and used by the encoder
+ALAC_PB = 40
+ALAC_MB = 10
+ALAC_KB = 14
+ALAC_MAX_RUN = 255
+
+# Element tags in an ALAC frame
+_ID_SCE = 0  # Single channel element
+_ID_CPE = 1  # Channel pair element
+_ID_END = 7
+
+# Constants from the adaptive Golomb coder in the reference implementation
+_QBSHIFT = 9
+_QB = 1 << _QBSHIFT
+_MMULSHIFT = 2
+_MDENSHIFT = _QBSHIFT - _MMULSHIFT - 1
+_MOFF = 1 << (_MDENSHIFT - 2)
+_BITOFF = 24
+_N_MAX_MEAN_CLAMP = 0xFFFF
+_N_MEAN_CLAMP_VAL = 0xFFFF
+_MAX_PREFIX = 9
+_MAX_DATATYPE_BITS_16 = 16
+_MAX_CODE_BITS = 25
+_WB = (1 << ALAC_KB) - 1
+
+# Prediction parameters: numCoefs=31 is a special case in ALAC meaning first order
+# prediction, i.e. each residual is the difference to the previous sample
+_DEN_SHIFT = 9
+_PB_FACTOR = 4
+_FIRST_ORDER_COEFS = 31
+
+# Size of frame header (tag, instance, unused bits, flags) and end tag
+_HEADER_BITS = 3 + 4 + 12 + 4
+_END_BITS = 3
+
+_WORD = Struct(">I")
+
+PcmFrames = Union[bytes, bytearray, memoryview]
+
+
+class AudioCodec(ABC):
+    """Base class for a codec encoding PCM frames into audio packet payload."""
+
+    def __init__(
+        self,
+        channels: int,
+        sample_size: int,
+        frames_per_packet: int = FRAMES_PER_PACKET,
+    ) -> None:
+        """Initialize a new AudioCodec instance."""
+        self.channels: int = channels
+        self.sample_size: int = sample_size
+        self.frames_per_packet: int = frames_per_packet
+        self._encoded_silence: Optional[bytes] = None
+
+    @property
+    def packet_size(self) -> int:
+        """Return number of bytes in a full packet of PCM frames."""
+        return self.frames_per_packet * self.channels * self.sample_size
+
+    @property
+    @abstractmethod
+    def compression_type(self) -> int:
+        """Return compression type ("ct") as used by AirPlay 2."""
+
+    @property
+    @abstractmethod
+    def audio_format(self) -> int:
+        """Return audio format as used by AirPlay 2."""
+
+    @property
+    @abstractmethod
+    def max_payload_size(self) -> int:
+        """Return maximum number of bytes produced for one packet."""
+
+    @property
+    @abstractmethod
+    def rtpmap(self) -> str:
+        """Return encoding part of rtpmap attribute used in SDP."""
+
+    @abstractmethod
+    def encode_into(self, frames: PcmFrames, output: memoryview) -> int:
+        """Encode PCM frames into output buffer.
+
+        If less frames than in a full packet are provided, the remaining frames are
+        treated as silence. Returns number of bytes written to output.
+        """
+
+    def encode_silence_into(self, output: memoryview) -> int:
+        """Encode a packet of silence into output buffer.
+
+        Silence is only encoded once and then copied. Returns number of bytes written
+        to output.
+        """
+        if self._encoded_silence is None:
+            buffer = memoryview(bytearray(self.max_payload_size))
+            self._encoded_silence = bytes(buffer[0 : self.encode_into(b"", buffer)])
+
+        size = len(self._encoded_silence)
+        output[0:size] = self._encoded_silence
+        return size
+
+
+class PcmCodec(AudioCodec):
+    """Codec passing through raw PCM (L16) frames."""
+
+    def __init__(
+        self,
+        channels: int,
+        sample_size: int,
+        frames_per_packet: int = FRAMES_PER_PACKET,
+    ) -> None:
+        """Initialize a new PcmCodec instance."""
+        super().__init__(channels, sample_size, frames_per_packet)
+        self._silence: memoryview = memoryview(bytes(self.packet_size))
+
+    @property
+    def compression_type(self) -> int:
+        """Return compression type ("ct") as used by AirPlay 2."""
+        return PCM_COMPRESSION_TYPE
+
+    @property
+    def audio_format(self) -> int:
+        """Return audio format as used by AirPlay 2."""
+        return PCM_44100_16_2_AUDIO_FORMAT
+
+    @property
+    def max_payload_size(self) -> int:
+        """Return maximum number of bytes produced for one packet."""
+        return self.packet_size
+
+    @property
+    def rtpmap(self) -> str:
+        """Return encoding part of rtpmap attribute used in SDP."""
+        return DEFAULT_RTPMAP
+
+    def encode_into(self, frames: PcmFrames, output: memoryview) -> int:
+        """Encode PCM frames into output buffer."""
+        frames_size = len(frames)
+        packet_size = self.packet_size
+        output[0:frames_size] = frames
+
+        # The audio stream length seldom aligns with number of frames per packet,
+        # so pad the last packet with zeros
+        if frames_size != packet_size:
+            output[frames_size:packet_size] = self._silence[frames_size:]
+
+        return packet_size
+
+
+class _BitWriter:
+    """Write MSB first bit fields into a buffer."""
+
+    def __init__(self, output: memoryview) -> None:
+        self._output = output
+        self._limit = len(output)
+        self._pos = 0
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, bits: int) -> None:
+        self._acc = (self._acc << bits) | value
+        self._bits += bits
+        if self._bits >= 32:
+            if self._pos + 4 > self._limit:
+                raise OverflowError("output buffer full")
+            self._bits -= 32
+            _WORD.pack_into(self._output, self._pos, self._acc >> self._bits)
+            self._acc &= (1 << self._bits) - 1
+            self._pos += 4
+
+    def flush(self) -> int:
+        """Write remaining bits (padded to a full byte) and return written bytes."""
+        num_bytes = (self._bits + 7) // 8
+        if self._pos + num_bytes > self._limit:
+            raise OverflowError("output buffer full")
+        if num_bytes:
+            value = self._acc << (num_bytes * 8 - self._bits)
+            self._output[self._pos : self._pos + num_bytes] = value.to_bytes(
+                num_bytes, "big"
+            )
+            self._pos += num_bytes
+        self._acc = self._bits = 0
+        return self._pos
+
+
+def _golomb_code(value: int, k: int, modulo: int) -> Tuple[int, int]:
+    """Return adaptive Golomb code for a value and its size in bits.
+
+    Size is zero if code becomes too large, meaning the value must be escaped.
+    """
+    prefix, remainder = divmod(value, modulo)
+    if prefix >= _MAX_PREFIX:
+        return 0, 0
+
+    if remainder == 0:
+        bits = prefix + k
+        code = ((1 << prefix) - 1) << k
+    else:
+        bits = prefix + k + 1
+        code = (((1 << prefix) - 1) << (k + 1)) + remainder + 1
+
+    if bits > _MAX_CODE_BITS:
+        return 0, 0
+    return code, bits
+
+
+# Residuals of first order prediction for each channel, folded into non-negative
+# values as expected by _write_residuals
+def _fold_numpy(np: Any, frames: PcmFrames, channels: int, channel_bits: int) -> Any:
+    samples = np.frombuffer(frames, dtype=">i2").reshape(-1, channels).astype(np.int32)
+    residuals = np.diff(samples, axis=0, prepend=0)
+    if channel_bits == 16:
+        residuals = ((residuals + 0x8000) & 0xFFFF) - 0x8000
+    return np.where(residuals >= 0, residuals << 1, (-residuals << 1) - 1).T.tolist()
+
+
+def _fold_python(
+    frames: PcmFrames, channels: int, channel_bits: int
+) -> List[List[int]]:
+    samples = array.array("h")
+    samples.frombytes(frames)
+    if sys.byteorder == "little":
+        samples.byteswap()
+
+    folded = []
+    for channel in range(channels):
+        channel_samples = samples[channel::channels]
+        residuals = [channel_samples[0]]
+        residuals.extend(
+            current - previous
+            for previous, current in zip(channel_samples, channel_samples[1:])
+        )
+        if channel_bits == 16:
+            residuals = [((x + 0x8000) & 0xFFFF) - 0x8000 for x in residuals]
+        folded.append([(x << 1) if x >= 0 else ((-x << 1) - 1) for x in residuals])
+    return folded
+
+
+def _write_residuals(writer: _BitWriter, folded: List[int], bit_size: int) -> None:
+    """Write residuals using adaptive Golomb coding (dyn_comp in ALAC).
+
+    Residuals are folded into non-negative values (2x for positive and -2x-1 for
+    negative residuals) before being passed here.
+    """
+    write = writer.write
+    num_samples = len(folded)
+    mean = ALAC_MB
+    zmode = 0
+    pos = 0
+    while pos < num_samples:
+        k = min(((mean >> _QBSHIFT) + 3).bit_length() - 1, ALAC_KB)
+
+        value = folded[pos] - zmode
+
+        code, bits = _golomb_code(value, k, (1 << k) - 1)
+        if bits:
+            write(code, bits)
+        else:
+            # Escape: all prefix bits set followed by the value itself
+            write((1 << _MAX_PREFIX) - 1, _MAX_PREFIX)
+            write(value, bit_size)
+
+        pos += 1
+        mean = ALAC_PB * (value + zmode) + mean - ((ALAC_PB * mean) >> _QBSHIFT)
+        if value > _N_MAX_MEAN_CLAMP:
+            mean = _N_MEAN_CLAMP_VAL
+
+        zmode = 0
+        if (mean << _MMULSHIFT) < _QB and pos < num_samples:
+            # Mean is low, so encode number of zeros that follows
+            zmode = 1
+            zeros = 0
+            while pos < num_samples and folded[pos] == 0:
+                zeros += 1
+                pos += 1
+                if zeros >= 0xFFFF:
+                    zmode = 0
+                    break
+
+            k = (32 - mean.bit_length()) - _BITOFF + ((mean + _MOFF) >> _MDENSHIFT)
+            code, bits = _golomb_code(zeros, k, ((1 << k) - 1) & _WB)
+            if bits:
+                write(code, bits)
+            else:
+                write((1 << _MAX_PREFIX) - 1, _MAX_PREFIX)
+                write(zeros, _MAX_DATATYPE_BITS_16)
+            mean = 0
+
+
+class AlacCodec(AudioCodec):
+    """Codec encoding 16 bit PCM frames into Apple Lossless (ALAC).
+
+    First order prediction is used instead of adaptive FIR prediction, so output is
+    larger than with the reference encoder but still a valid ALAC bit stream. Frames
+    that do not compress well are stored uncompressed.
+    """
+
+    def __init__(
+        self,
+        channels: int,
+        sample_size: int,
+        frames_per_packet: int = FRAMES_PER_PACKET,
+    ) -> None:
+        """Initialize a new AlacCodec instance."""
+        if sample_size != 2 or channels not in (1, 2):
+            raise ValueError(f"unsupported format: {channels}ch/{sample_size * 8}bit")
+        super().__init__(channels, sample_size, frames_per_packet)
+        self._silence: bytes = bytes(self.packet_size)
+        self._padded: bytearray = bytearray(self.packet_size)
+        self._tag: int = _ID_CPE if channels == 2 else _ID_SCE
+
+        # A second channel is stored with one extra bit in a channel pair
+        self._channel_bits: int = 16 + (1 if channels == 2 else 0)
+
+    @property
+    def compression_type(self) -> int:
+        """Return compression type ("ct") as used by AirPlay 2."""
+        return ALAC_COMPRESSION_TYPE
+
+    @property
+    def audio_format(self) -> int:
+        """Return audio format as used by AirPlay 2."""
+        return ALAC_44100_16_2_AUDIO_FORMAT
+
+    @property
+    def max_payload_size(self) -> int:
+        """Return maximum number of bytes produced for one packet."""
+        return (_HEADER_BITS + 8 * self.packet_size + _END_BITS + 7) // 8
+
+    @property
+    def rtpmap(self) -> str:
+        """Return encoding part of rtpmap attribute used in SDP."""
+        return "AppleLossless"
+
+    def encode_into(self, frames: PcmFrames, output: memoryview) -> int:
+        """Encode PCM frames into output buffer."""
+        # Pad last packet with silence (in a buffer reused between packets)
+        frames_size = len(frames)
+        if frames_size != self.packet_size:
+            self._padded[0:frames_size] = frames
+            self._padded[frames_size:] = self._silence[frames_size:]
+            frames = self._padded
+
+        uncompressed_size = self.max_payload_size
+        try:
+            size = self._encode_compressed(frames, output[0 : uncompressed_size - 1])
+        except OverflowError:
+            size = self._encode_uncompressed(frames, output)
+
+        return size
+
+    def _encode_compressed(self, frames: PcmFrames, output: memoryview) -> int:
+        # Residuals of first order prediction are calculated for all samples at
+        # once, only the bit packing is done sample by sample
+        np = load_numpy()
+        if np is not None:
+            folded = _fold_numpy(np, frames, self.channels, self._channel_bits)
+        else:
+            folded = _fold_python(frames, self.channels, self._channel_bits)
+
+        writer = _BitWriter(output)
+        writer.write(self._tag, 3)
+        writer.write(0, 4)  # Element instance tag
+        writer.write(0, 12)  # Unused
+        writer.write(0, 4)  # Partial frame, shift and escape flags
+        writer.write(0, 8)  # Mix bits (no stereo decorrelation)
+        writer.write(0, 8)  # Mix residual
+
+        for _ in range(self.channels):
+            writer.write(_DEN_SHIFT, 8)  # Prediction mode (0) and shift
+            writer.write((_PB_FACTOR << 5) | _FIRST_ORDER_COEFS, 8)
+            for _ in range(_FIRST_ORDER_COEFS):
+                writer.write(0, 16)  # Not used for first order prediction
+
+        for channel_folded in folded:
+            _write_residuals(writer, channel_folded, self._channel_bits)
+
+        writer.write(_ID_END, _END_BITS)
+        return writer.flush()
+
+    def _encode_uncompressed(self, frames: PcmFrames, output: memoryview) -> int:
+        # An uncompressed frame is basically the header followed by the raw big endian
+        # samples (interleaved), i.e. the input, so use integer arithmetics to shift
+        # everything in place.
+        header = (self._tag << 20) | 0x1  # Escape flag set
+        value = (header << (8 * len(frames))) | int.from_bytes(frames, "big")
+        value = (value << _END_BITS) | _ID_END
+
+        total_bits = _HEADER_BITS + 8 * len(frames) + _END_BITS
+        size = (total_bits + 7) // 8
+        output[0:size] = (value << (8 * size - total_bits)).to_bytes(size, "big")
+        return size
+
+
+def create_codec(
+    codec: AudioCodecSetting,
+    compression_types: CompressionType,
+    channels: int,
+    sample_size: int,
+) -> AudioCodec:
+    """Create a codec based on setting and what the receiver supports.
+
+    PCM is used as fallback if requested codec is not supported by the receiver or
+    if audio format is not supported by the codec.
+    """
+    if codec == AudioCodecSetting.ALAC:
+        if CompressionType.ALAC not in compression_types:
+            _LOGGER.debug("ALAC not supported by receiver, falling back to PCM")
+        elif sample_size != 2 or channels not in (1, 2):
+            _LOGGER.debug(
+                "ALAC not supported for %dch/%dbit, falling back to PCM",
+                channels,
+                sample_size * 8,
+            )
+        else:
+            return AlacCodec(channels, sample_size)
+    return PcmCodec(channels, sample_size)
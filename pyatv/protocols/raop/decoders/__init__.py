@@ -0,0 +1,84 @@
+"""Registry of audio decoder backends."""
+
+import asyncio
+import importlib
+import io
+import logging
+from types import ModuleType
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
+
+from pyatv.exceptions import NotSupportedError
+
+if TYPE_CHECKING:
+    from pyatv.protocols.raop.audio_source import AudioSource
+
+_LOGGER = logging.getLogger(__name__)
+
+DECODERS: Dict[str, str] = {
+    "raw": "pyatv.protocols.raop.decoders.raw",
+    "miniaudio": "pyatv.protocols.raop.decoders.miniaudio",
+    "ffmpeg": "pyatv.protocols.raop.decoders.ffmpeg",
+}
+
+# Uncompressed files are played without decoding, ffmpeg is used as last resort
+DEFAULT_DECODERS = ["raw", "miniaudio", "ffmpeg"]
+
+_LOADED: Dict[str, Optional[ModuleType]] = {}
+
+
+class DecoderUnavailableError(NotSupportedError):
+    """Raised by a decoder backend that cannot be used, e.g. missing a program."""
+
+
+def load_decoder(name: str) -> Optional[ModuleType]:
+    """Import a decoder backend and return it.
+
+    None is returned if dependencies required by the backend are not installed.
+    """
+    if name not in DECODERS:
+        raise NotSupportedError(f"unknown decoder: {name}")
+
+    if name not in _LOADED:
+        try:
+            _LOADED[name] = importlib.import_module(DECODERS[name])
+        except ImportError as ex:
+            _LOGGER.debug("Decoder %s is not available: %s", name, ex)
+            _LOADED[name] = None
+    return _LOADED[name]
+
+
+async def open_source(
+    source: Union[str, io.BufferedIOBase, asyncio.streams.StreamReader],
+    sample_rate: int,
+    channels: int,
+    sample_size: int,
+    decoder_names: Optional[Sequence[str]] = None,
+) -> "AudioSource":
+    """Open source with first decoder backend that supports it.
+
+    If no backend supports the source, errors from all backends (that are
+    available) are combined into one NotSupportedError.
+    """
+    errors: List[Tuple[str, NotSupportedError]] = []
+    for name in DEFAULT_DECODERS if decoder_names is None else decoder_names:
+        decoder = load_decoder(name)
+        if decoder is None:
+            continue
+
+        try:
+            return await decoder.open_source(source, sample_rate, channels, sample_size)
+        except DecoderUnavailableError as ex:
+            _LOGGER.debug("Decoder %s is not available: %s", name, ex)
+        except NotSupportedError as ex:
+            _LOGGER.debug("Decoder %s does not support source: %s", name, ex)
+            errors.append((name, ex))
+
+    if not errors:
+        raise NotSupportedError("no decoder available")
+    if len(errors) == 1:
+        raise errors[0][1]
+    raise NotSupportedError(
+        "no decoder supports source ("
+        + "; ".join(f"{name}: {ex}" for name, ex in errors)
+        + ")"
+    ) from errors[0][1]
@@ -0,0 +1,164 @@
+"""Decoder backend using an ffmpeg subprocess."""
+
+import asyncio
+import io
+import logging
+import math
+import shutil
+from typing import Optional, Union
+
+from pyatv.exceptions import NotSupportedError
+from pyatv.interface import MediaMetadata
+from pyatv.protocols.raop.audio_source import AudioSource
+from pyatv.protocols.raop.decoders import DecoderUnavailableError
+from pyatv.support.metadata import EMPTY_METADATA, get_metadata
+
+_LOGGER = logging.getLogger(__name__)
+
+FFMPEG_BINARY = "ffmpeg"
+
+# Output format (big endian) used by ffmpeg for each sample size
+_SAMPLE_FORMATS = {1: "u8", 2: "s16be", 3: "s24be", 4: "s32be"}
+
+# Amount of error output from ffmpeg to keep for error messages (in bytes)
+MAX_ERROR_SIZE = 1024
+
+
+class FfmpegSource(AudioSource):
+    """Audio source decoding a file or URL with ffmpeg (which must be in PATH)."""
+
+    def __init__(
+        self,
+        source: str,
+        process: asyncio.subprocess.Process,
+        metadata: MediaMetadata,
+        sample_rate: int,
+        channels: int,
+        sample_size: int,
+    ) -> None:
+        """Initialize a new FfmpegSource instance."""
+        self.source: str = source
+        self.process: asyncio.subprocess.Process = process
+        self.metadata: MediaMetadata = metadata
+        self._sample_rate: int = sample_rate
+        self._channels: int = channels
+        self._sample_size: int = sample_size
+        self._frame_size: int = channels * sample_size
+        self._pending: bytes = b""
+        self._errors: bytes = b""
+        self._errors_task: asyncio.Task = asyncio.ensure_future(self._read_errors())
+
+    @classmethod
+    async def open(
+        cls, source: str, sample_rate: int, channels: int, sample_size: int
+    ) -> "FfmpegSource":
+        """Return a new AudioSource instance playing from the provided source."""
+        binary = shutil.which(FFMPEG_BINARY)
+        if binary is None:
+            raise DecoderUnavailableError(f"{FFMPEG_BINARY} not found")
+        if sample_size not in _SAMPLE_FORMATS:
+            raise NotSupportedError(f"unsupported sample size: {sample_size}")
+
+        metadata = EMPTY_METADATA
+        if not source.startswith(("http://", "https://")):
+            try:
+                metadata = await get_metadata(source)
+            except Exception as ex:
+                _LOGGER.debug("Failed to load metadata from %s: %s", source, ex)
+
+        process = await asyncio.create_subprocess_exec(
+            binary,
+            "-nostdin",
+            "-loglevel",
+            "error",
+            "-i",
+            source,
+            "-f",
+            _SAMPLE_FORMATS[sample_size],
+            "-ar",
+            str(sample_rate),
+            "-ac",
+            str(channels),
+            "-",
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        instance = cls(source, process, metadata, sample_rate, channels, sample_size)
+
+        # Read first frame to find out if ffmpeg could decode the source at all
+        instance._pending = await instance._read(instance._frame_size)
+        if not instance._pending:
+            error = await instance._stop()
+            raise NotSupportedError(f"ffmpeg failed to decode {source}: {error}")
+        return instance
+
+    async def close(self) -> None:
+        """Close underlying resources."""
+        await self._stop()
+
+    async def _read_errors(self) -> None:
+        # Error output must be read continuously, otherwise ffmpeg stalls when the
+        # pipe is full
+        assert self.process.stderr
+        while data := await self.process.stderr.read(MAX_ERROR_SIZE):
+            self._errors = (self._errors + data)[-MAX_ERROR_SIZE:]
+
+    async def _stop(self) -> Optional[str]:
+        if self.process.returncode is None:
+            self.process.kill()
+        await self._errors_task
+        await self.process.wait()
+        return self._errors.decode("utf-8", errors="replace").strip() or None
+
+    async def _read(self, size: int) -> bytes:
+        assert self.process.stdout
+        try:
+            return await self.process.stdout.readexactly(size)
+        except asyncio.IncompleteReadError as ex:
+            return ex.partial
+
+    async def readframes(self, nframes: int) -> bytes:
+        """Read number of frames and advance in stream."""
+        size = nframes * self._frame_size
+        pending, self._pending = self._pending, b""
+        data = pending + await self._read(size - len(pending))
+
+        # Drop partial frame at end of stream
+        return data[: len(data) - len(data) % self._frame_size]
+
+    async def get_metadata(self) -> MediaMetadata:
+        """Return media metadata if available and possible."""
+        return self.metadata
+
+    @property
+    def sample_rate(self) -> int:
+        """Return sample rate."""
+        return self._sample_rate
+
+    @property
+    def channels(self) -> int:
+        """Return number of audio channels."""
+        return self._channels
+
+    @property
+    def sample_size(self) -> int:
+        """Return number of bytes per sample."""
+        return self._sample_size
+
+    @property
+    def duration(self) -> int:
+        """Return duration in seconds."""
+        return math.ceil(self.metadata.duration or 0)
+
+
+async def open_source(
+    source: Union[str, io.BufferedIOBase, asyncio.streams.StreamReader],
+    sample_rate: int,
+    channels: int,
+    sample_size: int,
+) -> AudioSource:
+    """Create an AudioSource from given input source."""
+    if not isinstance(source, str):
+        raise NotSupportedError("only files and URLs are supported")
+    return await FfmpegSource.open(source, sample_rate, channels, sample_size)
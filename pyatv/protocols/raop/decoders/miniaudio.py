@@ -0,0 +1,1053 @@
+"""Decoder backend using miniaudio."""
+
+import array
+import asyncio
+from contextlib import suppress
+from functools import partial
+import io
+import logging
+import math
+import re
+import threading
+import time
+from typing import Generator, Optional, Union
+
+import miniaudio
+from miniaudio import SampleFormat
+import requests
+
+from pyatv.exceptions import NotSupportedError, OperationTimeoutError, ProtocolError
+from pyatv.interface import MediaMetadata
+from pyatv.protocols.raop.audio_source import FRAMES_PER_PACKET, AudioSource
+from pyatv.protocols.raop.pcm import convert_samples, decoded_sample_size
+from pyatv.protocols.raop.read_ahead import (
+    ReadAheadDepth,
+    ReadAheadHook,
+    ReadAheadStatistics,
+)
+from pyatv.support.buffer import SemiSeekableBuffer
+from pyatv.support.metadata import EMPTY_METADATA, get_metadata
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10.0  # Seconds
+
+BUFFER_SIZE = 64 * 1024
+HEADROOM_SIZE = 32 * 1024
+
+
+def _int2sf(sample_size: int) -> SampleFormat:
+    if sample_size == 1:
+        return SampleFormat.UNSIGNED8
+    if sample_size == 2:
+        return SampleFormat.SIGNED16
+    if sample_size == 3:
+        return SampleFormat.SIGNED24
+    if sample_size == 4:
+        return SampleFormat.SIGNED32
+    raise NotSupportedError(f"unsupported sample size: {sample_size}")
+
+
+class StreamableIOBaseWrapper(miniaudio.StreamableSource):
+    """Wraps a reader into a StreamableSource that miniaudio can consume."""
+
+    def __init__(self, reader: io.BufferedIOBase) -> None:
+        """Initialize a new ReaderWrapper instance."""
+        self.reader: io.BufferedIOBase = reader
+
+    def read(self, num_bytes: int) -> Union[bytes, memoryview]:
+        """Read and return data from buffer."""
+        return self.reader.read(num_bytes)
+
+    def seek(self, offset: int, origin: miniaudio.SeekOrigin) -> bool:
+        """Seek in stream."""
+        if not self.reader.seekable():
+            return False
+
+        whence = 1 if origin == miniaudio.SeekOrigin.CURRENT else 0
+        self.reader.seek(offset, whence)
+        return True
+
+
+class BufferedIOBaseWrapper(io.BufferedIOBase):
+    """Wrap a BufferedIOBase, making it seekable."""
+
+    def __init__(self, reader: io.BufferedIOBase, buffer: SemiSeekableBuffer) -> None:
+        """Initialize a new BufferedIOBaseWrapper instance."""
+        self.reader: io.BufferedIOBase = reader
+        self.buffer: SemiSeekableBuffer = buffer
+        self.name = "stream"
+
+    def read(self, size=-1):
+        """Read bytes from stream."""
+        if size == 0:
+            return b""
+
+        # If space left in buffer, read from source and add it there. Don't do it if
+        # there's enough data in the buffer already though.
+        left_in_buffer = self.buffer.remaining
+        if left_in_buffer > 0 and size != -1 and size > self.buffer.size:
+            self.buffer.add(self.reader.read(min(size, left_in_buffer)))
+
+        to_read = self.buffer.size if size == -1 else min(size, self.buffer.size)
+        return self.buffer.get(to_read)
+
+    def seek(self, pos, origin=io.SEEK_SET):
+        """Seek to position in stream."""
+        if origin == io.SEEK_SET:
+            self.buffer.seek(pos)
+        return self.buffer.position
+
+    def tell(self):
+        """Return current position in stream."""
+        return self.buffer.position
+
+    def seekable(self):
+        """Return a bool indicating whether object supports random access."""
+        return True
+
+    def readable(self):
+        """Return a bool indicating whether object was opened for reading."""
+        return True
+
+
+class StreamReaderWrapper(miniaudio.StreamableSource):
+    """Wraps a reader into a StreamableSource that miniaudio can consume.
+
+    Data is read from the reader by a task running on the event loop and added to a
+    buffer, which the decoder (running in another thread) reads from. The event loop
+    is only woken up by the decoder when the task is waiting for space in the buffer.
+    """
+
+    CHUNK_SIZE = 16 * 1024
+
+    def __init__(
+        self, reader: asyncio.streams.StreamReader, buffer: SemiSeekableBuffer
+    ) -> None:
+        """Initialize a new ReaderWrapper instance."""
+        self.reader: asyncio.streams.StreamReader = reader
+        self.buffer: SemiSeekableBuffer = buffer
+        self.loop = asyncio.get_event_loop()
+        self._condition = threading.Condition()
+        self._space_available = asyncio.Event()
+        self._waiting_for_space: bool = False
+        self._eof: bool = False
+        self.bytes_downloaded: int = 0
+        self._download_start: Optional[float] = None
+        self._read_task: Optional[asyncio.Task] = asyncio.ensure_future(
+            self._read_task_main()
+        )
+
+    @property
+    def download_rate(self) -> float:
+        """Return average rate data is read from reader in bytes per second."""
+        if self._download_start is None:
+            return 0.0
+        elapsed = time.monotonic() - self._download_start
+        return self.bytes_downloaded / elapsed if elapsed > 0 else 0.0
+
+    def read(self, num_bytes: int = -1) -> Union[bytes, memoryview]:
+        """Read and return data from buffer."""
+        if num_bytes == 0:
+            return b""
+
+        # Wait for requested amount of data (or as much as fits in the buffer). If -1
+        # is requested, wait until the buffer is full.
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._eof
+                or self.buffer.free == 0
+                or (num_bytes != -1 and self.buffer.size >= num_bytes)
+            )
+
+            to_read = self.buffer.size if num_bytes == -1 else num_bytes
+
+            # Data must be copied as the freed space can be written to by the reading
+            # task as soon as the lock is released
+            data = self.buffer.get(to_read)
+
+            if self._waiting_for_space and self.buffer.free > 0:
+                self._waiting_for_space = False
+                self.loop.call_soon_threadsafe(self._space_available.set)
+
+        return data
+
+    def seek(
+        self, offset: int, origin: miniaudio.SeekOrigin = miniaudio.SeekOrigin.START
+    ) -> bool:
+        """Seek to position in stream."""
+        if origin in (miniaudio.SeekOrigin.START, 0):
+            with self._condition:
+                return self.buffer.seek(offset)
+        return False
+
+    def tell(self):
+        """Return current position in stream."""
+        return self.buffer.position
+
+    def close(self) -> None:
+        """Stop reading from reader."""
+        if self._read_task:
+            self._read_task.cancel()
+            self._read_task = None
+        self._end_of_stream()
+
+    def _end_of_stream(self) -> None:
+        with self._condition:
+            self._eof = True
+            self._condition.notify_all()
+
+    async def _read_task_main(self) -> None:
+        try:
+            while True:
+                with self._condition:
+                    free = self.buffer.free
+                    if free == 0:
+                        self._space_available.clear()
+                        self._waiting_for_space = True
+
+                if free == 0:
+                    await self._space_available.wait()
+                    continue
+
+                if self._download_start is None:
+                    self._download_start = time.monotonic()
+                data = await self.reader.read(min(free, self.CHUNK_SIZE))
+                if not data:
+                    break
+                self.bytes_downloaded += len(data)
+
+                with self._condition:
+                    self.buffer.add(data)
+                    self._condition.notify_all()
+        except Exception:
+            _LOGGER.exception("an error occurred when reading from stream")
+        finally:
+            self._end_of_stream()
+
+
+class StreamableSourceWrapper(io.BufferedIOBase):
+    """Wraps a StreambleSource, making it seekable."""
+
+    def __init__(
+        self,
+        source: miniaudio.StreamableSource,
+        buffer: SemiSeekableBuffer,
+        /,
+        name: str = "stream",
+    ) -> None:
+        """Initialize a new StreamableSourceWrapper instance."""
+        super().__init__()
+        self.source = source
+        self.buffer = buffer
+        # Medafile uses this in error messages, so it helps for debugging
+        self.name = name
+
+    def read(self, size=-1):
+        """Read bytes from stream."""
+        return bytes(self.source.read(size))
+
+    def seek(self, pos, origin=io.SEEK_SET):
+        """Seek to position in stream."""
+        if origin == io.SEEK_SET:
+            self.source.seek(pos, miniaudio.SeekOrigin.START)
+        return self.buffer.position
+
+    def tell(self):
+        """Return current position in stream."""
+        return self.buffer.position
+
+    def seekable(self):
+        """Return a bool indicating whether object supports random access."""
+        return True
+
+    def readable(self):
+        """Return a bool indicating whether object was opened for reading."""
+        return True
+
+
+async def get_buffered_io_metadata(buffer: io.BufferedIOBase) -> MediaMetadata:
+    """Read metadata from a BufferedIOBase.
+
+    This method will restore position to previous position after reading.
+    """
+    # Save position in buffer before parsing metadata so we can restore it afterwards
+    before = buffer.tell()
+    if buffer.seek(0) != 0:
+        return EMPTY_METADATA
+
+    try:
+        return await get_metadata(buffer)
+    except Exception:
+        logging.exception("Failed to parse metadata")
+    finally:
+        buffer.seek(0)
+        if buffer.seek(before) != before:
+            logging.warning("Failed to restore position to %d", before)
+
+    return EMPTY_METADATA
+
+
+class BufferedIOBaseSource(AudioSource):
+    """Audio source used to play a file from a buffer.
+
+    This audio source adds an internal buffer to deal with hiccups, growing with
+    jitter and underruns (see ReadAheadDepth). Proper buffering should be done by the
+    source buffer.
+    """
+
+    CHUNK_SIZE = FRAMES_PER_PACKET * 3
+
+    def __init__(
+        self,
+        reader: miniaudio.WavFileReadStream,
+        source: miniaudio.StreamableSource,
+        metadata: MediaMetadata,
+        sample_rate: int,
+        channels: int,
+        sample_size: int,
+    ) -> None:
+        """Initialize a new MiniaudioWrapper instance."""
+        self.loop = asyncio.get_event_loop()
+        self.reader: miniaudio.WavFileReadStream = reader
+        self.source: miniaudio.StreamableSource = source
+        self.metadata = metadata
+        self._buffer_task: Optional[asyncio.Task] = asyncio.ensure_future(
+            self._buffering_task()
+        )
+        self._audio_buffer: bytearray = bytearray()
+        self._buffer_needs_refilling: asyncio.Event = asyncio.Event()
+        self._data_was_added_to_buffer: asyncio.Event = asyncio.Event()
+        self._depth = ReadAheadDepth(sample_rate * channels * sample_size)
+        self._started: bool = False
+        self._sample_rate: int = sample_rate
+        self._channels: int = channels
+        self._sample_size: int = sample_size
+
+    @classmethod
+    async def open(
+        cls,
+        source: Union[io.BufferedIOBase, asyncio.streams.StreamReader],
+        sample_rate: int,
+        channels: int,
+        sample_size: int,
+    ) -> "BufferedIOBaseSource":
+        """Return a new AudioSource instance playing from the provided buffer."""
+        loop = asyncio.get_event_loop()
+
+        buffer = SemiSeekableBuffer(
+            BUFFER_SIZE, seekable_headroom=HEADROOM_SIZE, protected_headroom=True
+        )
+
+        # Use correct wrapper when streaming from buffer to ensure we have some kind
+        # of seek support
+        if isinstance(source, io.BufferedIOBase):
+            if source.seekable():
+                metadata_source = source
+            else:
+                metadata_source = BufferedIOBaseWrapper(source, buffer)
+            streamable_source = StreamableIOBaseWrapper(metadata_source)
+        else:
+            streamable_source = StreamReaderWrapper(source, buffer)
+            metadata_source = StreamableSourceWrapper(streamable_source, buffer)
+
+        metadata = await get_buffered_io_metadata(metadata_source)
+        buffer.protected_headroom = False
+
+        src = await loop.run_in_executor(
+            None,
+            partial(
+                miniaudio.stream_any,
+                streamable_source,
+                output_format=_int2sf(decoded_sample_size(sample_size)),
+                nchannels=channels,
+                sample_rate=sample_rate,
+            ),
+        )
+
+        reader = miniaudio.WavFileReadStream(
+            src, sample_rate, channels, _int2sf(decoded_sample_size(sample_size))
+        )
+
+        # TODO: We get a WAV file back, but we expect to return raw PCM samples so
+        # the WAVE header must be removed. It would be better to actually parse the
+        # header, ensuring we remove the correct amount of data. But for now we are
+        # lazy.
+        await loop.run_in_executor(None, reader.read, 44)
+
+        # The source stream is passed here and saved to not be garbage collected
+        instance = cls(
+            reader, streamable_source, metadata, sample_rate, channels, sample_size
+        )
+        return instance
+
+    async def close(self) -> None:
+        """Close underlying resources."""
+        self._report(force=True)
+        self.source.close()
+        if self._buffer_task:
+            self._buffer_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._buffer_task
+            self._buffer_task = None
+
+    async def readframes(self, nframes: int) -> bytes:
+        """Read number of frames and advance in stream."""
+        # If buffer is empty but the buffering task is still running, that means we are
+        # buffering and need to wait for more data to be added to buffer.
+        buffer_task_running = self._buffer_task and self._buffer_task.done()
+        if not self._audio_buffer and not buffer_task_running:
+            if self._started:
+                self._depth.underrun()
+                self._report(force=True)
+            _LOGGER.debug("Audio source is buffering: %s", self.statistics)
+            self._buffer_needs_refilling.set()
+            self._data_was_added_to_buffer.clear()
+            await self._data_was_added_to_buffer.wait()
+
+        total_bytes = nframes * self._sample_size * self._channels
+
+        # Return data corresponding to requested frame, or what is left
+        available_data = min(total_bytes, len(self._audio_buffer))
+        data = self._audio_buffer[0:available_data]
+        del self._audio_buffer[0:available_data]
+        self._started = True
+
+        # Fill up the buffer again as soon as it is below target depth
+        if len(self._audio_buffer) < self._depth.target_size:
+            self._buffer_needs_refilling.set()
+
+        self._report()
+        return data
+
+    def frames_ready(self, nframes: int) -> bool:
+        """Return if number of frames can be read without waiting for more data."""
+        return bool(self._audio_buffer) or bool(
+            self._buffer_task and self._buffer_task.done()
+        )
+
+    @property
+    def statistics(self) -> ReadAheadStatistics:
+        """Return statistics of read-ahead buffer."""
+        return self._depth.statistics(
+            len(self._audio_buffer), getattr(self.source, "download_rate", 0.0)
+        )
+
+    @property
+    def read_ahead_hook(self) -> Optional[ReadAheadHook]:
+        """Return hook called with statistics of read-ahead buffer."""
+        return self._depth.hook
+
+    @read_ahead_hook.setter
+    def read_ahead_hook(self, hook: Optional[ReadAheadHook]) -> None:
+        """Set hook called with statistics of read-ahead buffer.
+
+        Statistics are reported about once per second while reading, when the buffer
+        runs empty and when the source is closed.
+        """
+        self._depth.hook = hook
+
+    def _report(self, force: bool = False) -> None:
+        self._depth.report(
+            len(self._audio_buffer), getattr(self.source, "download_rate", 0.0), force
+        )
+
+    async def get_metadata(self) -> MediaMetadata:
+        """Return media metadata if available and possible."""
+        return self.metadata
+
+    async def _buffering_task(self) -> None:
+        _LOGGER.debug("Starting audio buffering task")
+        decoded_size = decoded_sample_size(self._sample_size)
+        remainder = b""
+        while True:
+            try:
+                # Read a chunk and add it to the internal buffer. If no data as read,
+                # just break out.
+                start_time = time.monotonic()
+                chunk = await self.loop.run_in_executor(
+                    None, self.reader.read, self.CHUNK_SIZE
+                )
+                if not chunk:
+                    break
+                self._depth.chunk_read(
+                    time.monotonic() - start_time,
+                    len(chunk) // decoded_size * self._sample_size,
+                )
+
+                # Convert samples of the entire chunk directly into the buffer. Any
+                # partial sample is saved and converted with the next chunk.
+                if remainder:
+                    chunk = remainder + chunk
+                offset = len(self._audio_buffer)
+                self._audio_buffer.extend(bytes(len(chunk)))
+                with memoryview(self._audio_buffer) as view:
+                    converted = convert_samples(
+                        chunk, self._sample_size, view[offset:], decoded_size
+                    )
+                del self._audio_buffer[offset + converted :]
+                remainder = chunk[converted // self._sample_size * decoded_size :]
+
+                # Wait for an entire packet
+                if (
+                    len(self._audio_buffer)
+                    >= FRAMES_PER_PACKET * self._channels * self._sample_size
+                ):
+                    self._data_was_added_to_buffer.set()
+
+                if len(self._audio_buffer) >= self._depth.target_size:
+                    await self._buffer_needs_refilling.wait()
+                    self._buffer_needs_refilling.clear()
+
+            except Exception:
+                _LOGGER.exception("an error occurred during buffering")
+
+        self._data_was_added_to_buffer.set()
+
+    @property
+    def sample_rate(self) -> int:
+        """Return sample rate."""
+        return self._sample_rate
+
+    @property
+    def channels(self) -> int:
+        """Return number of audio channels."""
+        return self._channels
+
+    @property
+    def sample_size(self) -> int:
+        """Return number of bytes per sample."""
+        return self._sample_size
+
+    @property
+    def duration(self) -> int:
+        """Return duration in seconds."""
+        return 0  # We don't know the duration
+
+
+# This is a "patched" version of the IceCastClient from pyminiaudio, but everything
+# not used by pyatv has been ripped out and urllib is replaced by requests. Apparently
+# Cloudflare is blocking requests by urllib, so better to use requests instead which
+# is better anyway. See #1546 for details.
+# NB: This is not a perfect implementation in any way, improvements are welcome!
+class PatchedIceCastClient(miniaudio.StreamableSource):
+    """Patched version of IceCastClient that breaks when all data has been read."""
+
+    BLOCK_SIZE = 8 * 1024
+
+    def __init__(self, buffer: SemiSeekableBuffer, url: str) -> None:
+        """Initialize a new PatchedIceCastClient instance."""
+        self.url = url
+        self.error_message: Optional[str] = None
+        self.bytes_downloaded: int = 0
+        self._download_start: Optional[float] = None
+        self._stop_stream: bool = False
+        self._buffer: SemiSeekableBuffer = buffer
+        self._buffer_lock = threading.Lock()
+        self._download_thread = threading.Thread(
+            target=self._stream_wrapper, daemon=True
+        )
+        self._download_thread.start()
+
+    def seek(self, offset: int, origin: miniaudio.SeekOrigin) -> bool:
+        """Seek in current audio stream."""
+        # SemiSeekableBuffer only supports seeking from start
+        if origin == miniaudio.SeekOrigin.START:
+            return self._buffer.seek(offset)
+        return False
+
+    def read(self, num_bytes: int) -> bytes:
+        """Read a chunk of data from the stream."""
+        start_time = time.monotonic()
+
+        # TODO: Should not be based on polling
+        while len(self._buffer) < num_bytes and not self._stop_stream:
+            if time.monotonic() - start_time > DEFAULT_TIMEOUT:
+                raise OperationTimeoutError("timed out reading from stream")
+
+            time.sleep(0.1)
+
+        with self._buffer_lock:
+            data = self._buffer.get(num_bytes)
+            return data
+
+    @property
+    def download_rate(self) -> float:
+        """Return average download rate in bytes per second."""
+        if self._download_start is None:
+            return 0.0
+        elapsed = time.monotonic() - self._download_start
+        return self.bytes_downloaded / elapsed if elapsed > 0 else 0.0
+
+    def close(self) -> None:
+        """Stop the stream, aborting the background downloading."""
+        self._stop_stream = True
+        self._download_thread.join()
+
+    def _readall(self, fileobject, size: int) -> bytes:
+        buffer = b""
+        while len(buffer) < size:
+            buffer += fileobject.read(size)
+        return buffer
+
+    def _stream_wrapper(self) -> None:
+        try:
+            self._download_stream()
+        except Exception as ex:
+            self.error_message = str(ex)
+            _LOGGER.debug("Error during streaming: %s", self.error_message)
+        self._stop_stream = True
+
+    def _download_stream(self) -> None:  # pylint: disable=too-many-branches
+        with requests.get(self.url, stream=True, timeout=10.0) as handle:
+            if handle.status_code < 200 or handle.status_code >= 300:
+                raise ProtocolError(
+                    f"Got status {handle.status_code} with message: {handle.reason}"
+                )
+            result = handle.raw
+            self._download_start = time.monotonic()
+            if "icy-metaint" in handle.headers:
+                meta_interval = int(result.headers["icy-metaint"])
+            else:
+                meta_interval = 0
+
+            while not self._stop_stream:
+                # Wait for space in buffer
+                # TODO: Should be lock-based instead of polling
+                while not self._buffer.fits(self.BLOCK_SIZE):
+                    time.sleep(0.1)
+                    if self._stop_stream:
+                        return
+
+                # Read data from response
+                if meta_interval:
+                    chunk = self._readall(result, meta_interval)
+                    meta_size = 16 * self._readall(result, 1)[0]
+                    self._readall(result, meta_size)
+                else:
+                    chunk = result.read(self.BLOCK_SIZE)
+                    if chunk == b"":
+                        _LOGGER.debug("HTTP streaming ended")
+                        self._stop_stream = True
+
+                # Add produced chunk to internal buffer
+                with self._buffer_lock:
+                    self._buffer.add(chunk)
+                self.bytes_downloaded += len(chunk)
+
+
+class InternetSource(AudioSource):
+    """Audio source used to stream from an Internet source (HTTP).
+
+    Audio is decoded by a background task, reading ahead as much audio as needed to
+    cover for network jitter (see ReadAheadDepth). Reading frames never blocks the
+    event loop, but waits for the buffer to fill up again after an underrun.
+    """
+
+    def __init__(
+        self,
+        source: miniaudio.StreamableSource,
+        stream_generator: Generator[array.array, int, None],
+        metadata: MediaMetadata,
+        sample_rate: int,
+        channels: int,
+        sample_size: int,
+    ):
+        """Initialize a new InternetSource instance."""
+        self.source = source
+        self.stream_generator = stream_generator
+        self.metadata = metadata
+        self.loop = asyncio.get_event_loop()
+        self._sample_rate = sample_rate
+        self._channels = channels
+        self._sample_size = sample_size
+        self._frame_size: int = channels * sample_size
+        self._depth = ReadAheadDepth(sample_rate * self._frame_size)
+        self._audio_buffer: bytearray = bytearray()
+        self._data_was_added_to_buffer: asyncio.Event = asyncio.Event()
+        self._buffer_needs_refilling: asyncio.Event = asyncio.Event()
+        self._requested_size: int = 0
+        self._stop_buffering: bool = False
+        self._finished: bool = False
+        self._error: Optional[Exception] = None
+        self._started: bool = False
+        self._buffer_task: Optional[asyncio.Task] = asyncio.ensure_future(
+            self._buffering_task()
+        )
+
+    @property
+    def statistics(self) -> ReadAheadStatistics:
+        """Return statistics of read-ahead buffer."""
+        return self._depth.statistics(
+            len(self._audio_buffer), getattr(self.source, "download_rate", 0.0)
+        )
+
+    @property
+    def read_ahead_hook(self) -> Optional[ReadAheadHook]:
+        """Return hook called with statistics of read-ahead buffer."""
+        return self._depth.hook
+
+    @read_ahead_hook.setter
+    def read_ahead_hook(self, hook: Optional[ReadAheadHook]) -> None:
+        """Set hook called with statistics of read-ahead buffer.
+
+        Statistics are reported about once per second while reading, when the buffer
+        runs empty and when the source is closed.
+        """
+        self._depth.hook = hook
+
+    def _report(self, force: bool = False) -> None:
+        self._depth.report(
+            len(self._audio_buffer), getattr(self.source, "download_rate", 0.0), force
+        )
+
+    @classmethod
+    async def open(
+        cls,
+        url: str,
+        sample_rate: int,
+        channels: int,
+        sample_size: int,
+    ) -> "InternetSource":
+        """Return a new AudioSource instance playing from the provided URL."""
+        buffer = SemiSeekableBuffer(
+            BUFFER_SIZE,
+            seekable_headroom=HEADROOM_SIZE,
+            protected_headroom=True,
+        )
+        loop = asyncio.get_event_loop()
+        source = await loop.run_in_executor(None, PatchedIceCastClient, buffer, url)
+
+        # Read metadata prior to starting to stream to ensure we are at the
+        # beginning. Position will be restored to 0 afterwards.
+        metadata = await get_buffered_io_metadata(
+            StreamableSourceWrapper(source, buffer, name=url)
+        )
+        buffer.protected_headroom = False
+
+        try:
+            stream_generator = await loop.run_in_executor(
+                None,
+                partial(
+                    miniaudio.stream_any,
+                    source,
+                    frames_to_read=FRAMES_PER_PACKET,
+                    output_format=_int2sf(decoded_sample_size(sample_size)),
+                    nchannels=channels,
+                    sample_rate=sample_rate,
+                ),
+            )
+        except miniaudio.DecodeError as ex:
+            if source.error_message is not None:
+                raise ProtocolError(source.error_message) from ex
+            raise
+
+        return cls(
+            source, stream_generator, metadata, sample_rate, channels, sample_size
+        )
+
+    async def close(self) -> None:
+        """Close underlying resources."""
+        # Closing the source makes a blocking read return, so do that before waiting
+        # for the buffering task to finish
+        self._stop_buffering = True
+        self._buffer_needs_refilling.set()
+        await self.loop.run_in_executor(None, self.source.close)
+        if self._buffer_task:
+            await self._buffer_task
+            self._buffer_task = None
+        _LOGGER.debug("Read-ahead statistics: %s", self.statistics)
+        self._report(force=True)
+
+    async def readframes(self, nframes: int) -> bytes:
+        """Read number of frames and advance in stream."""
+        total_bytes = nframes * self._frame_size
+        if len(self._audio_buffer) < total_bytes and not self._finished:
+            # After running out of audio, wait until enough audio is buffered to
+            # not run out again right away (initial buffering is not an underrun)
+            if self._started:
+                self._depth.underrun()
+                self._report(force=True)
+            _LOGGER.debug("Audio source is buffering: %s", self.statistics)
+            self._requested_size = max(total_bytes, self._depth.target_size)
+            while len(self._audio_buffer) < self._requested_size and not self._finished:
+                self._buffer_needs_refilling.set()
+                self._data_was_added_to_buffer.clear()
+                await self._data_was_added_to_buffer.wait()
+            self._requested_size = 0
+
+        self._raise_error()
+        self._started = True
+        data = self._audio_buffer[0:total_bytes]
+        del self._audio_buffer[0:total_bytes]
+        self._buffer_needs_refilling.set()
+        self._report()
+        return data
+
+    def frames_ready(self, nframes: int) -> bool:
+        """Return if number of frames can be read without waiting for more data."""
+        return self._finished or len(self._audio_buffer) >= nframes * self._frame_size
+
+    def _raise_error(self) -> None:
+        if self._error is not None and not self._audio_buffer:
+            error, self._error = self._error, None
+            raise error
+
+    async def _buffering_task(self) -> None:
+        decoded_size = decoded_sample_size(self._sample_size)
+        try:
+            while not self._stop_buffering:
+                start_time = time.monotonic()
+                frames = await self.loop.run_in_executor(
+                    None, next, self.stream_generator, None
+                )
+                if not frames:
+                    break
+
+                # Convert samples directly into the buffer
+                offset = len(self._audio_buffer)
+                self._audio_buffer.extend(bytes(len(frames) * frames.itemsize))
+                with memoryview(self._audio_buffer) as view:
+                    converted = convert_samples(
+                        frames, self._sample_size, view[offset:], decoded_size
+                    )
+                del self._audio_buffer[offset + converted :]
+                self._depth.chunk_read(time.monotonic() - start_time, converted)
+                self._data_was_added_to_buffer.set()
+
+                while (
+                    len(self._audio_buffer)
+                    >= max(self._depth.target_size, self._requested_size)
+                    and not self._stop_buffering
+                ):
+                    self._buffer_needs_refilling.clear()
+                    await self._buffer_needs_refilling.wait()
+        except Exception as ex:
+            _LOGGER.debug("an error occurred during buffering: %s", ex)
+            self._error = ex
+
+        self._finished = True
+        self._data_was_added_to_buffer.set()
+
+    async def get_metadata(self) -> MediaMetadata:
+        """Return media metadata if available and possible."""
+        return self.metadata
+
+    @property
+    def sample_rate(self) -> int:
+        """Return sample rate."""
+        return self._sample_rate
+
+    @property
+    def channels(self) -> int:
+        """Return number of audio channels."""
+        return self._channels
+
+    @property
+    def sample_size(self) -> int:
+        """Return number of bytes per sample."""
+        return self._sample_size
+
+    @property
+    def duration(self) -> int:
+        """Return duration in seconds."""
+        return math.ceil(self.metadata.duration or 0)
+
+
+class FileSource(AudioSource):
+    """Audio source used to play a local audio file.
+
+    Audio is decoded while streaming by a background task that reads ahead at most
+    READ_AHEAD seconds of audio, so memory usage is constant regardless of length.
+    """
+
+    CHUNK_SIZE = FRAMES_PER_PACKET * 8
+    READ_AHEAD = 2.0  # Seconds
+
+    def __init__(
+        self,
+        filename: str,
+        duration: float,
+        sample_rate: int,
+        channels: int,
+        sample_size: int,
+    ) -> None:
+        """Initialize a new FileSource instance."""
+        self.loop = asyncio.get_event_loop()
+        self.filename: str = filename
+        self._duration: float = duration
+        self._sample_rate: int = sample_rate
+        self._channels: int = channels
+        self._sample_size: int = sample_size
+        self._frame_size: int = channels * sample_size
+        self._read_ahead_size: int = (
+            int(self.READ_AHEAD * sample_rate) * self._frame_size
+        )
+        self._generator: Optional[Generator[array.array, int, None]] = None
+        self._buffer_task: Optional[asyncio.Task] = None
+        self._audio_buffer: bytearray = bytearray()
+        self._data_was_added_to_buffer: asyncio.Event = asyncio.Event()
+        self._buffer_needs_refilling: asyncio.Event = asyncio.Event()
+        self._requested_size: int = 0
+        self._stop_buffering: bool = False
+        self._finished: bool = False
+        self._error: Optional[Exception] = None
+
+    @classmethod
+    async def open(
+        cls, filename: str, sample_rate: int, channels: int, sample_size: int
+    ) -> "FileSource":
+        """Return a new AudioSource instance playing from the provided file."""
+        loop = asyncio.get_event_loop()
+        info = await loop.run_in_executor(None, miniaudio.get_file_info, filename)
+        instance = cls(filename, info.duration, sample_rate, channels, sample_size)
+        await instance.seek(0.0)
+        return instance
+
+    async def close(self) -> None:
+        """Close underlying resources."""
+        await self._stop()
+
+    async def seek(self, position: float) -> None:
+        """Seek to a position (in seconds) in the file."""
+        await self._stop()
+        self._audio_buffer.clear()
+        self._finished = False
+        self._error = None
+        self._stop_buffering = False
+        generator = await self.loop.run_in_executor(
+            None,
+            partial(
+                miniaudio.stream_file,
+                self.filename,
+                output_format=_int2sf(decoded_sample_size(self._sample_size)),
+                nchannels=self._channels,
+                sample_rate=self._sample_rate,
+                frames_to_read=self.CHUNK_SIZE,
+                seek_frame=round(position * self._sample_rate),
+            ),
+        )
+        self._generator = generator
+        self._buffer_task = asyncio.ensure_future(self._buffering_task(generator))
+
+    async def _stop(self) -> None:
+        # The generator cannot be closed while it is used by the buffering task, so
+        # wait for the task to finish what it is doing before closing it
+        if self._buffer_task:
+            self._stop_buffering = True
+            self._buffer_needs_refilling.set()
+            await self._buffer_task
+            self._buffer_task = None
+        if self._generator:
+            self._generator.close()
+            self._generator = None
+
+    async def readframes(self, nframes: int) -> bytes:
+        """Read number of frames and advance in stream."""
+        total_bytes = nframes * self._frame_size
+        while len(self._audio_buffer) < total_bytes and not self._finished:
+            # Make sure buffering continues in case more frames than what is read
+            # ahead are requested
+            self._requested_size = total_bytes
+            self._buffer_needs_refilling.set()
+            self._data_was_added_to_buffer.clear()
+            await self._data_was_added_to_buffer.wait()
+
+        self._raise_error()
+        data = self._audio_buffer[0:total_bytes]
+        del self._audio_buffer[0:total_bytes]
+        self._buffer_needs_refilling.set()
+        return data
+
+    def frames_ready(self, nframes: int) -> bool:
+        """Return if number of frames can be read without waiting for more data."""
+        return self._finished or len(self._audio_buffer) >= nframes * self._frame_size
+
+    def _raise_error(self) -> None:
+        if self._error is not None and not self._audio_buffer:
+            error, self._error = self._error, None
+            raise error
+
+    async def _buffering_task(
+        self, generator: Generator[array.array, int, None]
+    ) -> None:
+        decoded_size = decoded_sample_size(self._sample_size)
+        try:
+            while not self._stop_buffering:
+                frames = await self.loop.run_in_executor(None, next, generator, None)
+                if not frames:
+                    break
+
+                # Convert samples directly into the buffer
+                offset = len(self._audio_buffer)
+                self._audio_buffer.extend(bytes(len(frames) * frames.itemsize))
+                with memoryview(self._audio_buffer) as view:
+                    converted = convert_samples(
+                        frames, self._sample_size, view[offset:], decoded_size
+                    )
+                del self._audio_buffer[offset + converted :]
+                self._data_was_added_to_buffer.set()
+
+                while (
+                    len(self._audio_buffer)
+                    >= max(self._read_ahead_size, self._requested_size)
+                    and not self._stop_buffering
+                ):
+                    self._buffer_needs_refilling.clear()
+                    await self._buffer_needs_refilling.wait()
+        except Exception as ex:
+            # Raised by readframes once buffered audio has been read, so that a
+            # decoding error is not mistaken for end of stream
+            _LOGGER.debug("an error occurred during buffering: %s", ex)
+            self._error = ex
+
+        self._finished = True
+        self._data_was_added_to_buffer.set()
+
+    async def get_metadata(self) -> MediaMetadata:
+        """Return media metadata if available and possible."""
+        try:
+            return await get_metadata(self.filename)
+        except Exception as ex:
+            _LOGGER.warning("Failed to load metadata from %s: %s", self.filename, ex)
+        return EMPTY_METADATA
+
+    @property
+    def sample_rate(self) -> int:
+        """Return sample rate."""
+        return self._sample_rate
+
+    @property
+    def channels(self) -> int:
+        """Return number of audio channels."""
+        return self._channels
+
+    @property
+    def sample_size(self) -> int:
+        """Return number of bytes per sample."""
+        return self._sample_size
+
+    @property
+    def duration(self) -> int:
+        """Return duration in seconds."""
+        return round(self._duration)
+
+
+async def open_source(
+    source: Union[str, io.BufferedIOBase, asyncio.streams.StreamReader],
+    sample_rate: int,
+    channels: int,
+    sample_size: int,
+) -> AudioSource:
+    """Create an AudioSource from given input source."""
+    if isinstance(source, str):
+        if re.match("^http(|s)://", source):
+            return await InternetSource.open(source, sample_rate, channels, sample_size)
+
+        # Let another decoder try files in formats miniaudio does not support
+        try:
+            return await FileSource.open(source, sample_rate, channels, sample_size)
+        except miniaudio.DecodeError as ex:
+            raise NotSupportedError(f"unsupported file {source}: {ex}") from ex
+
+    return await BufferedIOBaseSource.open(source, sample_rate, channels, sample_size)
@@ -0,0 +1,230 @@
+"""Decoder backend playing uncompressed PCM samples from WAV and AIFF files."""
+
+import asyncio
+import io
+import logging
+import mmap
+import struct
+from typing import Generator, NamedTuple, Optional, Tuple, Union
+
+from pyatv.exceptions import NotSupportedError
+from pyatv.interface import MediaMetadata
+from pyatv.protocols.raop.audio_source import AudioSource
+from pyatv.protocols.raop.pcm import to_audio_samples
+from pyatv.support.metadata import EMPTY_METADATA, get_metadata
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PcmFormat(NamedTuple):
+    """Format and location of raw PCM samples in a file."""
+
+    sample_rate: int
+    channels: int
+    sample_size: int
+    byteorder: str
+    offset: int
+    size: int
+
+
+def _iter_chunks(
+    data: memoryview, offset: int, byteorder: str
+) -> Generator[Tuple[bytes, int, int], None, None]:
+    size_format = "<I" if byteorder == "little" else ">I"
+    while offset + 8 <= len(data):
+        chunk_id = bytes(data[offset : offset + 4])
+        (chunk_size,) = struct.unpack_from(size_format, data, offset + 4)
+        yield chunk_id, offset + 8, min(chunk_size, len(data) - offset - 8)
+        offset += 8 + chunk_size + (chunk_size & 1)  # Chunks are padded to even size
+
+
+def _parse_wav(data: memoryview) -> Optional[PcmFormat]:
+    fmt = None
+    for chunk_id, offset, size in _iter_chunks(data, 12, "little"):
+        if chunk_id == b"fmt " and size >= 16:
+            (audio_format, channels, sample_rate, _, block_align, bits) = (
+                struct.unpack_from("<HHIIHH", data, offset)
+            )
+            # Extensible format contains actual format in sub format GUID
+            if audio_format == 0xFFFE and size >= 26:
+                (audio_format,) = struct.unpack_from("<H", data, offset + 24)
+            if audio_format != 1 or block_align != channels * bits // 8:
+                return None
+            fmt = (sample_rate, channels, bits // 8)
+        elif chunk_id == b"data" and fmt:
+            return PcmFormat(*fmt, "little", offset, size)
+    return None
+
+
+def _parse_extended(data: memoryview) -> int:
+    # Sample rate in AIFF is stored as a 80 bit IEEE 754 extended precision float
+    exponent = ((data[0] & 0x7F) << 8) | data[1]
+    mantissa = int.from_bytes(data[2:10], "big")
+    return round(mantissa * 2.0 ** (exponent - 16383 - 63))
+
+
+def _parse_aiff(data: memoryview, compressed: bool) -> Optional[PcmFormat]:
+    fmt = None
+    for chunk_id, offset, size in _iter_chunks(data, 12, "big"):
+        if chunk_id == b"COMM" and size >= 18:
+            channels, _, bits = struct.unpack_from(">hIh", data, offset)
+            byteorder = "big"
+            if compressed:
+                compression = bytes(data[offset + 18 : offset + 22])
+                if compression == b"sowt":
+                    byteorder = "little"
+                elif compression != b"NONE":
+                    return None
+
+            # 8 bit samples are signed in AIFF but unsigned everywhere else
+            if bits % 8 != 0 or bits == 8:
+                return None
+            fmt = (_parse_extended(data[offset + 8 : offset + 18]), channels, bits // 8)
+        elif chunk_id == b"SSND" and fmt and size >= 8:
+            (data_offset,) = struct.unpack_from(">I", data, offset)
+            return PcmFormat(
+                *fmt, byteorder, offset + 8 + data_offset, size - 8 - data_offset
+            )
+    return None
+
+
+def parse_pcm_format(data: memoryview) -> Optional[PcmFormat]:
+    """Parse WAV or AIFF header and return format of uncompressed samples.
+
+    None is returned if format is not supported, e.g. compressed audio.
+    """
+    if len(data) < 12:
+        return None
+
+    header, form = bytes(data[0:4]), bytes(data[8:12])
+    if header == b"RIFF" and form == b"WAVE":
+        return _parse_wav(data)
+    if header == b"FORM" and form in (b"AIFF", b"AIFC"):
+        return _parse_aiff(data, form == b"AIFC")
+    return None
+
+
+class MmapPcmSource(AudioSource):
+    """Audio source playing uncompressed PCM samples from a WAV or AIFF file.
+
+    The file is memory mapped and samples are served directly from it, so no decoding
+    is needed. Only byte order is converted (if needed). The file must be in the same
+    format as requested, otherwise NotSupportedError is raised.
+    """
+
+    def __init__(
+        self, filename: str, file_map: mmap.mmap, pcm_format: PcmFormat
+    ) -> None:
+        """Initialize a new MmapPcmSource instance."""
+        self.filename: str = filename
+        self._map: mmap.mmap = file_map
+        self._format: PcmFormat = pcm_format
+        self._frame_size: int = pcm_format.channels * pcm_format.sample_size
+        self._samples: memoryview = memoryview(file_map)[
+            pcm_format.offset : pcm_format.offset
+            + pcm_format.size
+            - pcm_format.size % self._frame_size
+        ]
+        self._pos: int = 0
+
+    @classmethod
+    async def open(
+        cls, filename: str, sample_rate: int, channels: int, sample_size: int
+    ) -> "MmapPcmSource":
+        """Return a new AudioSource instance playing from the provided file."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, cls._open, filename, sample_rate, channels, sample_size
+        )
+
+    @classmethod
+    def _open(
+        cls, filename: str, sample_rate: int, channels: int, sample_size: int
+    ) -> "MmapPcmSource":
+        with open(filename, "rb") as handle:
+            try:
+                file_map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as ex:  # Empty file
+                raise NotSupportedError(f"cannot map {filename}") from ex
+
+        with memoryview(file_map) as view:
+            pcm_format = parse_pcm_format(view)
+
+        if pcm_format is None or pcm_format[0:3] != (
+            sample_rate,
+            channels,
+            sample_size,
+        ):
+            file_map.close()
+            raise NotSupportedError(f"{filename} is not in requested format")
+
+        return cls(filename, file_map, pcm_format)
+
+    async def close(self) -> None:
+        """Close underlying resources."""
+        self._samples.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Frames are still in use, the map is closed when garbage collected
+            _LOGGER.debug("Frames still in use, not closing %s", self.filename)
+
+    async def readframes(self, nframes: int) -> bytes:
+        """Read number of frames and advance in stream."""
+        frames = self._samples[self._pos : self._pos + nframes * self._frame_size]
+        self._pos += len(frames)
+        if not frames:
+            return AudioSource.NO_FRAMES
+        if self._format.byteorder == "big":
+            return frames  # type: ignore
+        return to_audio_samples(
+            frames, self._format.sample_size, byteorder=self._format.byteorder
+        )
+
+    def frames_ready(self, nframes: int) -> bool:
+        """Return if number of frames can be read without waiting for more data."""
+        return True
+
+    async def get_metadata(self) -> MediaMetadata:
+        """Return media metadata if available and possible."""
+        try:
+            return await get_metadata(self.filename)
+        except Exception as ex:
+            _LOGGER.warning("Failed to load metadata from %s: %s", self.filename, ex)
+        return EMPTY_METADATA
+
+    @property
+    def sample_rate(self) -> int:
+        """Return sample rate."""
+        return self._format.sample_rate
+
+    @property
+    def channels(self) -> int:
+        """Return number of audio channels."""
+        return self._format.channels
+
+    @property
+    def sample_size(self) -> int:
+        """Return number of bytes per sample."""
+        return self._format.sample_size
+
+    @property
+    def duration(self) -> int:
+        """Return duration in seconds."""
+        return round(len(self._samples) / self._frame_size / self.sample_rate)
+
+
+async def open_source(
+    source: Union[str, io.BufferedIOBase, asyncio.streams.StreamReader],
+    sample_rate: int,
+    channels: int,
+    sample_size: int,
+) -> AudioSource:
+    """Create an AudioSource from given input source."""
+    if not isinstance(source, str) or source.startswith(("http://", "https://")):
+        raise NotSupportedError("only local files are supported")
+
+    try:
+        return await MmapPcmSource.open(source, sample_rate, channels, sample_size)
+    except OSError as ex:
+        raise NotSupportedError(f"failed to map file: {ex}") from ex
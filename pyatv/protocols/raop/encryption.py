@@ -0,0 +1,74 @@
+"""Encryption of audio packets sent with AirPlay 2."""
+
+import asyncio
+from concurrent.futures import Executor
+from struct import Struct
+from typing import List, Optional, Sequence, Tuple
+
+from pyatv.protocols.raop.packets import AudioPacketHeader
+from pyatv.support.chacha20 import Chacha20Cipher8byteNonce
+
+# Size of authentication tag and nonce appended to audio data
+TAG_LENGTH = 16
+PACKET_NONCE_LENGTH = 8
+TRAILER_SIZE = TAG_LENGTH + PACKET_NONCE_LENGTH
+
+# Last eight bytes of nonce (the counter) are sent after the tag
+_PACKET_NONCE = Struct("<Q")
+
+# Audio packet (view) and size of audio data in packet
+AudioPacket = Tuple[memoryview, int]
+
+
+class AudioPacketEncryptor:
+    """Encrypt audio packets in place with ChaCha20-Poly1305 and counter nonces.
+
+    Encryption is done by Chacha20Cipher8byteNonce, this class puts encrypted audio,
+    tag and nonce into the packets.
+    """
+
+    def __init__(self, key: bytes) -> None:
+        """Initialize a new AudioPacketEncryptor instance."""
+        self._cipher = Chacha20Cipher8byteNonce(key, key)
+
+    @property
+    def counter(self) -> int:
+        """Return counter used for nonce of next packet."""
+        return self._cipher.out_counter
+
+    def encrypt(self, packet: memoryview, audio_size: int) -> int:
+        """Encrypt audio data of a packet in place and return new packet size.
+
+        TRAILER_SIZE bytes must be available after the audio data.
+        """
+        return self.encrypt_many([(packet, audio_size)])[0]
+
+    def encrypt_many(self, packets: Sequence[AudioPacket]) -> List[int]:
+        """Encrypt several packets in place and return new packet sizes."""
+        audio_start = AudioPacketHeader.length
+        counter = self._cipher.out_counter
+
+        # Timestamp and SSRC in header are used as additional authenticated data
+        encrypted = self._cipher.encrypt_many(
+            [packet[audio_start : audio_start + size] for packet, size in packets],
+            [packet[4:12] for packet, _ in packets],
+        )
+
+        sizes = []
+        for index, ((packet, _), data) in enumerate(zip(packets, encrypted)):
+            tag_end = audio_start + len(data)
+            packet[audio_start:tag_end] = data
+            _PACKET_NONCE.pack_into(packet, tag_end, counter + index)
+            sizes.append(tag_end + PACKET_NONCE_LENGTH)
+        return sizes
+
+    async def encrypt_many_in_executor(
+        self, packets: Sequence[AudioPacket], executor: Optional[Executor] = None
+    ) -> List[int]:
+        """Encrypt several packets in an executor and return new packet sizes.
+
+        Packets must not be touched until encryption has finished.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, self.encrypt_many, packets
+        )
@@ -0,0 +1,270 @@
+"""Stream the same audio to several receivers while decoding it only once."""
+
+import asyncio
+from collections import deque
+import logging
+from typing import Deque, Dict, Optional, Tuple
+
+from pyatv import exceptions
+from pyatv.interface import MediaMetadata
+from pyatv.protocols.raop import timing
+from pyatv.protocols.raop.audio_source import AudioSource
+from pyatv.settings import ResampleQuality
+
+_LOGGER = logging.getLogger(__name__)
+
+# Maximum number of chunks to buffer for slow readers (roughly four seconds of audio
+# with 352 frames per chunk in 44100Hz)
+MAX_BUFFERED_CHUNKS = 512
+
+
+class _Chunk:
+    """Decoded frames together with number of readers that has not read them yet."""
+
+    __slots__ = ("frames", "refs", "start")
+
+    def __init__(self, frames: bytes, refs: int, start: int) -> None:
+        """Initialize a new _Chunk instance."""
+        self.frames = frames
+        self.refs = refs
+        self.start = start  # Index of first frame in stream
+
+
+class FanoutReader(AudioSource):
+    """Audio source reading shared frames from an AudioFanout."""
+
+    def __init__(self, fanout: "AudioFanout", position: int, start_frame: int) -> None:
+        """Initialize a new FanoutReader instance."""
+        self._fanout = fanout
+        self.position: int = position
+        self.start_frame: int = start_frame
+        self.active: bool = True
+
+    @property
+    def fanout(self) -> "AudioFanout":
+        """Return fanout this reader reads from."""
+        return self._fanout
+
+    @property
+    def start_time(self) -> int:
+        """Return time (in NTP format) when first frame of this reader is played.
+
+        Readers created after streaming has started begin at a later frame, so their
+        start time is later than the start time of the fanout.
+        """
+        return self._fanout.start_time + timing.ts2ntp(
+            self.start_frame, self.sample_rate
+        )
+
+    async def close(self) -> None:
+        """Stop reading and release all frames not read yet.
+
+        This does not close the underlying source, use AudioFanout.close for that.
+        """
+        self._fanout.detach(self)
+
+    async def readframes(self, nframes: int) -> bytes:
+        """Read number of frames and advance in stream."""
+        return await self._fanout.readframes(self, nframes)
+
+    def frames_ready(self, nframes: int) -> bool:
+        """Return if number of frames can be read without waiting for more data."""
+        return self._fanout.frames_ready(self, nframes)
+
+    async def get_metadata(self) -> MediaMetadata:
+        """Return media metadata if available and possible."""
+        return await self._fanout.get_metadata()
+
+    @property
+    def sample_rate(self) -> int:
+        """Return sample rate."""
+        return self._fanout.source.sample_rate
+
+    @property
+    def channels(self) -> int:
+        """Return number of audio channels."""
+        return self._fanout.source.channels
+
+    @property
+    def sample_size(self) -> int:
+        """Return number of bytes per sample."""
+        return self._fanout.source.sample_size
+
+    @property
+    def duration(self) -> int:
+        """Return duration in seconds."""
+        return self._fanout.source.duration
+
+
+class AudioFanout:
+    """Share frames decoded from one audio source between several readers.
+
+    Decoded frames are stored in chunks together with a reference count, i.e. the
+    number of readers that have not read a chunk yet. A chunk is released as soon as
+    all readers have read it. Readers falling behind more than max_chunks chunks are
+    detached with an error rather than buffering indefinitely, as skipping audio would
+    make them play out of sync with the other readers.
+    """
+
+    def __init__(
+        self, source: AudioSource, max_chunks: int = MAX_BUFFERED_CHUNKS
+    ) -> None:
+        """Initialize a new AudioFanout instance."""
+        if max_chunks <= 0:
+            raise ValueError("max_chunks must be greater than zero")
+        self.source: AudioSource = source
+        self._max_chunks: int = max_chunks
+        self._chunks: Deque[_Chunk] = deque()
+        self._base: int = 0  # Absolute index of first chunk in _chunks
+        self._frames: int = 0  # Number of decoded frames
+        self._frame_size: int = source.channels * source.sample_size
+        self._readers: int = 0
+        self._finished: bool = False
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._metadata: Optional[MediaMetadata] = None
+        self._start_time: Optional[int] = None
+        self._parent_reader: Optional[FanoutReader] = None
+        self._converted: Dict[Tuple[int, int, int], AudioFanout] = {}
+
+    @property
+    def size(self) -> int:
+        """Return number of currently buffered chunks."""
+        return len(self._chunks)
+
+    @property
+    def start_time(self) -> int:
+        """Return time (in NTP format) when first frame of the stream is played.
+
+        The start time is picked the first time it is requested, i.e. when the first
+        receiver starts to stream.
+        """
+        if self._parent_reader is not None:
+            return self._parent_reader.start_time
+        if self._start_time is None:
+            self._start_time = timing.ntp_now()
+        return self._start_time
+
+    def create_reader(self) -> FanoutReader:
+        """Create a new reader starting at current position in stream."""
+        self._readers += 1
+        return FanoutReader(self, self._base + len(self._chunks), self._frames)
+
+    def create_converted_reader(
+        self,
+        sample_rate: int,
+        channels: int,
+        sample_size: int,
+        quality: ResampleQuality = ResampleQuality.Fast,
+    ) -> FanoutReader:
+        """Create a new reader of audio converted to another format.
+
+        Audio is converted once per format, readers of the same format share it.
+        """
+        audio_format = (sample_rate, channels, sample_size)
+        if audio_format == (
+            self.source.sample_rate,
+            self.source.channels,
+            self.source.sample_size,
+        ):
+            return self.create_reader()
+
+        converted = self._converted.get(audio_format)
+        if converted is None:
+            # Only imported when converting to keep importing pyatv fast
+            # pylint: disable=import-outside-toplevel
+            from pyatv.protocols.raop.resample import ResampledSource
+
+            parent = self.create_reader()
+            converted = AudioFanout(
+                ResampledSource(parent, *audio_format, quality), self._max_chunks
+            )
+            converted._parent_reader = parent
+            self._converted[audio_format] = converted
+        return converted.create_reader()
+
+    async def close(self) -> None:
+        """Close underlying source and release all buffered frames."""
+        self._chunks.clear()
+        self._converted.clear()
+        await self.source.close()
+
+    def detach(self, reader: FanoutReader) -> None:
+        """Detach a reader, releasing all chunks it has not read."""
+        if not reader.active:
+            return
+
+        reader.active = False
+        self._readers -= 1
+        for index in range(max(reader.position - self._base, 0), len(self._chunks)):
+            self._chunks[index].refs -= 1
+        self._release_chunks()
+
+        # Stop converting audio when no reader of a converted format is left
+        if self._readers == 0 and self._parent_reader is not None:
+            parent_fanout = self._parent_reader.fanout
+            parent_fanout.detach(self._parent_reader)
+            for audio_format, converted in list(parent_fanout._converted.items()):
+                if converted is self:
+                    del parent_fanout._converted[audio_format]
+
+    async def get_metadata(self) -> MediaMetadata:
+        """Return media metadata from source (only retrieved once)."""
+        async with self._lock:
+            if self._metadata is None:
+                self._metadata = await self.source.get_metadata()
+            return self._metadata
+
+    def frames_ready(self, reader: FanoutReader, nframes: int) -> bool:
+        """Return if a reader can read frames without waiting for more data."""
+        if not reader.active or self._finished:
+            return True
+        if reader.position - self._base < len(self._chunks):
+            return True
+        return not self._lock.locked() and self.source.frames_ready(nframes)
+
+    async def readframes(self, reader: FanoutReader, nframes: int) -> bytes:
+        """Read frames for a reader, decoding more frames if needed."""
+        if not reader.active:
+            return AudioSource.NO_FRAMES
+
+        while reader.position - self._base >= len(self._chunks):
+            if self._finished:
+                return AudioSource.NO_FRAMES
+
+            # Only one reader decodes at the time, the others will pick up the
+            # decoded frames once the lock is released
+            async with self._lock:
+                if reader.position - self._base < len(self._chunks) or self._finished:
+                    continue
+
+                frames = await self.source.readframes(nframes)
+                if frames:
+                    self._chunks.append(_Chunk(frames, self._readers, self._frames))
+                    self._frames += len(frames) // self._frame_size
+                    self._drop_chunks()
+                else:
+                    self._finished = True
+
+        if reader.position < self._base:
+            missed = self._base - reader.position
+            _LOGGER.debug("Reader fell behind by %d chunks, detaching it", missed)
+            self.detach(reader)
+            raise exceptions.InvalidStateError(
+                f"reader fell behind and missed {missed} chunks"
+            )
+
+        chunk = self._chunks[reader.position - self._base]
+        reader.position += 1
+        chunk.refs -= 1
+        self._release_chunks()
+        return chunk.frames
+
+    def _release_chunks(self) -> None:
+        while self._chunks and self._chunks[0].refs <= 0:
+            self._chunks.popleft()
+            self._base += 1
+
+    def _drop_chunks(self) -> None:
+        while len(self._chunks) > self._max_chunks:
+            self._chunks.popleft()
+            self._base += 1
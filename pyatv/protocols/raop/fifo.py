@@ -1,10 +1,14 @@
-"""Simple FIFO for packets based on dict.
+"""Simple FIFO for packets based on a ring of slots.
 
 This FIFO holds a certain number of elements as defined by upper_limit. Each item maps a
 sequence number to a packet, allowing fast look up of a certain packet. The order is
 defined by insertion order and *not* sequence number order.
 
-When upper limit is exceeded, the item that was *inserted* last, is removed.
+Items are stored in preallocated slots indexed by sequence number modulo number of
+slots. The number of slots is a power of two, so consecutive 16 bit sequence numbers
+map to consecutive slots even when wrapping around.
+
+When upper limit is exceeded, the item that was inserted first, is removed.
 
 Example:
 fifo = PacketFifo(2)
@@ -13,69 +17,115 @@ fifo[2] = 456
 print(fifo[1], fifo[2])
 """
 
-from typing import Dict, Iterator, MutableMapping, TypeVar
+from typing import Iterator, List, MutableMapping, Optional, TypeVar
 
 T = TypeVar("T")
 
+# Serial number of a free slot
+_FREE = -1
+
 
 class PacketFifo(MutableMapping[int, T]):  # pylint: disable=too-many-ancestors
     """Implementation of simple packet FIFO."""
 
-    _items: Dict[int, T]
-
     def __init__(self, upper_limit: int) -> None:
         """Initialize a new PacketFifo instance."""
-        self._items = {}
+        if upper_limit <= 0:
+            raise ValueError("upper limit must be greater than zero")
         self._upper_limit = upper_limit
+        self._mask = (1 << (upper_limit - 1).bit_length()) - 1
+        self._values: List[Optional[T]] = [None] * (self._mask + 1)
+        self._keys: List[int] = [0] * (self._mask + 1)
+
+        # Serial number (insertion count) of item in each slot and keys in insertion
+        # order, used to remove the oldest item and to iterate in insertion order
+        self._serials: List[int] = [_FREE] * (self._mask + 1)
+        self._order: List[int] = [0] * upper_limit
+        self._serial: int = 0
+        self._size: int = 0
 
     def clear(self):
         """Remove all items in FIFO."""
-        self._items.clear()
+        for i in range(len(self._serials)):
+            self._serials[i] = _FREE
+            self._values[i] = None
+        self._serial = 0
+        self._size = 0
 
     def __len__(self) -> int:
         """Return number of items in FIFO."""
-        return len(self._items)
+        return self._size
 
     def __setitem__(self, index: int, value: T):
         """Add an items to FIFO."""
-        if isinstance(index, int):
-            # Cannot add item with same index again
-            if index in self._items:
-                raise ValueError(f"{index} already in FIFO")
-
-            # Remove oldest item if limit is exceeded
-            if len(self) + 1 > self._upper_limit:
-                del self._items[list(self._items.keys())[0]]
-
-            self._items[index] = value
-        else:
+        if not isinstance(index, int):
             raise TypeError("only int supported as key")
 
+        # Cannot add item with same index again
+        if index in self:
+            raise ValueError(f"{index} already in FIFO")
+
+        # Remove oldest item if limit is exceeded
+        if self._serial >= self._upper_limit:
+            oldest = self._serial - self._upper_limit
+            self._remove(self._order[oldest % self._upper_limit], oldest)
+
+        # Replace item occupying the same slot (only happens if sequence numbers
+        # are not consecutive)
+        slot = index & self._mask
+        if self._serials[slot] != _FREE:
+            self._remove(self._keys[slot], self._serials[slot])
+
+        self._keys[slot] = index
+        self._values[slot] = value
+        self._serials[slot] = self._serial
+        self._order[self._serial % self._upper_limit] = index
+        self._serial += 1
+        self._size += 1
+
+    def _remove(self, index: int, serial: int) -> None:
+        slot = index & self._mask
+        if self._serials[slot] == serial:
+            self._serials[slot] = _FREE
+            self._values[slot] = None
+            self._size -= 1
+
     def __delitem__(self, index: int) -> None:
         """Remove item from FIFO."""
         raise NotImplementedError("removing items not supported")
 
     def __iter__(self) -> Iterator[int]:
         """Iterate over indices in FIFO."""
-        return self._items.__iter__()
+        for serial in range(max(self._serial - self._upper_limit, 0), self._serial):
+            index = self._order[serial % self._upper_limit]
+            if self._serials[index & self._mask] == serial:
+                yield index
 
     def __getitem__(self, index: int) -> T:
         """Return value of an item."""
-        if isinstance(index, int):
-            return self._items[index]
-        raise TypeError("only int supported as key")
+        if not isinstance(index, int):
+            raise TypeError("only int supported as key")
+
+        slot = index & self._mask
+        if self._serials[slot] == _FREE or self._keys[slot] != index:
+            raise KeyError(index)
+        return self._values[slot]  # type: ignore
 
     def __contains__(self, index: object) -> bool:
         """Return if an element exists in FIFO."""
-        return index in self._items
+        if not isinstance(index, int):
+            return False
+
+        slot = index & self._mask
+        return self._serials[slot] != _FREE and self._keys[slot] == index
 
     def __str__(self) -> str:
         """Return string representation of FIFO.
 
         Only index numbers are returned in the string.
         """
-        return str(list(self._items.keys()))
+        return str(list(self))
 
     def __repr__(self) -> str:
         """Return internal representation as string of FIFO."""
-        return repr(self._items)
+        return repr({index: self[index] for index in self})
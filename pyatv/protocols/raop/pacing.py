@@ -0,0 +1,255 @@
+"""Pacing of audio packets sent to a receiver."""
+
+import asyncio
+import logging
+import math
+import os
+import socket
+import threading
+from time import monotonic_ns
+from typing import NamedTuple, Optional
+
+from pyatv.support.datagram import send_datagrams
+from pyatv.support.rtsp import FRAMES_PER_PACKET
+
+_LOGGER = logging.getLogger(__name__)
+
+# Maximum number of extra packets sent in a batch to catch up when being late
+MAX_CATCH_UP_PACKETS = 3
+
+# Default number of packets to produce ahead of time when sending from a thread
+DEFAULT_LOOKAHEAD = 16
+
+
+class PacingStatistics(NamedTuple):
+    """Statistics of how late batches were sent compared to their deadlines.
+
+    All times are in seconds.
+    """
+
+    batches: int
+    mean_lateness: float
+    max_lateness: float
+    jitter: float
+
+
+class PacingScheduler:
+    """Calculate when and how many audio packets to send.
+
+    Deadlines are calculated from packet index (not by adding up sleep times), so
+    late wakeups never accumulate into drift.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        frames_per_packet: int = FRAMES_PER_PACKET,
+        batch_size: int = 1,
+        max_catch_up: int = MAX_CATCH_UP_PACKETS,
+        start_ns: Optional[int] = None,
+    ) -> None:
+        """Initialize a new PacingScheduler instance."""
+        if batch_size <= 0:
+            raise ValueError(f"invalid batch size: {batch_size}")
+        self.sample_rate = sample_rate
+        self.frames_per_packet = frames_per_packet
+        self.batch_size = batch_size
+        self.max_catch_up = max_catch_up
+        self.start_ns: int = monotonic_ns() if start_ns is None else start_ns
+        self.packets_behind: int = 0
+        self._scheduled = 0
+        self._batches = 0
+        self._mean_ns = 0.0
+        self._m2_ns = 0.0
+        self._max_ns = 0
+
+    @property
+    def scheduled_packets(self) -> int:
+        """Return number of packets scheduled so far."""
+        return self._scheduled
+
+    @property
+    def statistics(self) -> PacingStatistics:
+        """Return statistics of batches scheduled so far."""
+        variance = self._m2_ns / self._batches if self._batches else 0.0
+        return PacingStatistics(
+            self._batches,
+            self._mean_ns / 10**9,
+            self._max_ns / 10**9,
+            math.sqrt(variance) / 10**9,
+        )
+
+    def deadline(self, packet: int) -> int:
+        """Return deadline of a packet as monotonic clock time in nanoseconds."""
+        # Rounded up, so a packet is due (see due_packets) exactly at its deadline
+        return self.start_ns - (
+            -packet * self.frames_per_packet * 10**9 // self.sample_rate
+        )
+
+    def due_packets(self, now_ns: int) -> int:
+        """Return number of packets with a deadline at or before a point in time."""
+        if now_ns < self.start_ns:
+            return 0
+        return (now_ns - self.start_ns) * self.sample_rate // (
+            self.frames_per_packet * 10**9
+        ) + 1
+
+    async def next_batch(self) -> int:
+        """Wait until next batch is due and return number of packets to send.
+
+        A batch is due when its first packet is due, so remaining packets in the
+        batch are sent slightly ahead of time. When being late, up to max_catch_up
+        additional packets are added to the batch.
+        """
+        deadline = self.deadline(self._scheduled)
+        now = monotonic_ns()
+        if deadline > now:
+            await asyncio.sleep((deadline - now) / 10**9)
+            now = monotonic_ns()
+
+        self._record_lateness(max(now - deadline, 0))
+
+        due = self.due_packets(now) - self._scheduled
+        count = min(max(due, self.batch_size), self.batch_size + self.max_catch_up)
+        self.packets_behind = max(due - count, 0)
+        self._scheduled += count
+        return count
+
+    def _record_lateness(self, lateness: int) -> None:
+        # Running mean and variance (Welford's algorithm)
+        self._batches += 1
+        delta = lateness - self._mean_ns
+        self._mean_ns += delta / self._batches
+        self._m2_ns += delta * (lateness - self._mean_ns)
+        self._max_ns = max(self._max_ns, lateness)
+
+
+class ThreadedPacketSender:
+    """Send packets paced by a scheduler from a separate thread.
+
+    The thread runs its own event loop and sends packets on a duplicate of the
+    socket used by a (connected) datagram transport. Packets are handed over via
+    sendto, making an instance usable as transport when sending audio packets.
+    At most lookahead packets are queued, use wait_for_space to wait for room.
+    """
+
+    def __init__(
+        self,
+        scheduler: PacingScheduler,
+        transport: asyncio.DatagramTransport,
+        lookahead: int = DEFAULT_LOOKAHEAD,
+    ) -> None:
+        """Initialize a new ThreadedPacketSender instance."""
+        if lookahead <= 0:
+            raise ValueError(f"invalid lookahead: {lookahead}")
+        self.scheduler = scheduler
+        self.lookahead = lookahead
+        self._transport = transport
+        self._socket = socket.socket(
+            fileno=os.dup(transport.get_extra_info("socket").fileno())
+        )
+        self._socket.setblocking(False)
+        self._main_loop = asyncio.get_event_loop()
+        self._loop = asyncio.new_event_loop()
+        self._queue: Optional[asyncio.Queue] = None  # Created by thread
+        self._task: Optional[asyncio.Task] = None
+        self._started = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="raop-pacing", daemon=True
+        )
+        self._pending = 0
+        self._space = asyncio.Event()
+        self._space.set()
+
+    @property
+    def pending(self) -> int:
+        """Return number of queued packets not sent yet."""
+        return self._pending
+
+    def start(self) -> None:
+        """Start sender thread."""
+        self._thread.start()
+        self._started.wait()
+
+    def is_closing(self) -> bool:
+        """Return if underlying transport is closing."""
+        return self._transport.is_closing()
+
+    def sendto(self, data: bytes, addr=None) -> None:
+        """Queue a packet to be sent when it is due."""
+        self._pending += 1
+        if self._pending >= self.lookahead:
+            self._space.clear()
+        self._loop.call_soon_threadsafe(self._put, data)
+
+    async def wait_for_space(self) -> None:
+        """Wait until another packet can be queued."""
+        await self._space.wait()
+
+    async def drain(self) -> None:
+        """Wait for all queued packets to be sent and stop sender thread."""
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._put, None)
+            await self._main_loop.run_in_executor(None, self._thread.join)
+        self.close()
+
+    def close(self) -> None:
+        """Stop sender thread, dropping queued packets."""
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._task.cancel)  # type: ignore
+            self._thread.join()
+        if not self._loop.is_closed():
+            self._loop.close()
+        self._socket.close()
+
+    def _put(self, data: Optional[bytes]) -> None:
+        assert self._queue
+        self._queue.put_nowait(data)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+
+        # Before Python 3.10, a queue is bound to the current event loop when created,
+        # so it must be created here (in the thread) and not by __init__
+        self._queue = asyncio.Queue()
+        self._task = self._loop.create_task(self._send_packets())
+        self._loop.call_soon(self._started.set)
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            _LOGGER.debug("Pacing thread stopped")
+
+    async def _send_packets(self) -> None:
+        assert self._queue
+        while True:
+            remaining = await self.scheduler.next_batch()
+            while remaining > 0:
+                # Send whatever part of the batch that is available right now
+                packets = [await self._queue.get()]
+                while len(packets) < remaining and not self._queue.empty():
+                    packets.append(self._queue.get_nowait())
+
+                stop = None in packets
+                if stop:
+                    packets = packets[0 : packets.index(None)]
+
+                try:
+                    sent = send_datagrams(self._socket, packets)
+
+                    # Socket buffer is full, wait until writable and send the rest
+                    for packet in packets[sent:]:
+                        await self._loop.sock_sendall(self._socket, packet)
+                except OSError as ex:
+                    _LOGGER.warning("Failed to send audio packets: %s", ex)
+                self._main_loop.call_soon_threadsafe(self._packets_sent, len(packets))
+
+                if stop:
+                    return
+                remaining -= len(packets)
+
+    def _packets_sent(self, count: int) -> None:
+        self._pending -= count
+        if self._pending < self.lookahead:
+            self._space.set()
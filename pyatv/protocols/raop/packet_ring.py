@@ -0,0 +1,55 @@
+"""Ring of preallocated buffers used to assemble audio packets."""
+
+_EMPTY = memoryview(b"")
+
+
+class PacketRing:
+    """Implementation of a ring of preallocated packet buffers.
+
+    Slots are handed out round-robin, so a slot is valid until all other slots have
+    been handed out.
+    """
+
+    def __init__(self, slots: int) -> None:
+        """Initialize a new PacketRing instance."""
+        if slots <= 0:
+            raise ValueError("at least one slot is required")
+        self._slots: int = slots
+        self._slot_size: int = 0
+        self._buffer: memoryview = _EMPTY
+        self._index: int = 0
+
+    @property
+    def slots(self) -> int:
+        """Return number of slots in ring."""
+        return self._slots
+
+    @property
+    def slot_size(self) -> int:
+        """Return size of each slot (zero if not allocated)."""
+        return self._slot_size
+
+    def allocate(self, slot_size: int) -> None:
+        """Allocate memory for slots of a specific size.
+
+        Previously allocated memory is reused if slot size did not change.
+        """
+        if slot_size != self._slot_size:
+            self._buffer = memoryview(bytearray(self._slots * slot_size))
+            self._slot_size = slot_size
+        self._index = 0
+
+    def release(self) -> None:
+        """Release allocated memory."""
+        self._buffer = _EMPTY
+        self._slot_size = 0
+        self._index = 0
+
+    def next_slot(self) -> memoryview:
+        """Return a writable view of the next slot in the ring."""
+        if self._slot_size == 0:
+            raise RuntimeError("ring not allocated")
+
+        offset = self._index * self._slot_size
+        self._index = (self._index + 1) % self._slots
+        return self._buffer[offset : offset + self._slot_size]
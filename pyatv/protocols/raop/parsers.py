@@ -23,6 +23,16 @@ class EncryptionType(IntFlag):
     FairPlaySAPv25 = 16
 
 
+class CompressionType(IntFlag):
+    """Compression types (codecs) supported by receiver."""
+
+    Unknown = 0
+    PCM = 1
+    ALAC = 2
+    AAC = 4
+    AAC_ELD = 8
+
+
 class MetadataType(IntFlag):
     """Metadata types supported by receiver."""
 
@@ -94,3 +104,28 @@ def get_metadata_types(properties: Mapping[str, str]) -> MetadataType:
             2: MetadataType.Progress,
         }.get(md_type, MetadataType.NotSupported)
     return output
+
+
+def get_compression_types(properties: Mapping[str, str]) -> CompressionType:
+    """Return compression types supported by receiver.
+
+    Input format from zeroconf is comma separated list:
+
+        cn=0,1,2,3
+
+    0=PCM, 1=ALAC, 2=AAC, 3=AAC ELD
+    """
+    output = CompressionType.Unknown
+    try:
+        cn_types = [int(x) for x in properties["cn"].split(",")]
+    except (KeyError, ValueError):
+        return output
+
+    for cn_type in cn_types:
+        output |= {
+            0: CompressionType.PCM,
+            1: CompressionType.ALAC,
+            2: CompressionType.AAC,
+            3: CompressionType.AAC_ELD,
+        }.get(cn_type, CompressionType.Unknown)
+    return output
@@ -0,0 +1,121 @@
+"""Conversion of raw PCM samples to the format used by AirPlay."""
+
+import array
+from functools import lru_cache
+import sys
+from typing import Any, Optional, Union
+
+from pyatv.exceptions import NotSupportedError
+
+BytesLike = Union[bytes, bytearray, memoryview, array.array]
+
+SUPPORTED_SAMPLE_SIZES = (1, 2, 3, 4)
+
+
+@lru_cache(maxsize=1)
+def load_numpy() -> Any:
+    """Return NumPy module or None if it is not installed.
+
+    NumPy is imported on first call, so that importing pyatv does not load it.
+    """
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError:  # pragma: no cover
+        return None
+    return numpy
+
+
+def decoded_sample_size(sample_size: int) -> int:
+    """Return sample size to decode audio in for a given output sample size."""
+    if sample_size not in SUPPORTED_SAMPLE_SIZES:
+        raise NotSupportedError(f"unsupported sample size: {sample_size}")
+    return 4 if sample_size == 3 else sample_size
+
+
+def _as_bytes_view(data) -> memoryview:
+    view = memoryview(data)
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    return view
+
+
+def _convert_with_numpy(
+    np: Any,
+    source: memoryview,
+    source_size: int,
+    output: memoryview,
+    sample_size: int,
+    byteorder: str,
+) -> None:
+    src = np.frombuffer(source, dtype=np.uint8).reshape(-1, source_size)
+    dst = np.frombuffer(output, dtype=np.uint8).reshape(-1, sample_size)
+    if byteorder == "little":
+        dst[:] = src[:, ::-1][:, 0:sample_size]
+    else:
+        dst[:] = src[:, 0:sample_size]
+
+
+def _convert_with_views(
+    source: memoryview,
+    source_size: int,
+    output: memoryview,
+    sample_size: int,
+    byteorder: str,
+) -> None:
+    # Copy byte N of all samples at once to its position in the output samples
+    for i in range(sample_size):
+        index = source_size - i - 1 if byteorder == "little" else i
+        output[i::sample_size] = source[index::source_size]
+
+
+def convert_samples(
+    data: BytesLike,
+    sample_size: int,
+    output: Union[bytearray, memoryview],
+    source_sample_size: Optional[int] = None,
+    byteorder: str = sys.byteorder,
+) -> int:
+    """Convert native byte order samples to big endian and write them to output.
+
+    Samples in data are source_sample_size bytes large (same as sample_size unless
+    specified) and are narrowed to sample_size if needed. Byte order of samples in
+    data can be changed from native byte order with byteorder. Only whole samples are
+    converted and the number of bytes written to output is returned. Output must be
+    large enough to hold the converted samples and must not overlap with data.
+    """
+    source_size = source_sample_size or sample_size
+    if sample_size not in SUPPORTED_SAMPLE_SIZES:
+        raise NotSupportedError(f"unsupported sample size: {sample_size}")
+    if source_size not in SUPPORTED_SAMPLE_SIZES or source_size < sample_size:
+        raise NotSupportedError(f"unsupported source sample size: {source_size}")
+
+    source = _as_bytes_view(data)
+    samples = len(source) // source_size
+    size = samples * sample_size
+    if size > len(output):
+        raise ValueError(f"output too small ({len(output)} < {size})")
+
+    source = source[0 : samples * source_size]
+    target = _as_bytes_view(output)[0:size]
+    np = load_numpy()
+    if source_size == sample_size and (sample_size == 1 or byteorder == "big"):
+        target[:] = source
+    elif np is not None:
+        _convert_with_numpy(np, source, source_size, target, sample_size, byteorder)
+    else:
+        _convert_with_views(source, source_size, target, sample_size, byteorder)
+    return size
+
+
+def to_audio_samples(
+    data: BytesLike,
+    sample_size: int,
+    source_sample_size: Optional[int] = None,
+    byteorder: str = sys.byteorder,
+) -> bytearray:
+    """Convert native byte order samples to big endian and return them."""
+    output = bytearray(memoryview(data).nbytes)
+    del output[
+        convert_samples(data, sample_size, output, source_sample_size, byteorder) :
+    ]
+    return output
@@ -0,0 +1,149 @@
+"""Audio source playing queued files gaplessly."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Deque, Optional, Tuple
+
+from pyatv.interface import MediaMetadata
+from pyatv.protocols.raop.audio_source import AudioSource
+
+_LOGGER = logging.getLogger(__name__)
+
+OpenedTrack = Tuple[AudioSource, MediaMetadata]
+
+TrackOpener = Callable[[Any], Awaitable[OpenedTrack]]
+
+TrackChanged = Callable[[AudioSource, MediaMetadata], Any]
+
+
+class PlaylistSource(AudioSource):
+    """Audio source playing an opened source followed by queued items.
+
+    Queued items are opened by an opener, returning an opened source and its
+    metadata. Items can be added to the queue while playing, but must then be
+    followed by a call to prefetch. All sources must have the same audio format.
+    """
+
+    def __init__(
+        self,
+        source: AudioSource,
+        metadata: MediaMetadata,
+        queue: Deque[Any],
+        opener: TrackOpener,
+        track_changed: Optional[TrackChanged] = None,
+    ) -> None:
+        """Initialize a new PlaylistSource instance."""
+        self._source: Optional[AudioSource] = source
+        self._metadata = metadata
+        self._queue = queue
+        self._opener = opener
+        self._track_changed = track_changed
+        self._next: Optional[asyncio.Future] = None
+        self._frame_size = source.channels * source.sample_size
+        self._sample_rate = source.sample_rate
+        self._channels = source.channels
+        self._sample_size = source.sample_size
+        self._duration = source.duration
+        self.prefetch()
+
+    @property
+    def finished(self) -> bool:
+        """Return if all sources have been played."""
+        return self._source is None
+
+    def prefetch(self) -> None:
+        """Start opening next item in queue (if not already started)."""
+        if self._next is None and self._queue and self._source is not None:
+            self._next = asyncio.ensure_future(self._opener(self._queue.popleft()))
+
+    async def close(self) -> None:
+        """Close underlying resources."""
+        if self._next is not None:
+            self._next.cancel()
+            results = await asyncio.gather(self._next, return_exceptions=True)
+            self._next = None
+            if isinstance(results[0], tuple):
+                await results[0][0].close()
+        if self._source is not None:
+            await self._source.close()
+            self._source = None
+
+    async def readframes(self, nframes: int) -> bytes:
+        """Read number of frames and advance in stream.
+
+        When a source ends, remaining frames are read from the next source.
+        """
+        size = nframes * self._frame_size
+        data = AudioSource.NO_FRAMES
+        while self._source is not None and len(data) < size:
+            frames = await self._source.readframes(
+                nframes - len(data) // self._frame_size
+            )
+            if not frames:
+                await self._next_track()
+            elif not data:
+                data = frames
+            else:
+                data = b"".join((data, frames))
+        return data
+
+    def frames_ready(self, nframes: int) -> bool:
+        """Return if number of frames can be read without waiting for more data."""
+        return self._source is None or self._source.frames_ready(nframes)
+
+    async def get_metadata(self) -> MediaMetadata:
+        """Return media metadata of current source."""
+        return self._metadata
+
+    @property
+    def sample_rate(self) -> int:
+        """Return sample rate."""
+        return self._sample_rate
+
+    @property
+    def channels(self) -> int:
+        """Return number of audio channels."""
+        return self._channels
+
+    @property
+    def sample_size(self) -> int:
+        """Return number of bytes per sample."""
+        return self._sample_size
+
+    @property
+    def duration(self) -> int:
+        """Return duration of current source in seconds."""
+        return self._duration
+
+    async def _next_track(self) -> None:
+        if self._source is not None:
+            await self._source.close()
+            self._source = None
+
+        while self._next is not None or self._queue:
+            if self._next is None:
+                self._next = asyncio.ensure_future(self._opener(self._queue.popleft()))
+
+            opening, self._next = self._next, None
+            try:
+                self._source, self._metadata = await opening
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Failed to open queued file, skipping it")
+                continue
+
+            self._duration = self._source.duration
+            if (
+                self._source.sample_rate,
+                self._source.channels,
+                self._source.sample_size,
+            ) != (self._sample_rate, self._channels, self._sample_size):
+                _LOGGER.warning("Skipping queued file with different audio format")
+                await self._source.close()
+                self._source = None
+                continue
+
+            # Start buffering the file after this one while this one plays
+            self.prefetch()
+            if self._track_changed:
+                self._track_changed(self._source, self._metadata)
+            return
@@ -4,15 +4,20 @@ from abc import ABC, abstractmethod
 import asyncio
 import logging
 from random import randrange
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 from pyatv.auth.hap_pairing import NO_CREDENTIALS, HapCredentials
 from pyatv.protocols.raop import timing
+from pyatv.protocols.raop.audio_codec import AudioCodec, PcmCodec
 from pyatv.protocols.raop.packets import TimingPacket
 from pyatv.support.rtsp import FRAMES_PER_PACKET
 
 _LOGGER = logging.getLogger(__name__)
 
+# Maximum number of bytes a protocol appends after audio data in a packet (this is
+# the authentication tag and nonce used by AirPlay 2)
+MAX_PACKET_TRAILER_SIZE = 16 + 8
+
 
 class StreamContext:
     """Data used for one RAOP session."""
@@ -26,6 +31,7 @@ class StreamContext:
         self.channels: int = 2
         self.bytes_per_channel: int = 2
         self.latency = 22050 + self.sample_rate
+        self.codec: AudioCodec = PcmCodec(self.channels, self.bytes_per_channel)
 
         self.rtpseq: int = 0
         self.start_ts = 0
@@ -40,13 +46,17 @@ class StreamContext:
 
         self.volume: Optional[float] = None
 
-    def reset(self) -> None:
+    def reset(self, start_time: Optional[int] = None) -> None:
         """Reset seasion.
 
-        Must be done when sample rate changes.
+        Must be done when sample rate changes. A start time (in NTP format) can be
+        provided to share the same clock between several sessions, otherwise current
+        time is used.
         """
         self.rtpseq = randrange(2**16)
-        self.start_ts = timing.ntp2ts(timing.ntp_now(), self.sample_rate)
+        self.start_ts = timing.ntp2ts(
+            timing.ntp_now() if start_time is None else start_time, self.sample_rate
+        )
         self.head_ts = self.start_ts
         self.latency = 22050 + self.sample_rate
         self.padding_sent = 0
@@ -89,10 +99,18 @@ class StreamProtocol(ABC):
         """Start to send feedback (if supported and required)."""
 
     @abstractmethod
-    async def send_audio_packet(
-        self, transport: asyncio.DatagramTransport, rtp_header: bytes, audio: bytes
-    ) -> Tuple[int, bytes]:
-        """Send audio packet to receiver."""
+    async def send_audio_packets(
+        self,
+        transport: asyncio.DatagramTransport,
+        packets: Sequence[Tuple[memoryview, int]],
+    ) -> List[memoryview]:
+        """Send a batch of audio packets to receiver.
+
+        Each packet buffer contains an RTP header followed by audio data, the size of
+        which is passed together with the buffer. At least MAX_PACKET_TRAILER_SIZE
+        bytes are available after the audio data for protocol specific use. Packets
+        are assembled in place and views of the final packets are returned.
+        """
 
     @abstractmethod
     async def play_url(self, timing_server_port: int, url: str, position: float = 0.0):
@@ -3,11 +3,12 @@
 import asyncio
 import logging
 import plistlib
-from typing import List, Mapping, Optional, Tuple
+from typing import List, Mapping, Optional, Sequence, Tuple
 from uuid import uuid4
 
 from pyatv import exceptions
 from pyatv.protocols.airplay.auth import pair_verify
+from pyatv.protocols.raop.packets import AudioPacketHeader
 from pyatv.protocols.raop.protocols import StreamContext, StreamProtocol
 from pyatv.support.rtsp import RtspSession
 
@@ -54,6 +55,7 @@ class AirPlayV1(StreamProtocol):
             self.context.channels,
             self.context.sample_rate,
             self.context.password,
+            rtpmap=self.context.codec.rtpmap,
         )
 
         resp = await self.rtsp.setup(
@@ -108,13 +110,18 @@ class AirPlayV1(StreamProtocol):
 
         _LOGGER.debug("Feedback task finished")
 
-    async def send_audio_packet(
-        self, transport: asyncio.DatagramTransport, rtp_header: bytes, audio: bytes
-    ) -> Tuple[int, bytes]:
-        """Send audio packet to receiver."""
-        packet = rtp_header + audio
-        transport.sendto(packet)
-        return self.context.rtpseq, packet
+    async def send_audio_packets(
+        self,
+        transport: asyncio.DatagramTransport,
+        packets: Sequence[Tuple[memoryview, int]],
+    ) -> List[memoryview]:
+        """Send a batch of audio packets to receiver."""
+        sent = []
+        for packet, audio_size in packets:
+            packet = packet[0 : AudioPacketHeader.length + audio_size]
+            transport.sendto(packet)
+            sent.append(packet)
+        return sent
 
     async def play_url(self, timing_server_port: int, url: str, position: float = 0.0):
         """Play media from a URL."""
@@ -1,9 +1,10 @@
 """Implementation of AirPlay v2 protocol logic."""
 
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import plistlib
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 from uuid import uuid4
 
 from pyatv import exceptions
@@ -11,8 +12,9 @@ from pyatv.auth.hap_channel import setup_channel
 from pyatv.auth.hap_pairing import PairVerifyProcedure
 from pyatv.protocols.airplay.auth import verify_connection
 from pyatv.protocols.airplay.channels import EventChannel
+from pyatv.protocols.raop.encryption import AudioPacketEncryptor
+from pyatv.protocols.raop.packets import AudioPacketHeader
 from pyatv.protocols.raop.protocols import StreamContext, StreamProtocol
-from pyatv.support.chacha20 import Chacha20Cipher, Chacha20Cipher8byteNonce
 from pyatv.support.http import decode_bplist_from_body
 from pyatv.support.rtsp import RtspSession
 
@@ -36,14 +38,24 @@ HEADERS = {
 class AirPlayV2(StreamProtocol):
     """Stream protocol used for AirPlay v1 support."""
 
-    def __init__(self, context: StreamContext, rtsp: RtspSession) -> None:
-        """Initialize a new AirPlayV2 instance."""
+    def __init__(
+        self,
+        context: StreamContext,
+        rtsp: RtspSession,
+        encryption_thread: bool = False,
+    ) -> None:
+        """Initialize a new AirPlayV2 instance.
+
+        Audio packets are encrypted in a separate thread if encryption_thread is True.
+        """
         super().__init__()
         self.context = context
         self.rtsp = rtsp
         self.event_channel: Optional[asyncio.BaseTransport] = None
         self._verifier: Optional[PairVerifyProcedure] = None
-        self._cipher: Optional[Chacha20Cipher] = None
+        self._encryptor: Optional[AudioPacketEncryptor] = None
+        self._encryption_thread = encryption_thread
+        self._encryption_executor: Optional[ThreadPoolExecutor] = None
         self._feedback_task: Optional[asyncio.Task] = None
 
         self.uuid = str(uuid4())
@@ -128,10 +140,10 @@ class AirPlayV2(StreamProtocol):
             body={
                 "streams": [
                     {
-                        "audioFormat": 0x800,
+                        "audioFormat": self.context.codec.audio_format,
                         "audioMode": "default",
                         "controlPort": control_client_port,
-                        "ct": 1,  # Raw PCM
+                        "ct": self.context.codec.compression_type,
                         "isMedia": True,
                         "latencyMax": 88200,
                         "latencyMin": 11025,
@@ -153,7 +165,11 @@ class AirPlayV2(StreamProtocol):
         self.context.control_port = stream["controlPort"]
         self.context.server_port = stream["dataPort"]
 
-        self._cipher = Chacha20Cipher8byteNonce(shared_secret, shared_secret)
+        self._encryptor = AudioPacketEncryptor(shared_secret)
+        if self._encryption_thread and self._encryption_executor is None:
+            self._encryption_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="raop-encryption"
+            )
 
     def teardown(self) -> None:
         """Teardown resources allocated by setup efter streaming finished."""
@@ -163,6 +179,9 @@ class AirPlayV2(StreamProtocol):
         if self.event_channel:
             self.event_channel.close()
             self.event_channel = None
+        if self._encryption_executor:
+            self._encryption_executor.shutdown(wait=False)
+            self._encryption_executor = None
 
     async def start_feedback(self) -> None:
         """Start to send feedback (if supported and required)."""
@@ -180,32 +199,27 @@ class AirPlayV2(StreamProtocol):
                 _LOGGER.debug("Feedback failed: %s", ex)
             await asyncio.sleep(FEEDBACK_INTERVAL)
 
-    async def send_audio_packet(
-        self, transport: asyncio.DatagramTransport, rtp_header: bytes, audio: bytes
-    ) -> Tuple[int, bytes]:
-        """Send audio packet to receiver."""
-        # TODO: This part is extremely sub-optimized. Should at least use a memoryview
-        # and do in-place operations to avoid copying memory left and right.
-        nonce = b""
-        if self._cipher:
-            # Save the nonce that will be used by the next encrypt call as it is
-            # included in the audio packet.
-            nonce = self._cipher.out_nonce
-            aad = rtp_header[4:12]
-
-            # Do _not_ pass nonce=nonce here as that not increase the internal counter
-            # of outgoing messages. We would just send zero as nonce. We did that in
-            # the past and Apple doesn't seem to care, but other vendors might do.
-            audio = self._cipher.encrypt(audio, aad=aad)
-
-        # Build the audio packet. Make sure to drop the "upper four" bytes of the nonce
-        # as only eight byte nonces are used for encryption (the Chacha20
-        # implementation however returns twelve bytes according to specification).
-        packet = rtp_header + audio + nonce[-8:]
-
-        transport.sendto(packet)
-
-        return self.context.rtpseq, packet
+    async def send_audio_packets(
+        self,
+        transport: asyncio.DatagramTransport,
+        packets: Sequence[Tuple[memoryview, int]],
+    ) -> List[memoryview]:
+        """Send a batch of audio packets to receiver."""
+        if self._encryptor is None:
+            sizes = [AudioPacketHeader.length + audio_size for _, audio_size in packets]
+        elif self._encryption_executor is not None:
+            sizes = await self._encryptor.encrypt_many_in_executor(
+                packets, self._encryption_executor
+            )
+        else:
+            sizes = self._encryptor.encrypt_many(packets)
+
+        sent = []
+        for (packet, _), size in zip(packets, sizes):
+            packet = packet[0:size]
+            transport.sendto(packet)
+            sent.append(packet)
+        return sent
 
     async def play_url(self, timing_server_port: int, url: str, position: float = 0.0):
         """Play media from a URL."""
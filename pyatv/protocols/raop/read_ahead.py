@@ -0,0 +1,144 @@
+"""Adaptive read-ahead depth for audio read over a network."""
+
+import logging
+import math
+from time import monotonic
+from typing import Callable, NamedTuple, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+# Minimum and maximum amount of audio to read ahead (in seconds)
+MIN_DEPTH = 0.5
+MAX_DEPTH = 10.0
+
+# Amount of audio (in seconds) added to read-ahead depth per underrun
+UNDERRUN_STEP = 0.5
+
+# How many times the jitter to read ahead (like TCP retransmission timeout)
+JITTER_FACTOR = 4
+
+# Statistics are passed to hook at most this often (in seconds)
+REPORT_INTERVAL = 1.0
+
+# Smoothing factors used for mean and deviation of read times
+_MEAN_GAIN = 1 / 8
+_DEVIATION_GAIN = 1 / 4
+
+
+class ReadAheadStatistics(NamedTuple):
+    """Statistics of a read-ahead buffer.
+
+    Levels and jitter are in seconds, download rate in bytes per second.
+    """
+
+    fill_level: float
+    target_depth: float
+    jitter: float
+    underruns: int
+    download_rate: float
+
+
+# Called with statistics of a read-ahead buffer
+ReadAheadHook = Callable[[ReadAheadStatistics], None]
+
+
+class ReadAheadDepth:
+    """Calculate how much audio to read ahead based on network conditions."""
+
+    def __init__(
+        self,
+        bytes_per_second: int,
+        min_depth: float = MIN_DEPTH,
+        max_depth: float = MAX_DEPTH,
+    ) -> None:
+        """Initialize a new ReadAheadDepth instance."""
+        if bytes_per_second <= 0:
+            raise ValueError(f"invalid bytes per second: {bytes_per_second}")
+        if min_depth <= 0 or max_depth < min_depth:
+            raise ValueError(f"invalid depth: {min_depth}-{max_depth}")
+        self.bytes_per_second = bytes_per_second
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.underruns: int = 0
+        self._mean: float = 0.0
+        self._deviation: float = 0.0
+        self._chunks: int = 0
+        self.hook: Optional[ReadAheadHook] = None
+        self._reported: Optional[float] = None
+
+    @property
+    def jitter(self) -> float:
+        """Return mean deviation of time spent reading audio (in seconds)."""
+        return self._deviation
+
+    @property
+    def target(self) -> float:
+        """Return amount of audio to read ahead (in seconds)."""
+        depth = (
+            self.min_depth
+            + JITTER_FACTOR * self._deviation
+            + self.underruns * UNDERRUN_STEP
+        )
+        return min(depth, self.max_depth)
+
+    @property
+    def target_size(self) -> int:
+        """Return amount of audio to read ahead (in bytes)."""
+        return math.ceil(self.target * self.bytes_per_second)
+
+    def chunk_read(self, elapsed: float, size: int) -> None:
+        """Record time (in seconds) it took to read a chunk of audio (in bytes).
+
+        Only time spent waiting beyond the duration of the audio counts as delay.
+        """
+        delay = max(elapsed - size / self.bytes_per_second, 0.0)
+        self._chunks += 1
+        if self._chunks == 1:
+            self._mean = delay
+            self._deviation = delay / 2
+        else:
+            self._deviation += _DEVIATION_GAIN * (
+                abs(delay - self._mean) - self._deviation
+            )
+            self._mean += _MEAN_GAIN * (delay - self._mean)
+
+    def underrun(self) -> None:
+        """Record that buffer ran empty."""
+        self.underruns += 1
+
+    def statistics(
+        self, buffered: int, download_rate: float = 0.0
+    ) -> ReadAheadStatistics:
+        """Return statistics for a buffer with number of buffered bytes."""
+        return ReadAheadStatistics(
+            buffered / self.bytes_per_second,
+            self.target,
+            self._deviation,
+            self.underruns,
+            download_rate,
+        )
+
+    def report(
+        self,
+        buffered: int,
+        download_rate: float = 0.0,
+        force: bool = False,
+        now: Optional[float] = None,
+    ) -> None:
+        """Pass statistics to hook, at most once per REPORT_INTERVAL unless forced."""
+        if self.hook is None:
+            return
+
+        now = monotonic() if now is None else now
+        if (
+            not force
+            and self._reported is not None
+            and now - self._reported < REPORT_INTERVAL
+        ):
+            return
+
+        self._reported = now
+        try:
+            self.hook(self.statistics(buffered, download_rate))
+        except Exception:
+            _LOGGER.exception("read-ahead hook failed")
@@ -0,0 +1,322 @@
+"""Conversion of decoded audio to another sample rate, channel count or sample size."""
+
+import array
+import logging
+import sys
+from typing import Any, List, Tuple
+
+from pyatv.exceptions import NotSupportedError
+from pyatv.interface import MediaMetadata
+from pyatv.protocols.raop.audio_source import FRAMES_PER_PACKET, AudioSource
+from pyatv.protocols.raop.pcm import SUPPORTED_SAMPLE_SIZES, load_numpy
+from pyatv.settings import ResampleQuality
+
+_LOGGER = logging.getLogger(__name__)
+
+# Half number of filter taps (input frames on each side) used per quality
+_HALF_TAPS = {ResampleQuality.Fast: 1, ResampleQuality.High: 8}
+
+# Keep filter slightly below Nyquist frequency when downsampling to avoid aliasing
+_ROLLOFF = 0.95
+
+
+# Gain of center and surround channels when downmixing to stereo (-3 dB)
+_MIX_GAIN = 0.5**0.5
+
+# Left and right gain of each input channel when downmixing to stereo, using the
+# default channel order of WAV files. LFE is dropped.
+_LEFT, _RIGHT, _CENTER = (1.0, 0.0), (0.0, 1.0), (_MIX_GAIN, _MIX_GAIN)
+_SURROUND_LEFT, _SURROUND_RIGHT, _LFE = (_MIX_GAIN, 0.0), (0.0, _MIX_GAIN), (0.0, 0.0)
+_STEREO_GAINS = {
+    1: [_CENTER],
+    2: [_LEFT, _RIGHT],
+    3: [_LEFT, _RIGHT, _CENTER],
+    4: [_LEFT, _RIGHT, _SURROUND_LEFT, _SURROUND_RIGHT],
+    5: [_LEFT, _RIGHT, _CENTER, _SURROUND_LEFT, _SURROUND_RIGHT],
+    6: [_LEFT, _RIGHT, _CENTER, _LFE, _SURROUND_LEFT, _SURROUND_RIGHT],
+    7: [_LEFT, _RIGHT, _CENTER, _LFE, _CENTER, _SURROUND_LEFT, _SURROUND_RIGHT],
+    8: [
+        _LEFT,
+        _RIGHT,
+        _CENTER,
+        _LFE,
+        _SURROUND_LEFT,
+        _SURROUND_RIGHT,
+        _SURROUND_LEFT,
+        _SURROUND_RIGHT,
+    ],
+}
+
+
+def _mix_matrix(channels: int, output_channels: int) -> List[List[float]]:
+    # Weight of each input channel in each output channel
+    if channels == output_channels:
+        return [[float(i == j) for i in range(channels)] for j in range(channels)]
+    if channels == 1:
+        return [[1.0] for _ in range(output_channels)]
+    if output_channels > 2 or channels not in _STEREO_GAINS:
+        raise NotSupportedError(
+            f"unsupported channel conversion: {channels} -> {output_channels}"
+        )
+
+    gains = _STEREO_GAINS[channels]
+    if output_channels == 1:
+        rows = [[left + right for left, right in gains]]
+    else:
+        rows = [[left for left, _ in gains], [right for _, right in gains]]
+
+    # Normalize so that output does not clip when all inputs are at full scale
+    return [[weight / sum(row) for weight in row] for row in rows]
+
+
+def _decode_numpy(np: Any, data: bytes, channels: int, sample_size: int) -> Any:
+    if sample_size == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8) - 128.0) / 128.0
+    elif sample_size == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = (raw[:, 0] << 24) | (raw[:, 1] << 16) | (raw[:, 2] << 8)
+        samples = (values >> 8) / float(1 << 23)
+    else:
+        samples = np.frombuffer(data, dtype=f">i{sample_size}") / float(
+            1 << (8 * sample_size - 1)
+        )
+    return samples.reshape(-1, channels)
+
+
+def _encode_numpy(np: Any, frames: Any, sample_size: int) -> bytes:
+    scale = 1 << (8 * sample_size - 1)
+    values = np.clip(np.rint(frames.reshape(-1) * scale), -scale, scale - 1)
+    if sample_size == 1:
+        return (values + 128).astype(np.uint8).tobytes()
+    if sample_size == 3:
+        values = values.astype(np.int32)
+        return (
+            np.stack(((values >> 16) & 0xFF, (values >> 8) & 0xFF, values & 0xFF))
+            .T.astype(np.uint8)
+            .tobytes()
+        )
+    return values.astype(f">i{sample_size}").tobytes()
+
+
+def _decode_python(data: bytes, channels: int, sample_size: int) -> List[List[float]]:
+    scale = float(1 << (8 * sample_size - 1))
+    if sample_size == 1:
+        samples = [(value - 128) / 128.0 for value in data]
+    elif sample_size == 3:
+        samples = [
+            int.from_bytes(data[i : i + 3], "big", signed=True) / scale
+            for i in range(0, len(data) - 2, 3)
+        ]
+    else:
+        values = array.array("h" if sample_size == 2 else "i", data)
+        if sys.byteorder == "little":
+            values.byteswap()
+        samples = [value / scale for value in values]
+    return [samples[i : i + channels] for i in range(0, len(samples), channels)]
+
+
+def _encode_python(frames: List[List[float]], sample_size: int) -> bytes:
+    scale = 1 << (8 * sample_size - 1)
+    output = bytearray()
+    for frame in frames:
+        for sample in frame:
+            value = min(max(round(sample * scale), -scale), scale - 1)
+            if sample_size == 1:
+                output.append(value + 128)
+            else:
+                output += value.to_bytes(sample_size, "big", signed=True)
+    return bytes(output)
+
+
+class ResampledSource(AudioSource):
+    """Audio source converting audio from another source to a new format."""
+
+    def __init__(
+        self,
+        source: AudioSource,
+        sample_rate: int,
+        channels: int,
+        sample_size: int,
+        quality: ResampleQuality = ResampleQuality.Fast,
+    ) -> None:
+        """Initialize a new ResampledSource instance."""
+        if sample_rate <= 0 or channels <= 0:
+            raise ValueError(f"invalid format: {sample_rate}/{channels}")
+        for size in (sample_size, source.sample_size):
+            if size not in SUPPORTED_SAMPLE_SIZES:
+                raise NotSupportedError(f"unsupported sample size: {size}")
+        self._np = load_numpy()
+        if quality == ResampleQuality.High and self._np is None:
+            _LOGGER.debug("NumPy not available, using fast resampling")
+            quality = ResampleQuality.Fast
+
+        self.source = source
+        self.quality = quality
+        self._sample_rate = sample_rate
+        self._channels = channels
+        self._sample_size = sample_size
+        self._mix = _mix_matrix(source.channels, channels)
+        self._half_taps = _HALF_TAPS[quality]
+        self._cutoff = (
+            1.0
+            if sample_rate >= source.sample_rate
+            else _ROLLOFF * sample_rate / source.sample_rate
+        )
+
+        # History of half_taps - 1 (silent) frames is needed before first frame
+        self._frames: Any = self._empty(self._half_taps - 1)
+        self._base: int = 1 - self._half_taps  # Input index of first frame in buffer
+        self._position: int = 0  # Index of next output frame
+        self._end: int = -1  # Number of input frames when source has ended
+
+    @property
+    def _buffered_end(self) -> int:
+        return self._base + len(self._frames)
+
+    def _empty(self, nframes: int) -> Any:
+        if self._np is not None:
+            return self._np.zeros((nframes, self._channels))
+        return [[0.0] * self._channels for _ in range(nframes)]
+
+    def _input_index(self, position: int) -> Tuple[int, int]:
+        # Input frame (and remainder in units of output sample rate) for output frame
+        return divmod(position * self.source.sample_rate, self._sample_rate)
+
+    async def close(self) -> None:
+        """Close underlying resources."""
+        await self.source.close()
+
+    async def readframes(self, nframes: int) -> bytes:
+        """Read number of frames and advance in stream."""
+        last, _ = self._input_index(self._position + nframes - 1)
+        while self._end < 0 and self._buffered_end <= last + self._half_taps:
+            frames = await self.source.readframes(
+                max(last + self._half_taps - self._buffered_end + 1, FRAMES_PER_PACKET)
+            )
+            if not frames:
+                self._end = self._buffered_end
+                self._append(self._empty(self._half_taps))
+            else:
+                self._append(self._convert(frames))
+
+        if self._end >= 0:
+            remaining = -(-self._end * self._sample_rate // self.source.sample_rate)
+            nframes = min(nframes, remaining - self._position)
+        if nframes <= 0:
+            return AudioSource.NO_FRAMES
+
+        output = self._interpolate(nframes)
+        self._position += nframes
+
+        # Drop frames not needed by any following output frame
+        first, _ = self._input_index(self._position)
+        drop = max(first - self._half_taps + 1 - self._base, 0)
+        self._frames = self._frames[drop:]
+        self._base += drop
+
+        if self._np is not None:
+            return _encode_numpy(self._np, output, self._sample_size)
+        return _encode_python(output, self._sample_size)
+
+    def frames_ready(self, nframes: int) -> bool:
+        """Return if number of frames can be read without waiting for more data."""
+        last, _ = self._input_index(self._position + nframes - 1)
+        needed = last + self._half_taps - self._buffered_end + 1
+        if self._end >= 0 or needed <= 0:
+            return True
+        return self.source.frames_ready(max(needed, FRAMES_PER_PACKET))
+
+    def _convert(self, data: bytes) -> Any:
+        channels, sample_size = self.source.channels, self.source.sample_size
+        data = data[0 : len(data) - len(data) % (channels * sample_size)]
+        if self._np is not None:
+            frames = _decode_numpy(self._np, data, channels, sample_size)
+            if channels == self._channels:
+                return frames
+            return frames @ self._np.array(self._mix).T
+
+        frames = _decode_python(data, channels, sample_size)
+        if channels == self._channels:
+            return frames
+        return [
+            [
+                sum(sample * weight for sample, weight in zip(frame, row) if weight)
+                for row in self._mix
+            ]
+            for frame in frames
+        ]
+
+    def _append(self, frames: Any) -> None:
+        if self._np is not None:
+            self._frames = self._np.concatenate((self._frames, frames))
+        else:
+            self._frames.extend(frames)
+
+    def _interpolate(self, nframes: int) -> Any:
+        np = self._np
+        if np is None:
+            return self._interpolate_linear(nframes)
+
+        positions: Any = np.arange(
+            self._position, self._position + nframes, dtype=np.int64
+        )
+        index, remainder = np.divmod(
+            positions * self.source.sample_rate, self._sample_rate
+        )
+        fraction = remainder / self._sample_rate
+        if self.quality == ResampleQuality.Fast:
+            start = index - self._base
+            frames = self._frames
+            return (
+                frames[start] * (1.0 - fraction)[:, None]
+                + frames[start + 1] * fraction[:, None]
+            )
+
+        # Weight input frames around each output frame with a Hann windowed sinc
+        offsets = np.arange(1 - self._half_taps, self._half_taps + 1)
+        distance = offsets[None, :] - fraction[:, None]
+        weights = np.sinc(self._cutoff * distance) * (
+            0.5 + 0.5 * np.cos(np.pi * distance / self._half_taps)
+        )
+        weights /= weights.sum(axis=1, keepdims=True)
+        taps = self._frames[(index - self._base)[:, None] + offsets[None, :]]
+        return np.einsum("nt,ntc->nc", weights, taps)
+
+    def _interpolate_linear(self, nframes: int) -> List[List[float]]:
+        output = []
+        for position in range(self._position, self._position + nframes):
+            index, remainder = self._input_index(position)
+            fraction = remainder / self._sample_rate
+            current = self._frames[index - self._base]
+            following = self._frames[index - self._base + 1]
+            output.append(
+                [
+                    current[i] + (following[i] - current[i]) * fraction
+                    for i in range(self._channels)
+                ]
+            )
+        return output
+
+    async def get_metadata(self) -> MediaMetadata:
+        """Return media metadata if available and possible."""
+        return await self.source.get_metadata()
+
+    @property
+    def sample_rate(self) -> int:
+        """Return sample rate."""
+        return self._sample_rate
+
+    @property
+    def channels(self) -> int:
+        """Return number of audio channels."""
+        return self._channels
+
+    @property
+    def sample_size(self) -> int:
+        """Return number of bytes per sample."""
+        return self._sample_size
+
+    @property
+    def duration(self) -> int:
+        """Return duration in seconds."""
+        return self.source.duration
@@ -0,0 +1,97 @@
+"""Tracking of retransmission requests from a receiver."""
+
+from time import monotonic
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional
+
+# Packets are not resent again if already resent within this time (in seconds)
+COALESCE_WINDOW = 0.05
+
+
+class RetransmitStatistics(NamedTuple):
+    """Statistics of retransmission requests from a receiver.
+
+    Bursts maps number of lost packets in a row to how many requests had that many.
+    """
+
+    requests: int
+    requested: int
+    served: int
+    missing: int
+    coalesced: int
+    bursts: Mapping[int, int]
+
+    @property
+    def max_burst(self) -> int:
+        """Return largest number of packets lost in a row."""
+        return max(self.bursts, default=0)
+
+
+# Called with address of receiver and its statistics
+MetricsHook = Callable[[str, RetransmitStatistics], None]
+
+
+class RetransmitTracker:
+    """Keep statistics of retransmission requests and coalesce duplicates."""
+
+    def __init__(self, window: float = COALESCE_WINDOW) -> None:
+        """Initialize a new RetransmitTracker instance."""
+        if window < 0:
+            raise ValueError(f"invalid window: {window}")
+        self.window = window
+        self.requests: int = 0
+        self.requested: int = 0
+        self._served: int = 0
+        self._missing: int = 0
+        self._coalesced: int = 0
+        self._bursts: Dict[int, int] = {}
+
+        # Sequence number to time of last resend (ordered by time)
+        self._resent: Dict[int, float] = {}
+
+    @property
+    def statistics(self) -> RetransmitStatistics:
+        """Return statistics of requests handled so far."""
+        return RetransmitStatistics(
+            self.requests,
+            self.requested,
+            self._served,
+            self._missing,
+            self._coalesced,
+            dict(self._bursts),
+        )
+
+    def request(
+        self, lost_seqno: int, lost_packets: int, now: Optional[float] = None
+    ) -> List[int]:
+        """Record a retransmission request and return sequence numbers to resend."""
+        now = monotonic() if now is None else now
+        self._expire(now)
+
+        self.requests += 1
+        self.requested += lost_packets
+        self._bursts[lost_packets] = self._bursts.get(lost_packets, 0) + 1
+
+        seqnos = []
+        for i in range(lost_packets):
+            seqno = (lost_seqno + i) % (2**16)
+            if seqno in self._resent:
+                self._coalesced += 1
+            else:
+                self._resent[seqno] = now
+                seqnos.append(seqno)
+        return seqnos
+
+    def served(self) -> None:
+        """Record that a packet was resent."""
+        self._served += 1
+
+    def missing(self) -> None:
+        """Record that a requested packet was no longer in backlog."""
+        self._missing += 1
+
+    def _expire(self, now: float) -> None:
+        while self._resent:
+            seqno, resent = next(iter(self._resent.items()))
+            if now - resent < self.window:
+                break
+            del self._resent[seqno]
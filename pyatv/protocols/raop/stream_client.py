@@ -9,14 +9,17 @@ from abc import ABC, abstractmethod
 import asyncio
 import logging
 from time import monotonic, monotonic_ns
-from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple, cast
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple, cast
 import weakref
 
 from pyatv import exceptions
 from pyatv.protocols.airplay.utils import pct_to_dbfs
 from pyatv.protocols.raop import timing
+from pyatv.protocols.raop.audio_codec import create_codec
 from pyatv.protocols.raop.audio_source import AudioSource
 from pyatv.protocols.raop.fifo import PacketFifo
+from pyatv.protocols.raop.pacing import PacingScheduler, ThreadedPacketSender
+from pyatv.protocols.raop.packet_ring import PacketRing
 from pyatv.protocols.raop.packets import (
     AudioPacketHeader,
     RetransmitReqeust,
@@ -26,12 +29,24 @@ from pyatv.protocols.raop.parsers import (
     EncryptionType,
     MetadataType,
     get_audio_properties,
+    get_compression_types,
     get_encryption_types,
     get_metadata_types,
 )
-from pyatv.protocols.raop.protocols import StreamContext, StreamProtocol, TimingServer
+from pyatv.protocols.raop.protocols import (
+    MAX_PACKET_TRAILER_SIZE,
+    StreamContext,
+    StreamProtocol,
+    TimingServer,
+)
+from pyatv.protocols.raop.retransmit import (
+    MetricsHook,
+    RetransmitStatistics,
+    RetransmitTracker,
+)
 from pyatv.settings import Settings
 from pyatv.support import log_binary
+from pyatv.support.datagram import BatchedDatagramTransport
 from pyatv.support.metadata import EMPTY_METADATA, MediaMetadata
 from pyatv.support.rtsp import FRAMES_PER_PACKET, RtspSession
 
@@ -43,6 +58,9 @@ MAX_PACKETS_COMPENSATE = 3
 # We should store this many packets in case retransmission is requested
 PACKET_BACKLOG_SIZE = 1000
 
+# Time to wait for audio from source before inserting silence (about half a packet)
+UNDERRUN_TIMEOUT = 0.004  # Seconds
+
 # Number of "too slow to keep up" warnings to suppress before warning about them
 SLOW_WARNING_THRESHOLD = 5
 
@@ -54,6 +72,10 @@ MISSING_METADATA = MediaMetadata(
 SUPPORTED_ENCRYPTIONS = EncryptionType.Unencrypted | EncryptionType.MFiSAP
 
 
+class SessionLostError(exceptions.ProtocolError):
+    """Raised when a kept streaming session is no longer valid."""
+
+
 class PlaybackInfo(NamedTuple):
     """Information for what is currently playing."""
 
@@ -64,12 +86,21 @@ class PlaybackInfo(NamedTuple):
 class ControlClient(asyncio.Protocol):
     """Control client responsible for e.g. sync packets."""
 
-    def __init__(self, context: StreamContext, packet_backlog: PacketFifo):
+    def __init__(
+        self,
+        context: StreamContext,
+        packet_backlog: PacketFifo,
+        metrics_hook: Optional[MetricsHook] = None,
+    ):
         """Initialize a new ControlClient."""
         self.transport = None
         self.context = context
         self.packet_backlog = packet_backlog
+        self.metrics_hook = metrics_hook
+        self.retransmits = RetransmitTracker()
         self.task: Optional[asyncio.Future] = None
+        self._address: str = ""
+        self._reported_requests: int = 0
 
     def close(self):
         """Close control client."""
@@ -85,6 +116,7 @@ class ControlClient(asyncio.Protocol):
     def start(self, addr: str):
         """Start sending periodic sync messages."""
         _LOGGER.debug("Starting periodic sync task")
+        self._address = addr
 
         async def _sync_handler():
             try:
@@ -131,6 +163,7 @@ class ControlClient(asyncio.Protocol):
             self.transport.sendto(packet, dest)
 
             await asyncio.sleep(1.0)  # Very low granularity here
+            self.report_statistics()
             current_time = timing.ts2ntp(self.context.head_ts, self.context.sample_rate)
 
     def stop(self):
@@ -139,6 +172,29 @@ class ControlClient(asyncio.Protocol):
             self.task.cancel()
             self.task = None
 
+    def report_statistics(self) -> None:
+        """Pass retransmission statistics to metrics hook if changed."""
+        if self.retransmits.requests == self._reported_requests:
+            return
+
+        self._reported_requests = self.retransmits.requests
+        stats = self.retransmits.statistics
+        _LOGGER.debug(
+            "Retransmits to %s: requested=%d, served=%d, missing=%d, "
+            "coalesced=%d, max burst=%d",
+            self._address,
+            stats.requested,
+            stats.served,
+            stats.missing,
+            stats.coalesced,
+            stats.max_burst,
+        )
+        if self.metrics_hook:
+            try:
+                self.metrics_hook(self._address, stats)
+            except Exception:
+                _LOGGER.exception("metrics hook failed")
+
     def connection_made(self, transport):
         """Handle that connection succeeded."""
         self.transport = transport
@@ -155,9 +211,10 @@ class ControlClient(asyncio.Protocol):
     def _retransmit_lost_packets(self, request, addr):
         _LOGGER.debug("%s from %s", request, addr)
 
-        for i in range(request.lost_packets):
-            if request.lost_seqno + i in self.packet_backlog:
-                packet = self.packet_backlog[request.lost_seqno + i]
+        seqnos = self.retransmits.request(request.lost_seqno, request.lost_packets)
+        for seqno in seqnos:
+            if seqno in self.packet_backlog:
+                packet = self.packet_backlog[seqno]
 
                 # Very "low level" here just because it's simple and avoids
                 # unnecessary conversions
@@ -166,8 +223,10 @@ class ControlClient(asyncio.Protocol):
 
                 if self.transport:
                     self.transport.sendto(resp, addr)
+                    self.retransmits.served()
             else:
-                _LOGGER.debug("Packet %d not in backlog", request.lost_seqno + 1)
+                _LOGGER.debug("Packet %d not in backlog", seqno)
+                self.retransmits.missing()
 
     @staticmethod
     def error_received(exc):
@@ -220,6 +279,10 @@ class RaopListener(ABC):
     def stopped(self) -> None:
         """Media stopped playing."""
 
+    @abstractmethod
+    def failed(self, exception: Exception) -> None:
+        """Playback of a queued file failed."""
+
 
 class StreamClient:
     """Simple client to stream audio."""
@@ -238,10 +301,16 @@ class StreamClient:
         self.settings: Settings = settings
         self.control_client: Optional[ControlClient] = None
         self.timing_server: Optional[TimingServer] = None
+        self.metrics_hook: Optional[MetricsHook] = None
         self._packet_backlog: PacketFifo = PacketFifo(PACKET_BACKLOG_SIZE)
+        self._packet_ring: PacketRing = PacketRing(PACKET_BACKLOG_SIZE)
+        self._pending_read: Optional[asyncio.Future] = None
+        self._audio_transport: Optional[asyncio.DatagramTransport] = None
+        self._underrun_packets: int = 0
         self._encryption_types: EncryptionType = EncryptionType.Unknown
         self._metadata_types: MetadataType = MetadataType.NotSupported
         self._metadata: MediaMetadata = EMPTY_METADATA
+        self._track_start: float = 0.0
         self._listener: Optional[weakref.ReferenceType[Any]] = None
         self._info: Dict[str, object] = {}
         self._properties: Mapping[str, str] = {}
@@ -269,15 +338,30 @@ class StreamClient:
         metadata = (
             MISSING_METADATA if self._metadata == EMPTY_METADATA else self._metadata
         )
-        return PlaybackInfo(metadata, self.context.position)
+        return PlaybackInfo(metadata, self.context.position - self._track_start)
 
     @property
     def info(self) -> Dict[str, object]:
         """Return value mappings for server /info values."""
         return self._info
 
+    @property
+    def retransmit_statistics(self) -> Optional[RetransmitStatistics]:
+        """Return statistics of retransmission requests from receiver."""
+        if self.control_client is None:
+            return None
+        return self.control_client.retransmits.statistics
+
+    @property
+    def has_session(self) -> bool:
+        """Return if a streaming session kept by send_audio is active."""
+        return self._audio_transport is not None
+
     def close(self):
         """Close session and free up resources."""
+        if self._audio_transport:
+            self._audio_transport.close()
+            self._audio_transport = None
         self._protocol.teardown()
         if self.control_client:
             self.control_client.close()
@@ -304,7 +388,9 @@ class StreamClient:
         self._update_output_properties(properties)
 
         (_, control_client) = await self.loop.create_datagram_endpoint(
-            lambda: ControlClient(self.context, self._packet_backlog),
+            lambda: ControlClient(
+                self.context, self._packet_backlog, self.metrics_hook
+            ),
             local_addr=(
                 self.rtsp.connection.local_ip,
                 self.settings.protocols.raop.control_port,
@@ -350,6 +436,14 @@ class StreamClient:
             self.context.bytes_per_channel * 8,
         )
 
+        self.context.codec = create_codec(
+            self.settings.protocols.raop.audio_codec,
+            get_compression_types(properties),
+            self.context.channels,
+            self.context.bytes_per_channel,
+        )
+        _LOGGER.debug("Using audio codec %s", type(self.context.codec).__name__)
+
     @property
     def _requires_auth_setup(self):
         # Do auth-setup if MFiSAP encryption is supported by receiver. Also,
@@ -372,85 +466,101 @@ class StreamClient:
         await self.rtsp.set_parameter("volume", str(volume))
         self.context.volume = volume
 
-    async def send_audio(  # pylint: disable=too-many-branches
+    async def send_audio(  # pylint: disable=too-many-branches,too-many-statements
         self,
         source: AudioSource,
         metadata: MediaMetadata = EMPTY_METADATA,
         /,
         volume: Optional[float] = None,
+        start_time: Optional[int] = None,
+        keep_session: bool = False,
     ):
-        """Send an audio stream to the device."""
+        """Send an audio stream to the device.
+
+        If start_time (in NTP format) is provided, audio is paced relative to that time
+        instead of when streaming starts. This allows streaming in sync to several
+        devices.
+
+        If keep_session is True, the streaming session (e.g. audio socket and RTSP
+        session) is kept when all audio has been sent. Audio sent later is then
+        streamed in the same session, which is ended by end_session. If the receiver
+        has dropped a kept session, SessionLostError is raised before any audio is
+        sent.
+        """
         if self.control_client is None or self.timing_server is None:
             raise RuntimeError("not initialized")
 
-        self.context.reset()
+        new_session = self._audio_transport is None
+        rtpseq = self.context.rtpseq
+        self.context.reset(start_time)
+        if not new_session:
+            # Sequence numbers continue when reusing a session
+            self.context.rtpseq = rtpseq
+
+        # Packets are assembled in place in a preallocated ring. Use as many slots as
+        # packets in the backlog so that packets are never overwritten while they
+        # still might be retransmitted.
+        self._packet_ring.allocate(
+            AudioPacketHeader.length
+            + self.context.codec.max_payload_size
+            + MAX_PACKET_TRAILER_SIZE
+        )
+        self._underrun_packets = 0
 
-        transport = None
+        keep = False
         try:
-            # Create a socket used for writing audio packets (ugly)
-            transport, _ = await self.loop.create_datagram_endpoint(
-                AudioProtocol,
-                remote_addr=(self.rtsp.connection.remote_ip, self.context.server_port),
-            )
+            if new_session:
+                # Create a socket used for writing audio packets (ugly)
+                self._audio_transport, _ = await self.loop.create_datagram_endpoint(
+                    AudioProtocol,
+                    remote_addr=(
+                        self.rtsp.connection.remote_ip,
+                        self.context.server_port,
+                    ),
+                )
 
             # Start sending sync packets
             self.control_client.start(self.rtsp.connection.remote_ip)
 
-            # Send progress if supported by receiver
-            if MetadataType.Progress in self._metadata_types:
-                start = self.context.rtptime
-                now = self.context.rtptime
-                end = start + source.duration * self.context.sample_rate
-                await self.rtsp.set_parameter("progress", f"{start}/{now}/{end}")
-
-            # Apply text metadata if it is supported
-            self._metadata = metadata
-            if MetadataType.Text in self._metadata_types:
-                _LOGGER.debug("Playing with metadata: %s", self.playback_info.metadata)
-                await self.rtsp.set_metadata(
-                    self.context.rtsp_session,
-                    self.context.rtpseq,
-                    self.context.rtptime,
-                    self.playback_info.metadata,
-                )
-
-            # Send artwork if that is supported
-            if (
-                MetadataType.Artwork in self._metadata_types
-                and metadata.artwork is not None
-            ):
-                _LOGGER.debug("Sending %s bytes artwork", len(metadata.artwork))
-                await self.rtsp.set_artwork(
-                    self.context.rtsp_session,
-                    self.context.rtpseq,
-                    self.context.rtptime,
-                    metadata.artwork,
+            self._track_start = 0.0
+            try:
+                await self._send_metadata(metadata, source.duration)
+
+                if new_session:
+                    # Start keep-alive task to ensure connection is not closed by
+                    # remote device and start playback
+                    await self._protocol.start_feedback()
+                    await self.rtsp.record()
+
+                # Flushing makes the receiver start playing from the new sequence
+                # number and RTP time (also when reusing a session)
+                await self.rtsp.flush(
+                    headers={
+                        "Range": "npt=0-",
+                        "Session": self.context.rtsp_session,
+                        "RTP-Info": (
+                            f"seq={self.context.rtpseq};rtptime={self.context.rtptime}"
+                        ),
+                    }
                 )
+            except Exception as ex:
+                if new_session:
+                    raise
 
-            # Start keep-alive task to ensure connection is not closed by remote device
-            await self._protocol.start_feedback()
-
-            listener = self.listener
-            if listener:
-                listener.playing(self.playback_info)
-
-            # Start playback
-            await self.rtsp.record()
-
-            await self.rtsp.flush(
-                headers={
-                    "Range": "npt=0-",
-                    "Session": self.context.rtsp_session,
-                    "RTP-Info": (
-                        f"seq={self.context.rtpseq};rtptime={self.context.rtptime}"
-                    ),
-                }
-            )
+                # Receiver might have dropped the session while it was idle, so there
+                # is nothing to tear down
+                assert self._audio_transport
+                self._audio_transport.close()
+                self._audio_transport = None
+                raise SessionLostError("kept session is no longer valid") from ex
 
             if volume:
                 await self.set_volume(pct_to_dbfs(volume))
 
-            await self._stream_data(source, transport)
+            await self._stream_data(
+                source, self._audio_transport, start_time is not None
+            )
+            keep = keep_session
         except (  # pylint: disable=try-except-raise
             exceptions.ProtocolError,
             exceptions.AuthenticationError,
@@ -459,173 +569,313 @@ class StreamClient:
         except Exception as ex:
             raise exceptions.ProtocolError("an error occurred during streaming") from ex
         finally:
+            if self._pending_read:
+                self._pending_read.cancel()
+                await asyncio.gather(self._pending_read, return_exceptions=True)
+                self._pending_read = None
+            self.control_client.stop()
+            self.control_client.report_statistics()
             self._packet_backlog.clear()  # Don't keep old packets around (big!)
-            if transport:
-                # TODO: Teardown should not be done here. In fact, nothing should be
-                # closed here since the connection should be reusable for streaming
-                # more audio files. Refactor when support for that is added.
-                await self.rtsp.teardown(self.context.rtsp_session)
-                transport.close()
-            self._protocol.teardown()
-            self.close()
+            if not keep:
+                try:
+                    await self.end_session()
+                finally:
+                    self.close()
 
             listener = self.listener
             if listener:
                 listener.stopped()
 
-    async def _stream_data(  # pylint: disable=too-many-locals
-        self, source: AudioSource, transport
-    ):
-        stats = Statistics(self.context.sample_rate)
+    async def start_next_track(self, metadata: MediaMetadata, duration: int) -> None:
+        """Announce that audio of a new track is being sent in current stream.
 
-        initial_time = monotonic()
-        self._is_playing = True
-        prev_slow_seqno = None
-        number_slow_seqno = 0
-        while self._is_playing:
-            current_seqno = self.context.rtpseq - 1
+        Used when playing several sources gaplessly, where audio of the next track
+        continues without flushing the receiver.
+        """
+        self._track_start = self.context.position
+        await self._send_metadata(metadata, duration)
+
+    async def _send_metadata(self, metadata: MediaMetadata, duration: int) -> None:
+        # Send progress if supported by receiver
+        if MetadataType.Progress in self._metadata_types:
+            start = self.context.rtptime
+            now = self.context.rtptime
+            end = start + duration * self.context.sample_rate
+            await self.rtsp.set_parameter("progress", f"{start}/{now}/{end}")
+
+        # Apply text metadata if it is supported
+        self._metadata = metadata
+        if MetadataType.Text in self._metadata_types:
+            _LOGGER.debug("Playing with metadata: %s", self.playback_info.metadata)
+            await self.rtsp.set_metadata(
+                self.context.rtsp_session,
+                self.context.rtpseq,
+                self.context.rtptime,
+                self.playback_info.metadata,
+            )
 
-            num_sent = await self._send_packet(
-                source, stats.total_frames == 0, transport
+        # Send artwork if that is supported
+        if (
+            MetadataType.Artwork in self._metadata_types
+            and metadata.artwork is not None
+        ):
+            _LOGGER.debug("Sending %s bytes artwork", len(metadata.artwork))
+            await self.rtsp.set_artwork(
+                self.context.rtsp_session,
+                self.context.rtpseq,
+                self.context.rtptime,
+                metadata.artwork,
             )
-            if num_sent == 0:
-                break
 
-            stats.tick(num_sent)
-            frames_behind = stats.frames_behind
+        listener = self.listener
+        if listener:
+            listener.playing(self.playback_info)
 
-            # If we are late, send some additional frames with hopes of catching up
-            if frames_behind >= FRAMES_PER_PACKET:
-                max_packets = min(
-                    int(frames_behind / FRAMES_PER_PACKET), MAX_PACKETS_COMPENSATE
-                )
-                _LOGGER.debug(
-                    "Compensating with %d packets (%d frames behind)",
-                    max_packets,
-                    frames_behind,
-                )
-                num_sent, has_more_packets = await self._send_number_of_packets(
-                    source, transport, max_packets
-                )
-                stats.tick(num_sent)
-                if not has_more_packets:
-                    break
+    async def end_session(self) -> None:
+        """End streaming session kept by send_audio."""
+        self._packet_ring.release()
+        try:
+            if self._audio_transport:
+                await self.rtsp.teardown(self.context.rtsp_session)
+        finally:
+            if self._audio_transport:
+                self._audio_transport.close()
+                self._audio_transport = None
+            self._protocol.teardown()
 
-            # Log how long it took to send sample_rate amount of frames (should be
-            # one second).
-            if stats.interval_completed:
-                interval_time, interval_frames = stats.new_interval()
-                _LOGGER.debug(
-                    "Sent %d frames in %fs (current frames: %d, expected: %d)",
-                    interval_frames,
-                    interval_time,
-                    stats.total_frames,
-                    stats.expected_frame_count,
+    async def _stream_data(
+        self, source: AudioSource, transport, from_start_time: bool = False
+    ):
+        # When pacing from start time, frames that should already have been sent
+        # (e.g. because setting up the session took some time) are sent as fast as
+        # possible until caught up
+        elapsed = 0.0
+        if from_start_time:
+            elapsed = max(
+                timing.ts2ms(
+                    timing.ntp2ts(timing.ntp_now(), self.context.sample_rate)
+                    - self.context.start_ts,
+                    self.context.sample_rate,
                 )
+                / 1000.0,
+                0.0,
+            )
+            _LOGGER.debug("Starting %fs after start time", elapsed)
 
-            # Calculate the actual absolute position in stream and where we actually
-            # are (from when we initially stared to stream). The diff is the time we
-            # need to sleep until next lap.
-            abs_time_stream = stats.total_frames / self.context.sample_rate
-            rel_to_start = monotonic() - initial_time
-            diff = abs_time_stream - rel_to_start
-            if diff > 0:
-                number_slow_seqno = 0
-                await asyncio.sleep(diff)
-            else:
-                # Increase number of consecutive frames that we are late
-                if prev_slow_seqno == current_seqno - 1:
-                    number_slow_seqno += 1
+        stats = Statistics(self.context.sample_rate, elapsed)
+        scheduler = PacingScheduler(
+            self.context.sample_rate,
+            batch_size=self.settings.protocols.raop.packets_per_batch,
+            max_catch_up=MAX_PACKETS_COMPENSATE,
+            start_ns=stats.start_time_ns,
+        )
+
+        self._is_playing = True
+        if self.settings.protocols.raop.pacing_thread:
+            await self._stream_data_threaded(source, transport, scheduler, stats)
+        else:
+            await self._stream_data_paced(source, transport, scheduler, stats)
+
+        pacing = scheduler.statistics
+        _LOGGER.debug(
+            "Audio finished sending in %fs (lateness mean=%fs, max=%fs, jitter=%fs)",
+            (monotonic_ns() - stats.start_time_ns) / 10**9,
+            pacing.mean_lateness,
+            pacing.max_lateness,
+            pacing.jitter,
+        )
+
+    async def _stream_data_paced(
+        self,
+        source: AudioSource,
+        transport,
+        scheduler: PacingScheduler,
+        stats: "Statistics",
+    ) -> None:
+        # Packets in a batch are sent together when the batch is complete (with one
+        # system call if supported)
+        batch = BatchedDatagramTransport(transport)
+        number_slow_batches = 0
+        has_more_packets = True
+        while self._is_playing and has_more_packets:
+            count = await scheduler.next_batch()
+            num_sent = await self._send_packets(
+                source, batch, count, stats.total_frames == 0
+            )
+            batch.flush()
+            stats.tick(num_sent)
+            has_more_packets = num_sent == count * FRAMES_PER_PACKET
+
+            self._log_interval(stats, scheduler)
+
+            if scheduler.packets_behind > 0:
+                number_slow_batches += 1
 
                 # Log warning if we reached threshold value
-                if number_slow_seqno >= SLOW_WARNING_THRESHOLD:
+                if number_slow_batches >= SLOW_WARNING_THRESHOLD:
                     log_method = _LOGGER.warning
                 else:
                     log_method = _LOGGER.debug
 
                 log_method(
-                    "Too slow to keep up for seqno %d (%f vs %f => %f)",
-                    current_seqno,
-                    abs_time_stream,
-                    rel_to_start,
-                    diff,
+                    "Too slow to keep up at seqno %d (%d packets behind)",
+                    self.context.rtpseq,
+                    scheduler.packets_behind,
                 )
-                prev_slow_seqno = current_seqno
+            else:
+                number_slow_batches = 0
 
-        _LOGGER.debug(
-            "Audio finished sending in %fs",
-            (monotonic_ns() - stats.start_time_ns) / 10**9,
-        )
+    async def _stream_data_threaded(
+        self,
+        source: AudioSource,
+        transport,
+        scheduler: PacingScheduler,
+        stats: "Statistics",
+    ) -> None:
+        # Packets are produced here, a bit ahead of time, and sent by the pacing
+        # thread when they are due
+        sender = ThreadedPacketSender(scheduler, transport)
+        sender.start()
+        try:
+            while self._is_playing:
+                await sender.wait_for_space()
+                num_sent = await self._send_packets(
+                    source, sender, scheduler.batch_size, stats.total_frames == 0
+                )
+                if num_sent == 0:
+                    break
+                stats.tick(num_sent)
+                self._log_interval(stats, scheduler)
 
-    async def _send_packet(
-        self, source: AudioSource, first_packet: bool, transport
+            await sender.drain()
+        finally:
+            sender.close()
+
+    @staticmethod
+    def _log_interval(stats: "Statistics", scheduler: PacingScheduler) -> None:
+        # Log how long it took to send sample_rate amount of frames (should be
+        # one second).
+        if stats.interval_completed:
+            interval_time, interval_frames = stats.new_interval()
+            pacing = scheduler.statistics
+            _LOGGER.debug(
+                "Sent %d frames in %fs (current frames: %d, expected: %d, "
+                "jitter: %fs)",
+                interval_frames,
+                interval_time,
+                stats.total_frames,
+                stats.expected_frame_count,
+                pacing.jitter,
+            )
+
+    async def _send_packets(
+        self, source: AudioSource, transport, count: int, first_packet: bool
     ) -> int:
+        """Send a batch of packets and return number of sent frames."""
+        packets: List[Tuple[int, memoryview, int]] = []
+        for _ in range(count):
+            prepared = await self._prepare_packet(source, first_packet and not packets)
+            if prepared is None:
+                break
+            packets.append(prepared)
+
+        if not packets:
+            return 0
+
+        if transport.is_closing():
+            _LOGGER.warning("Connection closed while streaming audio")
+            return 0
+
+        # Send packets and add them to backlog
+        sent = await self._protocol.send_audio_packets(
+            transport, [(packet, audio_size) for _, packet, audio_size in packets]
+        )
+        for (rtpseq, _, _), packet in zip(packets, sent):
+            self._packet_backlog[rtpseq] = packet
+
+        return len(packets) * FRAMES_PER_PACKET
+
+    async def _read_frames(self, source: AudioSource) -> Optional[bytes]:
+        """Read frames for next packet or return None if source is too slow."""
+        if not self.settings.protocols.raop.silence_on_underrun:
+            return await source.readframes(FRAMES_PER_PACKET)
+
+        # Only wait with a timeout if the read would block, as that is expensive
+        if self._pending_read is None and source.frames_ready(FRAMES_PER_PACKET):
+            return await source.readframes(FRAMES_PER_PACKET)
+
+        # A read that does not finish in time is kept and used for a later packet
+        if self._pending_read is None:
+            self._pending_read = asyncio.ensure_future(
+                source.readframes(FRAMES_PER_PACKET)
+            )
+
+        done, _ = await asyncio.wait((self._pending_read,), timeout=UNDERRUN_TIMEOUT)
+        if not done:
+            return None
+
+        pending_read, self._pending_read = self._pending_read, None
+        return pending_read.result()
+
+    async def _prepare_packet(
+        self, source: AudioSource, first_packet: bool
+    ) -> Optional[Tuple[int, memoryview, int]]:
         # Once all frames in the audio stream have been sent, we are still "latency"
         # behind and will start sending padding (empty audio) until we catch up. This
         # is needed to keep the sync packets in line with real time.
         if self.context.padding_sent >= self.context.latency:
-            return 0
+            return None
 
-        frames = await source.readframes(FRAMES_PER_PACKET)
-        if not frames:
-            # No more frames to send means we send padding packets (just zeros) to keep
-            # sync packets accurate
-            # TODO: Cache empty packet as this is unnecessarily expensive
-            frames = self.context.packet_size * b"\x00"
-            self.context.padding_sent += int(len(frames) / self.context.frame_size)
-        elif len(frames) != self.context.packet_size:
-            # The audio stream length seldom aligns with number of frames per packet,
-            # so pad the last packet with zeros
-            frames += (self.context.packet_size - len(frames)) * b"\x00"
-
-        header = AudioPacketHeader.encode(
+        frames = await self._read_frames(source)
+        if frames is None:
+            # Source is too slow, send silence to not fall behind
+            if self._underrun_packets == 0:
+                _LOGGER.debug("Audio source underrun, inserting silence")
+            self._underrun_packets += 1
+        else:
+            if self._underrun_packets > 0:
+                _LOGGER.debug("Inserted %d silence packets", self._underrun_packets)
+                self._underrun_packets = 0
+
+            if not frames:
+                # No more frames to send means we send padding packets (silence) to
+                # keep sync packets accurate
+                frames = None
+                self.context.padding_sent += FRAMES_PER_PACKET
+
+        # Encode audio directly into the packet, after the header. Silence is encoded
+        # once by the codec and then copied.
+        rtpseq = self.context.rtpseq
+        packet = self._packet_ring.next_slot()
+        payload = packet[AudioPacketHeader.length :]
+        if frames is None:
+            audio_size = self.context.codec.encode_silence_into(payload)
+        else:
+            audio_size = self.context.codec.encode_into(frames, payload)
+
+        AudioPacketHeader.encode_into(
+            packet,
+            0,
             0x80,
             0xE0 if first_packet else 0x60,
-            self.context.rtpseq,
+            rtpseq,
             self.context.rtptime,
             self.rtsp.session_id,
         )
 
-        audio = frames
+        self.context.rtpseq = (rtpseq + 1) % (2**16)
+        self.context.head_ts += FRAMES_PER_PACKET
 
-        if transport.is_closing():
-            _LOGGER.warning("Connection closed while streaming audio")
-            return 0
-
-        # Send packet and add it to backlog
-        rtpseq, packet = await self._protocol.send_audio_packet(
-            transport, header, audio
-        )
-        self._packet_backlog[rtpseq] = packet
-
-        self.context.rtpseq = (self.context.rtpseq + 1) % (2**16)
-        self.context.head_ts += int(len(frames) / self.context.frame_size)
-
-        return int(len(frames) / self.context.frame_size)
-
-    async def _send_number_of_packets(
-        self, source: AudioSource, transport, count: int
-    ) -> Tuple[int, bool]:
-        """Send a specific number of packets.
-
-        Return total number of sent frames and if more frames are available.
-        """
-        total_frames = 0
-        for _ in range(count):
-            sent = await self._send_packet(source, False, transport)
-            total_frames += sent
-            if sent == 0:
-                return total_frames, False
-        return total_frames, True
+        return rtpseq, packet, audio_size
 
 
 class Statistics:
     """Maintains statistics of frames during a streaming session."""
 
-    def __init__(self, sample_rate: int):
+    def __init__(self, sample_rate: int, elapsed: float = 0.0):
         """Initialize a new Statistics instance."""
         self.sample_rate: int = sample_rate
-        self.start_time_ns: int = monotonic_ns()
+        self.start_time_ns: int = monotonic_ns() - int(elapsed * 10**9)
         self.interval_time: float = monotonic()
         self.total_frames: int = 0
         self.interval_frames: int = 0
@@ -635,11 +885,6 @@ class Statistics:
         """Number of frames expected to be sent at current time."""
         return int((monotonic_ns() - self.start_time_ns) / (10**9 / self.sample_rate))
 
-    @property
-    def frames_behind(self) -> int:
-        """Number of frames behind until being in sync."""
-        return self.expected_frame_count - self.total_frames
-
     @property
     def interval_completed(self) -> bool:
         """Return if an interval has completed.
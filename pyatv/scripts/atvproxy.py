@@ -519,9 +519,9 @@ class AirPlayChannelAppleTVProxy(AbstractHAPChannel):
             return
 
         if self.buffer:
-            _LOGGER.debug("%s received from Client: %s", self.name, self.buffer)
-            self.local_buffer += self.buffer
-            self.buffer = b""
+            data = self.buffer.read()
+            _LOGGER.debug("%s received from Client: %s", self.name, data)
+            self.local_buffer += data
 
         while self.local_buffer:
             to_remote, self.local_buffer = self.process_buffer(self.local_buffer)
@@ -590,9 +590,7 @@ class AirPlayChannelAppleTVForwarder(AbstractHAPChannel):
 
     def handle_received(self) -> None:
         """Handle received data that was put in buffer."""
-        self.buffer: bytes
-        self.channel_proxy.remote_received(self.buffer)
-        self.buffer = b""
+        self.channel_proxy.remote_received(self.buffer.read())
 
 
 # pylint: disable-next=too-many-ancestors
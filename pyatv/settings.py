@@ -72,6 +72,26 @@ class MrpTunnel(str, Enum):
     """Fully disable set up of MRP tunnel."""
 
 
+class AudioCodec(str, Enum):
+    """Audio codec used when streaming audio."""
+
+    PCM = "pcm"
+    """Send uncompressed audio (L16)."""
+
+    ALAC = "alac"
+    """Encode audio with Apple Lossless (if supported by receiver)."""
+
+
+class ResampleQuality(str, Enum):
+    """Quality used when converting sample rate of decoded audio."""
+
+    Fast = "fast"
+    """Linear interpolation (low CPU usage)."""
+
+    High = "high"
+    """Windowed sinc interpolation (requires NumPy, otherwise fast is used)."""
+
+
 # pylint: enable=invalid-name
 
 
@@ -161,6 +181,48 @@ class RaopSettings(BaseModel, extra="ignore"):  # type: ignore[call-arg]
     Set to 0 to use random free port.
     """
 
+    audio_codec: AudioCodec = AudioCodec.PCM
+    """Codec used to encode audio sent to receiver.
+
+    ALAC (Apple Lossless) roughly halves the bandwidth needed compared to PCM, but
+    requires more CPU. PCM is used as fallback if the receiver does not support ALAC.
+    """
+
+    packets_per_batch: int = 1
+    """Number of audio packets sent each time packets are sent.
+
+    Sending packets in batches means fewer wakeups (less CPU), but makes traffic a bit
+    more bursty.
+    """
+
+    pacing_thread: bool = False
+    """Send audio packets from a separate thread with its own event loop.
+
+    Packets are then sent on time even if the event loop is busy with other tasks, at
+    the expense of one extra thread per stream.
+    """
+
+    encryption_thread: bool = False
+    """Encrypt audio packets in a separate thread (AirPlay 2 only).
+
+    Keeps the event loop free from encryption work, which helps when streaming to many
+    devices at once.
+    """
+
+    silence_on_underrun: bool = False
+    """Send silence when audio source cannot deliver audio in time.
+
+    Instead of waiting for a slow source (e.g. a stream over a bad network), silence is
+    sent to keep the receiver in sync. Audio is delayed by the inserted silence.
+    """
+
+    resample_quality: ResampleQuality = ResampleQuality.Fast
+    """Quality used when converting shared audio to the format of a receiver.
+
+    Applies to audio shared between receivers (AudioFanout) when a receiver requires
+    another sample rate, number of channels or sample size than the decoded audio.
+    """
+
 
 class ProtocolSettings(BaseModel, extra="ignore"):  # type: ignore[call-arg]
     """Container for protocol specific settings."""
@@ -9,8 +9,6 @@ BUFFER_SIZE = 8192
 HEADROOM_SIZE = 1024
 
 
-# This class could potentially be heavily optimized using memoryview (or bitarray). But
-# kept simple for now.
 class SemiSeekableBuffer:
     """Implementation of a "semi-seekable" buffer.
 
@@ -48,6 +46,9 @@ class SemiSeekableBuffer:
     Protected headroom can only be enabled/disabled when position is 0, i.e. it
     cannot be enabled if data has been read nor can it be disabled before seeking to
     the beginning again.
+
+    Data is stored in a preallocated ring buffer, so adding and reading data only
+    copies the data that is added or read (not the rest of the buffer).
     """
 
     def __init__(
@@ -62,7 +63,10 @@ class SemiSeekableBuffer:
         if seekable_headroom > buffer_size:
             raise ValueError("too large seekable headroom")
 
-        self._buffer: bytes = b""
+        self._buffer: bytearray = bytearray(buffer_size)
+        self._view: memoryview = memoryview(self._buffer)
+        self._start: int = 0  # Index of first byte kept in ring
+        self._length: int = 0  # Number of bytes kept in ring (including headroom)
         self._buffer_size: int = buffer_size
         self._headroom: int = seekable_headroom
         self._position: int = 0
@@ -76,13 +80,18 @@ class SemiSeekableBuffer:
     @property
     def size(self) -> int:
         """Return number of bytes in buffer."""
-        return len(self._buffer) - (self._position if self._has_headroom_data else 0)
+        return self._length - (self._position if self._has_headroom_data else 0)
 
     @property
     def remaining(self) -> int:
         """Return remaining bytes in buffer."""
         return self._buffer_size - self.size
 
+    @property
+    def free(self) -> int:
+        """Return number of bytes that can be added to buffer."""
+        return self._buffer_size - self._length
+
     @property
     def position(self) -> int:
         """Return absolute position of bytes read from buffer.
@@ -109,13 +118,20 @@ class SemiSeekableBuffer:
 
         self._protected = protected
 
-    def add(self, data: bytes) -> int:
+    def add(self, data: Union[bytes, bytearray, memoryview]) -> int:
         """Add data to buffer.
 
         Returns number of bytes added to buffer.
         """
-        room_in_buffer = min(len(data), self._buffer_size - len(self._buffer))
-        self._buffer += data[0:room_in_buffer]
+        data = memoryview(data).cast("B")
+        room_in_buffer = min(len(data), self._buffer_size - self._length)
+
+        # Data is written after last byte, wrapping around to beginning of ring
+        end = (self._start + self._length) % self._buffer_size
+        first_part = min(room_in_buffer, self._buffer_size - end)
+        self._view[end : end + first_part] = data[0:first_part]
+        self._view[0 : room_in_buffer - first_part] = data[first_part:room_in_buffer]
+        self._length += room_in_buffer
         return room_in_buffer
 
     def get(self, number_of_bytes: int) -> bytes:
@@ -123,13 +139,20 @@ class SemiSeekableBuffer:
 
         Will return b"" if buffer is empty.
         """
+        return bytes(self.get_view(number_of_bytes))
+
+    def get_view(self, number_of_bytes: int) -> Union[bytes, memoryview]:
+        """Retrieve data from buffer without copying it (if possible).
+
+        Returned data is only valid until data is added to the buffer again. Data is
+        copied if it wraps around the end of the internal buffer.
+        """
         # Use position as offset in case we have (potentially read but kept) headroom
-        if self._has_headroom_data:
-            data = self._buffer[self._position : self._position + number_of_bytes]
-        else:
-            data = self._buffer[0:number_of_bytes]
+        offset = self._position if self._has_headroom_data else 0
+        count = max(min(number_of_bytes, self._length - offset), 0)
+        data = self._slice(offset, count)
 
-        self._position += len(data)
+        self._position += count
 
         # Treat entire buffer as headroom in case it's protected and do not remove
         # any data
@@ -139,12 +162,28 @@ class SemiSeekableBuffer:
                 # data we read)
                 if self._position >= self._headroom:
                     self._has_headroom_data = False
-                    self._buffer = self._buffer[self._position :]
+                    self._discard(self._position)
             else:
-                self._buffer = self._buffer[len(data) :]
+                self._discard(count)
 
         return data
 
+    def _slice(self, offset: int, count: int) -> Union[bytes, memoryview]:
+        index = (self._start + offset) % self._buffer_size
+        if index + count <= self._buffer_size:
+            return self._view[index : index + count]
+
+        first_part = self._buffer_size - index
+        return b"".join((self._view[index:], self._view[0 : count - first_part]))
+
+    def _discard(self, count: int) -> None:
+        self._length -= count
+        if self._length == 0:
+            # Start from beginning when empty, making data less likely to wrap
+            self._start = 0
+        else:
+            self._start = (self._start + count) % self._buffer_size
+
     def seek(self, position: int) -> bool:
         """Seek to absolute position in buffer.
 
@@ -165,7 +204,7 @@ class SemiSeekableBuffer:
             return False
 
         # There must be data in buffer for seeking to work
-        headroom_data_in_buffer = min(self._headroom, len(self._buffer))
+        headroom_data_in_buffer = min(self._headroom, self._length)
         if position > (headroom_data_in_buffer - 1):
             return False
 
@@ -178,7 +217,7 @@ class SemiSeekableBuffer:
         This method is purely for convenience.
         """
         in_size = len(data) if isinstance(data, bytes) else data
-        return (len(self._buffer) + in_size) <= self._buffer_size
+        return (self._length + in_size) <= self._buffer_size
 
     def __len__(self) -> int:
         """Return number of bytes in buffer."""
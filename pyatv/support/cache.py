@@ -4,11 +4,17 @@ from collections import OrderedDict
 
 
 class Cache:
-    """Implementation of simple LRU cache."""
+    """Implementation of simple LRU cache.
 
-    def __init__(self, limit=16):
+    Besides limiting number of items, total size of all items can be limited by setting
+    max_size. Size of an item is determined by len(item).
+    """
+
+    def __init__(self, limit=16, max_size=None):
         """Initialize a new Cache instance."""
         self.limit = limit
+        self.max_size = max_size
+        self.size = 0
         self.data = OrderedDict()
 
     def empty(self):
@@ -16,14 +22,30 @@ class Cache:
         return not self.data
 
     def put(self, identifier, data):
-        """Put something in the cache."""
-        try:
-            self.data.pop(identifier)
-        except KeyError:
-            if len(self.data) >= self.limit:
-                self.data.popitem(last=False)
-        finally:
-            self.data[identifier] = data
+        """Put something in the cache.
+
+        Returns False if item is larger than max_size and was not put in the cache.
+        """
+        if identifier in self.data:
+            self._remove(identifier)
+
+        if self.max_size is not None:
+            if len(data) > self.max_size:
+                return False
+            while self.data and self.size + len(data) > self.max_size:
+                self._remove(next(iter(self.data)))
+            self.size += len(data)
+
+        if len(self.data) >= self.limit:
+            self._remove(next(iter(self.data)))
+
+        self.data[identifier] = data
+        return True
+
+    def _remove(self, identifier):
+        data = self.data.pop(identifier)
+        if self.max_size is not None:
+            self.size -= len(data)
 
     def get(self, identifier):
         """Get something from the cache."""
@@ -1,24 +1,31 @@
 """Transparent encryption layer using Chacha20_Poly1305."""
 
-from functools import partial
 from struct import Struct
-from typing import Optional
+from typing import List, Optional, Sequence
 
 from chacha20poly1305_reuseable import ChaCha20Poly1305Reusable as ChaCha20Poly1305
 
 NONCE_LENGTH = 12
 
+# Counter packed as little endian into the nonce, padded with leading zeros
+_NONCE_8_BYTES = Struct("<4xQ")
+_NONCE_12_BYTES = Struct("<QL")
+
 
 class Chacha20Cipher:
     """CHACHA20 encryption/decryption layer."""
 
     def __init__(self, out_key: bytes, in_key: bytes, nonce_length: int = 8) -> None:
         """Initialize a new Chacha20Cipher."""
+        if not 0 < nonce_length <= NONCE_LENGTH:
+            raise ValueError(f"invalid nonce length: {nonce_length}")
         self._enc_out = ChaCha20Poly1305(out_key)
         self._enc_in = ChaCha20Poly1305(in_key)
         self._out_counter = 0
         self._in_counter = 0
         self._nonce_length = nonce_length
+        self._out_nonce = bytearray(NONCE_LENGTH)
+        self._in_nonce = bytearray(NONCE_LENGTH)
 
     @property
     def out_nonce(self) -> bytes:
@@ -27,11 +34,14 @@ class Chacha20Cipher:
         This is the nonce that will be used by encrypt in the _next_ call if no custom
         nonce is specified.
         """
-        nonce_length = self._nonce_length
-        nonce = self._out_counter.to_bytes(length=nonce_length, byteorder="little")
-        if nonce_length != NONCE_LENGTH:
-            return self._pad_nonce(nonce)
-        return nonce
+        nonce = bytearray(NONCE_LENGTH)
+        self._pack_nonce(nonce, self._out_counter)
+        return bytes(nonce)
+
+    @property
+    def out_counter(self) -> int:
+        """Return counter used for nonce by next encrypt."""
+        return self._out_counter
 
     @property
     def in_nonce(self) -> bytes:
@@ -40,23 +50,43 @@ class Chacha20Cipher:
         This is the nonce that will be used by decrypt in the _next_ call if no custom
         nonce is specified.
         """
-        nonce_length = self._nonce_length
-        nonce = self._in_counter.to_bytes(length=nonce_length, byteorder="little")
-        if nonce_length != NONCE_LENGTH:
-            return self._pad_nonce(nonce)
-        return nonce
+        nonce = bytearray(NONCE_LENGTH)
+        self._pack_nonce(nonce, self._in_counter)
+        return bytes(nonce)
+
+    def _pack_nonce(self, nonce: bytearray, counter: int) -> None:
+        """Pack counter into a 12 byte nonce buffer."""
+        if self._nonce_length == 8:
+            _NONCE_8_BYTES.pack_into(nonce, 0, counter)
+        elif self._nonce_length == NONCE_LENGTH:
+            _NONCE_12_BYTES.pack_into(
+                nonce, 0, counter & 0xFFFFFFFFFFFFFFFF, counter >> 64
+            )
+        else:
+            nonce[:] = self._pad_nonce(
+                counter.to_bytes(length=self._nonce_length, byteorder="little")
+            )
 
     def _pad_nonce(self, nonce: bytes) -> bytes:
         """Pad nonce to 12 bytes."""
         return b"\x00" * (NONCE_LENGTH - len(nonce)) + nonce
 
+    def _next_out_nonce(self) -> bytearray:
+        self._pack_nonce(self._out_nonce, self._out_counter)
+        self._out_counter += 1
+        return self._out_nonce
+
+    def _next_in_nonce(self) -> bytearray:
+        self._pack_nonce(self._in_nonce, self._in_counter)
+        self._in_counter += 1
+        return self._in_nonce
+
     def encrypt(
         self, data: bytes, nonce: Optional[bytes] = None, aad: Optional[bytes] = None
     ) -> bytes:
         """Encrypt data with counter or specified nonce."""
         if nonce is None:
-            nonce = self.out_nonce
-            self._out_counter += 1
+            nonce = self._next_out_nonce()
         elif len(nonce) < NONCE_LENGTH:
             nonce = self._pad_nonce(nonce)
         return self._enc_out.encrypt(nonce, data, aad)
@@ -66,14 +96,62 @@ class Chacha20Cipher:
     ) -> bytes:
         """Decrypt data with counter or specified nonce."""
         if nonce is None:
-            nonce = self.in_nonce
-            self._in_counter += 1
+            nonce = self._next_in_nonce()
         elif len(nonce) < NONCE_LENGTH:
             nonce = self._pad_nonce(nonce)
         return self._enc_in.decrypt(nonce, data, aad)
 
+    def encrypt_into(
+        self, data: bytes, output: bytearray, aad: Optional[bytes] = None
+    ) -> int:
+        """Encrypt data with counter, append it to a buffer and return its size."""
+        encrypted = self._enc_out.encrypt(self._next_out_nonce(), data, aad)
+        output += encrypted
+        return len(encrypted)
+
+    def decrypt_into(
+        self, data: bytes, output: bytearray, aad: Optional[bytes] = None
+    ) -> int:
+        """Decrypt data with counter, append it to a buffer and return its size."""
+        decrypted = self._enc_in.decrypt(self._next_in_nonce(), data, aad)
+        output += decrypted
+        return len(decrypted)
+
+    def encrypt_many(
+        self, messages: Sequence[bytes], aads: Optional[Sequence[bytes]] = None
+    ) -> List[bytes]:
+        """Encrypt several messages with consecutive counter values.
+
+        If specified, aads contains additional authenticated data for each message.
+        """
+        if aads is not None and len(aads) != len(messages):
+            raise ValueError("number of messages and aads differ")
+
+        encrypt = self._enc_out.encrypt
+        next_nonce = self._next_out_nonce
+        if aads is None:
+            return [encrypt(next_nonce(), message, None) for message in messages]
+        return [
+            encrypt(next_nonce(), message, aad) for message, aad in zip(messages, aads)
+        ]
+
+    def decrypt_many(
+        self, messages: Sequence[bytes], aads: Optional[Sequence[bytes]] = None
+    ) -> List[bytes]:
+        """Decrypt several messages with consecutive counter values.
+
+        If specified, aads contains additional authenticated data for each message.
+        """
+        if aads is not None and len(aads) != len(messages):
+            raise ValueError("number of messages and aads differ")
 
-_PACK_NONCE_WITH_4_BYTE_PAD = partial(Struct("<LQ").pack, 0)
+        decrypt = self._enc_in.decrypt
+        next_nonce = self._next_in_nonce
+        if aads is None:
+            return [decrypt(next_nonce(), message, None) for message in messages]
+        return [
+            decrypt(next_nonce(), message, aad) for message, aad in zip(messages, aads)
+        ]
 
 
 class Chacha20Cipher8byteNonce(Chacha20Cipher):
@@ -86,21 +164,3 @@ class Chacha20Cipher8byteNonce(Chacha20Cipher):
     def __init__(self, out_key: bytes, in_key: bytes) -> None:
         """Initialize a new Chacha20Cipher8byteNonce."""
         super().__init__(out_key, in_key, nonce_length=8)
-
-    @property
-    def out_nonce(self) -> bytes:
-        """Return next encrypt nonce.
-
-        This is the nonce that will be used by encrypt in the _next_ call if no custom
-        nonce is specified.
-        """
-        return _PACK_NONCE_WITH_4_BYTE_PAD(self._out_counter)
-
-    @property
-    def in_nonce(self) -> bytes:
-        """Return next decrypt nonce.
-
-        This is the nonce that will be used by decrypt in the _next_ call if no custom
-        nonce is specified.
-        """
-        return _PACK_NONCE_WITH_4_BYTE_PAD(self._in_counter)
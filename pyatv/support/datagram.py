@@ -0,0 +1,210 @@
+"""Sending of datagrams in batches."""
+
+import asyncio
+import ctypes
+import errno
+import logging
+import os
+import socket
+import sys
+from typing import Any, Callable, List, Optional, Sequence, Union
+
+_LOGGER = logging.getLogger(__name__)
+
+# Maximum number of datagrams sent with one system call (UIO_MAXIOV on Linux)
+MAX_BATCH_SIZE = 1024
+
+# Errors meaning that the socket buffer is full (i.e. try again later)
+_WOULD_BLOCK = (errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOBUFS, errno.EINTR)
+
+Datagram = Union[bytes, bytearray, memoryview]
+
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IoVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_sendmmsg() -> Optional[Any]:
+    if not sys.platform.startswith("linux"):
+        return None
+
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        func = libc.sendmmsg
+    except (OSError, AttributeError):  # pragma: no cover
+        return None
+
+    func.argtypes = [
+        ctypes.c_int,
+        ctypes.POINTER(_MMsgHdr),
+        ctypes.c_uint,
+        ctypes.c_int,
+    ]
+    func.restype = ctypes.c_int
+    return func
+
+
+_sendmmsg = _load_sendmmsg()
+
+
+def has_sendmmsg() -> bool:
+    """Return if sendmmsg is supported on this platform."""
+    return _sendmmsg is not None
+
+
+def _buffer_address(data: Datagram, keep_alive: List[Any]) -> int:
+    try:
+        buffer = (ctypes.c_char * len(data)).from_buffer(data)  # type: ignore
+    except TypeError:
+        # Read-only buffer, so a copy is needed (from_buffer requires writable data)
+        buffer = ctypes.create_string_buffer(bytes(data), len(data))
+    keep_alive.append(buffer)
+    return ctypes.addressof(buffer)
+
+
+def sendmmsg(fd: int, datagrams: Sequence[Datagram]) -> int:
+    """Send datagrams on a connected socket with one system call.
+
+    Returns number of datagrams sent, which may be less than the number of datagrams
+    passed. Raises OSError on errors and NotImplementedError if not supported.
+    """
+    if _sendmmsg is None:
+        raise NotImplementedError("sendmmsg is not supported")
+
+    count = min(len(datagrams), MAX_BATCH_SIZE)
+    if count == 0:
+        return 0
+
+    keep_alive: List[Any] = []
+    iovecs = (_IoVec * count)()
+    messages = (_MMsgHdr * count)()
+    for i in range(count):
+        datagram = memoryview(datagrams[i]).cast("B")
+        if datagram.nbytes > 0:
+            iovecs[i].iov_base = _buffer_address(datagram, keep_alive)
+        iovecs[i].iov_len = datagram.nbytes
+        messages[i].msg_hdr.msg_iov = ctypes.pointer(iovecs[i])
+        messages[i].msg_hdr.msg_iovlen = 1
+
+    # Buffers in keep_alive must stay alive until the call has returned
+    sent = _sendmmsg(fd, messages, count, 0)
+    if sent < 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error))
+    return sent
+
+
+def _sendmmsg_all(fd: int, datagrams: Sequence[Datagram]) -> int:
+    # Send as many datagrams as possible, until socket buffer is full
+    sent = 0
+    try:
+        while sent < len(datagrams):
+            count = sendmmsg(fd, datagrams[sent:])
+            if count == 0:
+                break
+            sent += count
+    except OSError as ex:
+        if ex.errno not in _WOULD_BLOCK:
+            raise
+    return sent
+
+
+def send_datagrams(sock: socket.socket, datagrams: Sequence[Datagram]) -> int:
+    """Send datagrams on a connected socket, using sendmmsg if possible.
+
+    Returns number of datagrams sent, which is less than the number of datagrams
+    passed if the socket is non-blocking and its buffer is full.
+    """
+    sent = 0
+    if _sendmmsg is not None and len(datagrams) > 1:
+        try:
+            sent = _sendmmsg_all(sock.fileno(), datagrams)
+        except OSError as ex:
+            _LOGGER.debug("sendmmsg failed, falling back to send: %s", ex)
+
+    for datagram in datagrams[sent:]:
+        try:
+            sock.send(datagram)
+        except OSError as ex:
+            if ex.errno not in _WOULD_BLOCK:
+                raise
+            break
+        sent += 1
+    return sent
+
+
+class BatchedDatagramTransport:
+    """Collect datagrams sent to a connected transport and send them in batches.
+
+    Datagrams are queued by sendto and sent when calling flush (or when
+    MAX_BATCH_SIZE datagrams are queued). The sendmmsg system call is used if
+    supported, otherwise datagrams are sent one by one via the transport. Datagrams
+    must not be modified until they have been sent.
+    """
+
+    def __init__(self, transport: asyncio.DatagramTransport) -> None:
+        """Initialize a new BatchedDatagramTransport instance."""
+        self.transport = transport
+        self._datagrams: List[Datagram] = []
+        self._fd: Optional[int] = None
+        self._buffer_size: Callable[[], int] = getattr(
+            transport, "get_write_buffer_size", lambda: 0
+        )
+        sock = transport.get_extra_info("socket")
+        if _sendmmsg is not None and sock is not None:
+            self._fd = sock.fileno()
+
+    @property
+    def batching(self) -> bool:
+        """Return if datagrams are sent with sendmmsg."""
+        return self._fd is not None
+
+    def is_closing(self) -> bool:
+        """Return if underlying transport is closing."""
+        return self.transport.is_closing()
+
+    def sendto(self, data: Datagram, addr=None) -> None:
+        """Queue a datagram to be sent by next flush."""
+        self._datagrams.append(data)
+        if len(self._datagrams) >= MAX_BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Send all queued datagrams."""
+        datagrams, self._datagrams = self._datagrams, []
+
+        # Datagrams are sent directly on the socket, bypassing the transport. This
+        # can only be done when the transport has nothing buffered, otherwise
+        # datagrams would be sent out of order.
+        sent = 0
+        if (
+            self._fd is not None
+            and len(datagrams) > 1
+            and not self.transport.is_closing()
+            and self._buffer_size() == 0
+        ):
+            try:
+                sent = _sendmmsg_all(self._fd, datagrams)
+            except OSError as ex:
+                _LOGGER.debug("Disabling sendmmsg: %s", ex)
+                self._fd = None
+
+        # Anything not sent goes via the transport (which buffers if needed)
+        for datagram in datagrams[sent:]:
+            self.transport.sendto(datagram)
@@ -0,0 +1,129 @@
+"""Buffer for extracting frames from a stream of received data."""
+
+from typing import Optional
+
+# Do not compact buffer until at least this many bytes have been read
+COMPACT_THRESHOLD = 4096
+
+
+class FrameBuffer:
+    """Buffer received data and read frames from it."""
+
+    def __init__(self, compact_threshold: int = COMPACT_THRESHOLD) -> None:
+        """Initialize a new FrameBuffer instance."""
+        if compact_threshold < 0:
+            raise ValueError(f"invalid compact threshold: {compact_threshold}")
+        self._data: bytearray = bytearray()
+        self._offset: int = 0
+        self._compact_threshold = compact_threshold
+
+    def __len__(self) -> int:
+        """Return number of bytes not read yet."""
+        return len(self._data) - self._offset
+
+    def append(self, data: bytes) -> None:
+        """Add received data to end of buffer."""
+        self._data += data
+
+    def clear(self) -> None:
+        """Remove all data from buffer."""
+        self._data.clear()
+        self._offset = 0
+
+    def peek(self, size: Optional[int] = None) -> bytes:
+        """Return data (at most size bytes) without consuming it."""
+        end = len(self._data) if size is None else self._offset + size
+        return bytes(self._data[self._offset : end])
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        """Read and consume data (at most size bytes)."""
+        data = self.peek(size)
+        self.skip(len(data))
+        return data
+
+    def skip(self, size: int) -> None:
+        """Consume data without reading it."""
+        self._offset = min(self._offset + size, len(self._data))
+        if self._offset == len(self._data):
+            self.clear()
+        elif (
+            self._offset >= self._compact_threshold
+            and self._offset >= len(self._data) // 2
+        ):
+            del self._data[0 : self._offset]
+            self._offset = 0
+
+    def read_variant_frame(self) -> Optional[bytes]:
+        """Read frame prefixed with its length as a protobuf variant.
+
+        Only the frame (without length) is returned. None is returned if the entire
+        frame has not been received yet.
+        """
+        length = 0
+        for index in range(self._offset, min(self._offset + 10, len(self._data))):
+            value = self._data[index]
+            length |= (value & 0x7F) << (7 * (index - self._offset))
+            if not value & 0x80:
+                start = index + 1
+                break
+        else:
+            if len(self) >= 10:
+                raise ValueError("invalid variant")
+            return None
+
+        if len(self._data) < start + length:
+            return None
+
+        frame = bytes(self._data[start : start + length])
+        self.skip(start + length - self._offset)
+        return frame
+
+    def read_frame(
+        self,
+        header_length: int,
+        length_offset: int = 0,
+        length_size: Optional[int] = None,
+        includes_header: bool = False,
+    ) -> Optional[bytes]:
+        """Read frame with a header containing length of frame.
+
+        Length is a big endian integer at length_offset in the header (until end of
+        header unless length_size is given). If includes_header is False, length is
+        length of data following the header. The entire frame (including header) is
+        returned or None if it has not been received yet.
+        """
+        if len(self) < header_length:
+            return None
+
+        start = self._offset + length_offset
+        end = (
+            self._offset + header_length if length_size is None else start + length_size
+        )
+        frame_length = int.from_bytes(self._data[start:end], byteorder="big")
+        if not includes_header:
+            frame_length += header_length
+        frame_length = max(frame_length, header_length)
+        if len(self) < frame_length:
+            return None
+        return self.read(frame_length)
+
+    def read_http_frame(self) -> Optional[bytes]:
+        """Read frame containing an HTTP message (start line, headers and body).
+
+        Length of body is taken from the Content-Length header. None is returned if
+        the entire message has not been received yet.
+        """
+        header_end = self._data.find(b"\r\n\r\n", self._offset)
+        if header_end == -1:
+            return None
+        header_end += 4
+
+        content_length = 0
+        for line in bytes(self._data[self._offset : header_end]).split(b"\r\n"):
+            key, _, value = line.partition(b":")
+            if key.strip().lower() == b"content-length":
+                content_length = int(value)
+
+        if len(self._data) < header_end + content_length:
+            return None
+        return self.read(header_end + content_length - self._offset)
@@ -7,24 +7,28 @@ import struct
 def defpacket(name: str, **kwargs):
     """Define a protocol packet."""
     fmt: str = ">" + "".join(kwargs.values())
+    packer = struct.Struct(fmt)
     msg_type = namedtuple(name, kwargs.keys())  # type: ignore
 
     class _MessageType:
-        length = struct.calcsize(fmt)
+        length = packer.size
 
         @staticmethod
         def decode(data: bytes, allow_excessive=False):
             """Decode binary data as message."""
             return msg_type._make(
-                struct.unpack(
-                    fmt, data if not allow_excessive else data[0 : struct.calcsize(fmt)]
-                )
+                packer.unpack(data if not allow_excessive else data[0 : packer.size])
             )
 
         @staticmethod
         def encode(*args) -> bytes:
             """Encode a message into binary data."""
-            return struct.pack(fmt, *args)
+            return packer.pack(*args)
+
+        @staticmethod
+        def encode_into(buffer, offset: int, *args) -> None:
+            """Encode a message into a writable buffer at offset."""
+            packer.pack_into(buffer, offset, *args)
 
         @staticmethod
         def extend(ext_name, **ext_kwargs):
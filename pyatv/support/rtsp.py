@@ -19,6 +19,9 @@ from pyatv.support.metadata import MediaMetadata
 _LOGGER = logging.getLogger(__name__)
 
 FRAMES_PER_PACKET = 352
+
+# Audio format announced unless specified otherwise (actual format is in fmtp)
+DEFAULT_RTPMAP = "L16/44100/2"
 USER_AGENT = "AirPlay/550.10"
 HTTP_PROTOCOL = "HTTP/1.1"
 
@@ -29,7 +32,7 @@ ANNOUNCE_PAYLOAD = (
     + "c=IN IP4 {remote_ip}\r\n"
     + "t=0 0\r\n"
     + "m=audio 0 RTP/AVP 96\r\n"
-    + "a=rtpmap:96 L16/44100/2\r\n"
+    + "a=rtpmap:96 {rtpmap}\r\n"
     + f"a=fmtp:96 {FRAMES_PER_PACKET} 0 "
     + "{bits_per_channel} 40 10 14 {channels} 255 0 0 {sample_rate}\r\n"
 )
@@ -132,9 +135,11 @@ class RtspSession:
         channels: int,
         sample_rate: int,
         password: Optional[str],
+        rtpmap: str = DEFAULT_RTPMAP,
     ) -> HttpResponse:
         """Send ANNOUNCE message."""
         body = ANNOUNCE_PAYLOAD.format(
+            rtpmap=rtpmap,
             session_id=self.session_id,
             local_ip=self.connection.local_ip,
             remote_ip=self.connection.remote_ip,
@@ -0,0 +1,79 @@
+"""Unit tests for pyatv.auth.hap_session."""
+
+from cryptography.exceptions import InvalidTag
+import pytest
+
+from pyatv.auth.hap_session import HAPSession
+
+KEY1 = 32 * b"\x01"
+KEY2 = 32 * b"\x02"
+
+# Spans several frames with a partial frame at the end
+DATA = bytes(range(256)) * 10
+
+
+@pytest.fixture(name="sender")
+def sender_fixture():
+    session = HAPSession()
+    session.enable(KEY1, KEY2)
+    yield session
+
+
+@pytest.fixture(name="receiver")
+def receiver_fixture():
+    session = HAPSession()
+    session.enable(KEY2, KEY1)
+    yield session
+
+
+def test_passthrough_when_not_enabled():
+    session = HAPSession()
+    assert session.encrypt(DATA) == DATA
+    assert session.decrypt(DATA) == DATA
+    assert session.encrypted_size(len(DATA)) == len(DATA)
+
+
+def test_encrypt_in_frames(sender):
+    encrypted = sender.encrypt(DATA)
+
+    assert encrypted[0:2] == HAPSession.FRAME_LENGTH.to_bytes(2, "little")
+    assert len(encrypted) == sender.encrypted_size(len(DATA))
+    assert len(encrypted) == len(DATA) + 3 * (2 + HAPSession.AUTH_TAG_LENGTH)
+
+
+def test_encrypt_and_decrypt(sender, receiver):
+    assert receiver.decrypt(sender.encrypt(DATA)) == DATA
+
+
+def test_decrypt_partial_data(sender, receiver):
+    encrypted = sender.encrypt(DATA)
+
+    decrypted = b""
+    for i in range(0, len(encrypted), 100):
+        decrypted += receiver.decrypt(encrypted[i : i + 100])
+    assert decrypted == DATA
+
+
+def test_failed_decrypt_releases_buffer(sender, receiver):
+    encrypted = bytearray(sender.encrypt(DATA))
+    encrypted[-1] ^= 0xFF
+
+    # Traceback (and thus local variables of decrypt) is kept alive by exc_info
+    with pytest.raises(InvalidTag) as exc_info:
+        receiver.decrypt(bytes(encrypted))
+
+    # Data of failed blocks is dropped and the buffer is not locked by views
+    assert receiver.decrypt(b"\x00") == b""
+    assert exc_info.traceback
+
+
+def test_encrypt_several_messages_into_buffer(sender, receiver):
+    output = bytearray()
+    sender.encrypt_into(b"first", output)
+    sender.encrypt_into(DATA, output)
+
+    assert receiver.decrypt(bytes(output)) == b"first" + DATA
+
+
+def test_encrypt_empty_data(sender):
+    assert sender.encrypt(b"") == b""
@@ -0,0 +1,82 @@
+"""Unit tests for pyatv.auth.hap_srp."""
+
+import asyncio
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+import pytest
+
+from pyatv.auth import hap_srp
+from pyatv.auth.hap_pairing import HapCredentials
+from pyatv.auth.hap_srp import EphemeralKeyPool, SRPAuthHandler, load_long_term_keys
+
+pytestmark = pytest.mark.asyncio
+
+
+def raw_bytes(key) -> bytes:
+    if isinstance(key, Ed25519PrivateKey):
+        key = key.public_key()
+    return key.public_bytes(
+        encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw
+    )
+
+
+async def test_invalid_pool_size():
+    with pytest.raises(ValueError):
+        EphemeralKeyPool(-1)
+
+
+async def test_pool_generates_keys_when_empty():
+    pool = EphemeralKeyPool(0)
+    first = pool.get()
+    second = pool.get()
+    assert raw_bytes(first[0]) != raw_bytes(second[0])
+    assert len(pool) == 0
+
+
+async def test_pool_refills_in_background():
+    pool = EphemeralKeyPool(2)
+    pool.get()
+    assert len(pool) == 0
+
+    await asyncio.sleep(0)
+    assert len(pool) == 2
+
+
+async def test_pool_returns_precomputed_keys():
+    pool = EphemeralKeyPool(1)
+    pool.fill()
+    keys = pool._keys[0]
+    assert pool.get() is keys
+
+
+async def test_initialize_takes_keys_from_pool():
+    pool = EphemeralKeyPool(1)
+    pool.fill()
+    signing_key, verify_key = pool._keys[0]
+
+    auth_public, verify_public = SRPAuthHandler(pool).initialize()
+
+    assert auth_public == raw_bytes(signing_key)
+    assert verify_public == raw_bytes(verify_key.public_key())
+
+
+async def test_long_term_keys_cached_per_credentials():
+    ltsk = Ed25519PrivateKey.generate()
+    ltpk = raw_bytes(Ed25519PrivateKey.generate())
+    credentials = HapCredentials(
+        ltpk, ltsk.private_bytes_raw(), b"atv_id", b"client_id"
+    )
+
+    keys = load_long_term_keys(credentials)
+    assert raw_bytes(keys[0]) == ltpk
+    assert raw_bytes(keys[1]) == raw_bytes(ltsk)
+
+    same = HapCredentials(ltpk, ltsk.private_bytes_raw(), b"atv_id", b"client_id")
+    assert load_long_term_keys(same) is keys
+
+    other = HapCredentials(ltpk, ltsk.private_bytes_raw(), b"other", b"client_id")
+    assert load_long_term_keys(other) is not keys
+
+    secret = ltsk.private_bytes_raw().hex()
+    assert not any(secret in key for key in hap_srp._LONG_TERM_KEYS.data)
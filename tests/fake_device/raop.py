@@ -147,6 +147,9 @@ class FakeRaopState:
         self.volume: float = INITIAL_VOLUME
         self.teardown_called: bool = False
         self.streaming_started: bool = False
+        self.setup_count: int = 0
+        self.flush_count: int = 0
+        self.session_dropped: bool = False
 
     def is_supported(self, flag: RaopServiceFlags) -> bool:
         """Return if a feature is supported."""
@@ -427,6 +430,8 @@ class FakeRaopService(HttpSimpleRouter):
         _LOGGER.debug("Received SETUP: %s", request)
         _, options = parse_transport(request.headers["Transport"])
         self.state.control_port = int(options["control_port"])
+        self.state.setup_count += 1
+        self.state.session_dropped = False
         self.state.reset_streaming()
         self._audio_receiver.reset()
         headers = {
@@ -517,7 +522,17 @@ class FakeRaopService(HttpSimpleRouter):
     def handle_flush(self, request: HttpRequest) -> Optional[HttpResponse]:
         """Handle incoming FLUSH request."""
         _LOGGER.debug("Received FLUSH: %s", request)
+        if self.state.session_dropped:
+            return HttpResponse(
+                "RTSP",
+                "1.0",
+                454,
+                "Session Not Found",
+                {"CSeq": request.headers["CSeq"]},
+                b"",
+            )
         self.state.streaming_started = True
+        self.state.flush_count += 1
         return HttpResponse(
             "RTSP", "1.0", 200, "OK", {"CSeq": request.headers["CSeq"]}, b""
         )
@@ -608,6 +623,10 @@ class FakeRaopUseCases:
         """State if /info is supported or not."""
         self.state.set_flag_state(RaopServiceFlags.INFO_SUPPORTED, is_supported)
 
+    def drop_session(self) -> None:
+        """Drop current streaming session, e.g. as done for idle sessions."""
+        self.state.session_dropped = True
+
     def delayed_set_volume(self, delayed_set_volume) -> None:
         """Enable or disable delayed set volume."""
         self.state.set_flag_state(
@@ -0,0 +1,106 @@
+"""Unit tests for pyatv.protocols.raop.audio_cache."""
+
+import pytest
+
+from pyatv.protocols.raop import audio_cache
+from pyatv.protocols.raop.audio_cache import AudioCache, CachedSource
+
+from tests.utils import data_path
+
+pytestmark = pytest.mark.asyncio
+
+FRAMES_PER_PACKET = 352
+
+# Size of audio in audio_3_packets.wav (in bytes)
+AUDIO_SIZE = 3 * FRAMES_PER_PACKET * 4
+
+
+@pytest.fixture(name="opened_sources")
+def opened_sources_fixture(monkeypatch):
+    opened = []
+    open_source = audio_cache.open_source
+
+    async def _open_source(*args):
+        opened.append(args[0])
+        return await open_source(*args)
+
+    monkeypatch.setattr(audio_cache, "open_source", _open_source)
+    yield opened
+
+
+async def read_all(source) -> bytes:
+    data = b""
+    while frames := await source.readframes(FRAMES_PER_PACKET):
+        data += frames
+    return data
+
+
+async def play(cache, filename, sample_rate=44100):
+    source = await cache.open(data_path(filename), sample_rate, 2, 2)
+    try:
+        return source, await read_all(source), await source.get_metadata()
+    finally:
+        await source.close()
+
+
+async def test_cache_hit_does_not_open_file(opened_sources):
+    cache = AudioCache()
+
+    _, frames, metadata = await play(cache, "audio_1_packet_metadata.wav")
+    assert len(cache) == 1
+    assert len(opened_sources) == 1
+
+    source, cached_frames, cached_metadata = await play(
+        cache, "audio_1_packet_metadata.wav"
+    )
+    assert isinstance(source, CachedSource)
+    assert cached_frames == frames
+    assert cached_metadata == metadata
+    assert cached_metadata.title == "pyatv"
+    assert len(opened_sources) == 1
+
+
+async def test_cache_key_includes_format(opened_sources):
+    cache = AudioCache()
+
+    await play(cache, "audio_3_packets.wav")
+    await play(cache, "audio_3_packets.wav", sample_rate=22050)
+
+    assert len(cache) == 2
+    assert len(opened_sources) == 2
+
+
+async def test_partially_played_not_cached():
+    cache = AudioCache()
+
+    source = await cache.open(data_path("audio_3_packets.wav"), 44100, 2, 2)
+    await source.readframes(FRAMES_PER_PACKET)
+    await source.close()
+
+    assert len(cache) == 0
+
+
+async def test_too_large_not_cached():
+    cache = AudioCache(max_size=AUDIO_SIZE - 1)
+
+    await play(cache, "audio_3_packets.wav")
+    assert len(cache) == 0
+
+
+async def test_evict_least_recently_used():
+    cache = AudioCache(max_size=AUDIO_SIZE + 10)
+
+    await play(cache, "audio_3_packets.wav")
+    assert cache.size == AUDIO_SIZE
+
+    await play(cache, "audio_10_frames.wav")
+    assert len(cache) == 1
+    assert cache.size == 10 * 4
+
+
+async def test_missing_file_not_cached():
+    cache = AudioCache()
+
+    with pytest.raises(Exception):
+        await cache.open(data_path("missing.wav"), 44100, 2, 2)
+    assert len(cache) == 0
@@ -0,0 +1,248 @@
+"""Unit tests for pyatv.protocols.raop.audio_codec."""
+
+import array
+import math
+import sys
+from typing import List
+
+import pytest
+
+from pyatv.protocols.raop import audio_codec
+from pyatv.protocols.raop.audio_codec import (
+    ALAC_KB,
+    ALAC_MB,
+    ALAC_PB,
+    AlacCodec,
+    PcmCodec,
+    create_codec,
+)
+from pyatv.protocols.raop.parsers import CompressionType
+from pyatv.settings import AudioCodec
+
+FRAMES = 352
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "fallback"], autouse=True)
+def numpy_fixture(request, monkeypatch):
+    if request.param:
+        if audio_codec.load_numpy() is None:
+            pytest.skip("numpy not installed")
+    else:
+        monkeypatch.setattr(audio_codec, "load_numpy", lambda: None)
+
+
+class BitReader:
+    def __init__(self, data: bytes) -> None:
+        self.value = int.from_bytes(data, "big")
+        self.total = 8 * len(data)
+        self.pos = 0
+
+    def read(self, bits: int) -> int:
+        self.pos += bits
+        return (self.value >> (self.total - self.pos)) & ((1 << bits) - 1)
+
+    def peek_ones(self) -> int:
+        count = 0
+        while self.pos + count < self.total and (
+            (self.value >> (self.total - self.pos - count - 1)) & 1
+        ):
+            count += 1
+        return count
+
+
+def _golomb(reader: BitReader, k: int, modulo: int, escape_bits: int) -> int:
+    prefix = reader.peek_ones()
+    if prefix >= 9:
+        reader.read(9)
+        return reader.read(escape_bits)
+    reader.read(prefix + 1)
+    value = reader.read(k - 1) if k > 1 else 0
+    value = value << 1
+    if value == 0 and k > 0:
+        # Least significant bit only included if remainder is non-zero
+        return prefix * modulo
+    value |= reader.read(1)
+    return prefix * modulo + value - 1
+
+
+def _decode_residuals(reader: BitReader, count: int, bit_size: int) -> List[int]:
+    """Simple (slow) port of dyn_decomp in the ALAC reference implementation."""
+    output: List[int] = []
+    mean = ALAC_MB
+    zmode = 0
+    while len(output) < count:
+        k = min(((mean >> 9) + 3).bit_length() - 1, ALAC_KB)
+        value = _golomb(reader, k, (1 << k) - 1, bit_size)
+        ndecode = value + zmode
+        output.append(-((ndecode + 1) >> 1) if ndecode & 1 else ndecode >> 1)
+        mean = ALAC_PB * ndecode + mean - ((ALAC_PB * mean) >> 9)
+        if value > 0xFFFF:
+            mean = 0xFFFF
+        zmode = 0
+        if (mean << 2) < 512 and len(output) < count:
+            zmode = 1
+            k = (32 - mean.bit_length()) - 24 + ((mean + 16) >> 6)
+            zeros = _golomb(reader, k, ((1 << k) - 1) & ((1 << ALAC_KB) - 1), 16)
+            output.extend([0] * zeros)
+            if zeros >= 0xFFFF:
+                zmode = 0
+            mean = 0
+    return output
+
+
+def _sign_extend(value: int, bits: int) -> int:
+    value &= (1 << bits) - 1
+    return value - (1 << bits) if value & (1 << (bits - 1)) else value
+
+
+def alac_decode(data: bytes, channels: int) -> List[int]:
+    """Decode an ALAC frame into interleaved samples."""
+    reader = BitReader(data)
+    assert reader.read(3) == (1 if channels == 2 else 0)
+    assert reader.read(4) == 0
+    assert reader.read(12) == 0
+    flags = reader.read(4)
+    assert flags & 0xE == 0  # No partial frame or shift
+
+    if flags & 1:  # Uncompressed
+        samples = [_sign_extend(reader.read(16), 16) for _ in range(FRAMES * channels)]
+    else:
+        channel_bits = 16 + channels - 1
+        assert reader.read(16) == 0  # Mix bits and residual
+        for _ in range(channels):
+            assert reader.read(8) >> 4 == 0
+            assert reader.read(8) & 0x1F == 31
+            reader.read(31 * 16)
+
+        decoded = []
+        for _ in range(channels):
+            residuals = _decode_residuals(reader, FRAMES, channel_bits)
+            values = [residuals[0]]
+            for residual in residuals[1:]:
+                values.append(_sign_extend(values[-1] + residual, channel_bits))
+            decoded.append([_sign_extend(x, 16) for x in values])
+        samples = [x for frame in zip(*decoded) for x in frame]
+
+    assert reader.read(3) == 7
+    assert (reader.total - reader.pos) < 8
+    return samples
+
+
+def to_pcm(samples: List[int]) -> bytes:
+    data = array.array("h", samples)
+    if sys.byteorder == "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def sine(channels: int, amplitude: int = 10000) -> List[int]:
+    return [
+        int(amplitude * math.sin(i / 20.0 + channel))
+        for i in range(FRAMES)
+        for channel in range(channels)
+    ]
+
+
+def test_pcm_codec_copies_frames():
+    codec = PcmCodec(2, 2)
+    output = bytearray(codec.max_payload_size)
+
+    assert codec.encode_into(b"\x01" * codec.packet_size, memoryview(output)) == 1408
+    assert output == b"\x01" * 1408
+
+
+def test_pcm_codec_pads_partial_packet():
+    codec = PcmCodec(2, 2)
+    output = bytearray(b"\xff" * codec.max_payload_size)
+
+    assert codec.encode_into(b"\x01\x02\x03\x04", memoryview(output)) == 1408
+    assert output == b"\x01\x02\x03\x04" + b"\x00" * 1404
+
+
+@pytest.mark.parametrize("channels", [1, 2])
+@pytest.mark.parametrize(
+    "samples",
+    [
+        lambda ch: sine(ch),
+        lambda ch: [0] * (FRAMES * ch),
+        lambda ch: [-32768, 32767] * (FRAMES * ch // 2),
+        lambda ch: [(i * 7919) % 65536 - 32768 for i in range(FRAMES * ch)],
+        lambda ch: [0] * (FRAMES * ch - 10) + [1000] * 10,
+    ],
+)
+def test_alac_round_trip(channels, samples):
+    samples = samples(channels)
+    codec = AlacCodec(channels, 2)
+    output = bytearray(codec.max_payload_size)
+
+    size = codec.encode_into(to_pcm(samples), memoryview(output))
+
+    assert size <= codec.max_payload_size
+    assert alac_decode(bytes(output[0:size]), channels) == samples
+
+
+def test_alac_compresses_audio():
+    codec = AlacCodec(2, 2)
+    output = bytearray(codec.max_payload_size)
+
+    size = codec.encode_into(to_pcm(sine(2)), memoryview(output))
+    assert size < codec.packet_size * 0.8
+
+
+def test_alac_noise_falls_back_to_uncompressed():
+    samples = [(i * 7919) % 65536 - 32768 for i in range(FRAMES * 2)]
+    codec = AlacCodec(2, 2)
+    output = bytearray(codec.max_payload_size)
+
+    assert codec.encode_into(to_pcm(samples), memoryview(output)) == 1412
+    assert output[2] & 0x02  # Escape flag
+
+
+def test_alac_pads_partial_packet():
+    codec = AlacCodec(2, 2)
+    output = bytearray(codec.max_payload_size)
+
+    size = codec.encode_into(to_pcm([100, -100]), memoryview(output))
+    assert alac_decode(bytes(output[0:size]), 2) == [100, -100] + [0] * (2 * FRAMES - 2)
+
+
+@pytest.mark.parametrize("codec", [PcmCodec(2, 2), AlacCodec(2, 2), AlacCodec(1, 2)])
+def test_encode_silence(codec):
+    expected = bytearray(codec.max_payload_size)
+    expected_size = codec.encode_into(bytes(codec.packet_size), memoryview(expected))
+
+    for _ in range(2):  # Second time is from cache
+        output = bytearray(b"\xff" * codec.max_payload_size)
+        assert codec.encode_silence_into(memoryview(output)) == expected_size
+        assert output[0:expected_size] == expected[0:expected_size]
+
+
+def test_alac_pads_partial_packet_after_full_packet():
+    codec = AlacCodec(1, 2)
+    output = bytearray(codec.max_payload_size)
+
+    codec.encode_into(to_pcm([1000] * FRAMES), memoryview(output))
+    size = codec.encode_into(to_pcm([100]), memoryview(output))
+    assert alac_decode(bytes(output[0:size]), 1) == [100] + [0] * (FRAMES - 1)
+
+
+def test_alac_unsupported_format_raises():
+    with pytest.raises(ValueError):
+        AlacCodec(2, 3)
+
+
+@pytest.mark.parametrize(
+    "setting,compression_types,channels,sample_size,expected",
+    [
+        (AudioCodec.PCM, CompressionType.ALAC, 2, 2, PcmCodec),
+        (AudioCodec.ALAC, CompressionType.ALAC, 2, 2, AlacCodec),
+        (AudioCodec.ALAC, CompressionType.PCM, 2, 2, PcmCodec),
+        (AudioCodec.ALAC, CompressionType.ALAC, 2, 3, PcmCodec),
+        (AudioCodec.ALAC, CompressionType.ALAC, 4, 2, PcmCodec),
+    ],
+)
+def test_create_codec(setting, compression_types, channels, sample_size, expected):
+    codec = create_codec(setting, compression_types, channels, sample_size)
+    assert isinstance(codec, expected)
+    assert codec.channels == channels
+    assert codec.sample_size == sample_size
@@ -0,0 +1,354 @@
+"""Unit tests for pyatv.protocols.raop.audio_source."""
+
+import array
+import asyncio
+import struct
+import threading
+import wave
+
+import miniaudio
+import pytest
+
+from pyatv.exceptions import NotSupportedError, ProtocolError
+from pyatv.interface import MediaMetadata
+from pyatv.protocols.raop.audio_source import open_source
+from pyatv.protocols.raop.decoders.miniaudio import (
+    FileSource,
+    InternetSource,
+    StreamReaderWrapper,
+)
+from pyatv.protocols.raop.decoders.raw import MmapPcmSource
+from pyatv.support.buffer import SemiSeekableBuffer
+
+from tests.utils import data_path, until
+
+pytestmark = pytest.mark.asyncio
+
+FRAMES_PER_PACKET = 352
+
+# Number of frames in audio_3_packets.wav
+TOTAL_FRAMES = 3 * FRAMES_PER_PACKET
+
+FRAME_SIZE = 4
+
+
+def expected_frames(start: int, count: int) -> bytes:
+    # Each frame N in test files consists of samples with N in all bytes
+    return b"".join(FRAME_SIZE * bytes([i & 0xFF]) for i in range(start, start + count))
+
+
+async def read_all(source, nframes=FRAMES_PER_PACKET) -> bytes:
+    data = b""
+    while frames := await source.readframes(nframes):
+        data += frames
+    return data
+
+
+@pytest.fixture(name="small_read_ahead")
+def small_read_ahead_fixture(monkeypatch):
+    monkeypatch.setattr(FileSource, "CHUNK_SIZE", 100)
+    monkeypatch.setattr(FileSource, "READ_AHEAD", 200 / 44100)
+
+
+async def test_file_source_read_all_frames():
+    source = await FileSource.open(data_path("audio_3_packets.wav"), 44100, 2, 2)
+    try:
+        assert await read_all(source) == expected_frames(0, TOTAL_FRAMES)
+    finally:
+        await source.close()
+
+
+async def test_file_source_bounded_read_ahead(small_read_ahead):
+    source = await FileSource.open(data_path("audio_3_packets.wav"), 44100, 2, 2)
+    try:
+        # Buffering stops once at least 200 frames have been decoded, which happens
+        # after two chunks of 100 frames
+        await until(lambda: len(source._audio_buffer) >= 200 * FRAME_SIZE)
+        await asyncio.sleep(0.1)
+        assert len(source._audio_buffer) == 200 * FRAME_SIZE
+
+        assert await read_all(source, 50) == expected_frames(0, TOTAL_FRAMES)
+    finally:
+        await source.close()
+
+
+async def test_file_source_seek(small_read_ahead):
+    source = await FileSource.open(data_path("audio_3_packets.wav"), 44100, 2, 2)
+    try:
+        assert await source.readframes(10) == expected_frames(0, 10)
+
+        await source.seek(500 / 44100)
+        assert await read_all(source) == expected_frames(500, TOTAL_FRAMES - 500)
+
+        await source.seek(0.0)
+        assert await source.readframes(10) == expected_frames(0, 10)
+    finally:
+        await source.close()
+
+
+async def test_file_source_raises_decode_error(monkeypatch):
+    def _stream_file(*args, **kwargs):
+        yield array.array("h", [0x0101] * 2 * FRAMES_PER_PACKET)
+        raise miniaudio.DecodeError("corrupt frame")
+
+    monkeypatch.setattr(miniaudio, "stream_file", _stream_file)
+    source = await FileSource.open(data_path("audio_3_packets.wav"), 44100, 2, 2)
+    try:
+        # Audio decoded before the error is returned before the error is raised
+        data = await source.readframes(2 * FRAMES_PER_PACKET)
+        assert data == bytes([1]) * FRAMES_PER_PACKET * FRAME_SIZE
+        with pytest.raises(miniaudio.DecodeError):
+            await source.readframes(FRAMES_PER_PACKET)
+    finally:
+        await source.close()
+
+
+class FakeStreamableSource:
+    def __init__(self):
+        self.closed = False
+        self.download_rate = 1234.0
+
+    def close(self):
+        self.closed = True
+
+
+def internet_frames(chunks: int):
+    # Samples are symmetric (same value in both bytes) so byte order does not matter
+    for i in range(chunks):
+        yield array.array("h", [0x0101 * (i + 1)] * 2 * FRAMES_PER_PACKET)
+
+
+async def test_internet_source_reads_from_buffer():
+    streamable = FakeStreamableSource()
+    source = InternetSource(
+        streamable, internet_frames(3), MediaMetadata(), 44100, 2, 2
+    )
+    try:
+        data = await read_all(source)
+        assert data == b"".join(
+            bytes([i + 1]) * FRAMES_PER_PACKET * FRAME_SIZE for i in range(3)
+        )
+
+        stats = source.statistics
+        assert stats.fill_level == 0.0
+        assert stats.underruns == 0
+        assert stats.download_rate == 1234.0
+    finally:
+        await source.close()
+
+    assert streamable.closed
+
+
+async def test_internet_source_counts_underruns():
+    resume = threading.Event()
+
+    def _slow_frames():
+        yield from internet_frames(1)
+        resume.wait()
+        yield from internet_frames(1)
+
+    source = InternetSource(
+        FakeStreamableSource(), _slow_frames(), MediaMetadata(), 44100, 2, 2
+    )
+    source._depth.min_depth = FRAMES_PER_PACKET / 44100
+    reported = []
+    try:
+        assert await source.readframes(FRAMES_PER_PACKET)
+        assert source.statistics.underruns == 0
+
+        # Second chunk is not available until later, so buffer runs empty
+        asyncio.get_running_loop().call_later(0.01, resume.set)
+        source.read_ahead_hook = reported.append
+        assert await source.readframes(FRAMES_PER_PACKET)
+        assert source.statistics.underruns == 1
+        assert reported[0].underruns == 1
+    finally:
+        resume.set()
+        await source.close()
+
+
+async def test_internet_source_raises_buffering_error():
+    def _failing_frames():
+        yield from internet_frames(1)
+        raise ProtocolError("connection lost")
+
+    source = InternetSource(
+        FakeStreamableSource(), _failing_frames(), MediaMetadata(), 44100, 2, 2
+    )
+    try:
+        assert await source.readframes(FRAMES_PER_PACKET)
+        with pytest.raises(ProtocolError):
+            await source.readframes(FRAMES_PER_PACKET)
+    finally:
+        await source.close()
+
+
+def stream_reader(filename: str, chunk_size: int = 1000) -> asyncio.StreamReader:
+    # Data is fed in chunks (from the event loop) to emulate a pipe
+    reader = asyncio.StreamReader()
+    with open(data_path(filename), "rb") as handle:
+        data = handle.read()
+
+    def _feed(offset: int) -> None:
+        reader.feed_data(data[offset : offset + chunk_size])
+        if offset + chunk_size < len(data):
+            asyncio.get_running_loop().call_soon(_feed, offset + chunk_size)
+        else:
+            reader.feed_eof()
+
+    asyncio.get_running_loop().call_soon(_feed, 0)
+    return reader
+
+
+async def test_stream_reader_source_read_all_frames():
+    source = await open_source(stream_reader("audio_3_packets.wav"), 44100, 2, 2)
+    try:
+        assert await read_all(source) == expected_frames(0, TOTAL_FRAMES)
+    finally:
+        await source.close()
+
+
+async def test_stream_reader_source_reports_statistics():
+    reported = []
+    source = await open_source(stream_reader("audio_3_packets.wav"), 44100, 2, 2)
+    source.read_ahead_hook = reported.append
+    try:
+        await read_all(source)
+    finally:
+        await source.close()
+
+    # Last statistics are reported when closed
+    assert reported[-1].underruns == source.statistics.underruns
+    assert reported[-1].download_rate > 0.0
+
+
+async def test_stream_reader_wrapper_close_unblocks_read():
+    wrapper = StreamReaderWrapper(
+        asyncio.StreamReader(), SemiSeekableBuffer(100, seekable_headroom=0)
+    )
+    read = asyncio.get_running_loop().run_in_executor(None, wrapper.read, 10)
+
+    wrapper.close()
+    assert await read == b""
+
+
+async def test_stream_reader_wrapper_waits_for_space():
+    reader = asyncio.StreamReader()
+    reader.feed_data(b"a" * 150)
+    reader.feed_eof()
+    wrapper = StreamReaderWrapper(reader, SemiSeekableBuffer(100, seekable_headroom=0))
+    loop = asyncio.get_running_loop()
+    try:
+        # Buffer only fits 100 bytes, rest is added once data has been read
+        assert await loop.run_in_executor(None, wrapper.read, 120) == b"a" * 100
+        assert await loop.run_in_executor(None, wrapper.read, 120) == b"a" * 50
+        assert await loop.run_in_executor(None, wrapper.read, 120) == b""
+    finally:
+        wrapper.close()
+
+
+async def test_file_source_duration():
+    source = await open_source(data_path("static_3sec.ogg"), 44100, 2, 2)
+    try:
+        assert source.duration == 3
+    finally:
+        await source.close()
+
+
+def write_wav(path, frames: bytes, sample_rate=44100, channels=2, sample_size=2):
+    with wave.open(str(path), "wb") as handle:
+        handle.setnchannels(channels)
+        handle.setsampwidth(sample_size)
+        handle.setframerate(sample_rate)
+        handle.writeframes(frames)
+
+
+def write_aiff(path, frames: bytes, compression=None, channels=2, sample_size=2):
+    # 44100 as 80 bit extended float
+    sample_rate = bytes.fromhex("400EAC44000000000000")
+    nframes = len(frames) // (channels * sample_size)
+    comm = struct.pack(">hIh", channels, nframes, 8 * sample_size) + sample_rate
+    if compression:
+        comm += compression + b"\x00\x00"
+    ssnd = struct.pack(">II", 0, 0) + frames
+    chunks = b"COMM" + struct.pack(">I", len(comm)) + comm
+    chunks += b"SSND" + struct.pack(">I", len(ssnd)) + ssnd
+    form = b"AIFC" if compression else b"AIFF"
+    path.write_bytes(b"FORM" + struct.pack(">I", len(chunks) + 4) + form + chunks)
+
+
+async def test_open_source_uses_mmap_for_matching_wav():
+    source = await open_source(data_path("audio_3_packets.wav"), 44100, 2, 2)
+    try:
+        assert isinstance(source, MmapPcmSource)
+        assert await read_all(source) == expected_frames(0, TOTAL_FRAMES)
+    finally:
+        await source.close()
+
+
+async def test_open_source_falls_back_for_other_format():
+    source = await open_source(data_path("audio_3_packets.wav"), 22050, 2, 2)
+    try:
+        assert isinstance(source, FileSource)
+    finally:
+        await source.close()
+
+
+@pytest.mark.parametrize("sample_size", [2, 3, 4])
+async def test_mmap_wav_sample_sizes(tmp_path, sample_size):
+    filename = tmp_path / "test.wav"
+    write_wav(filename, bytes(range(1, 2 * sample_size + 1)), sample_size=sample_size)
+
+    source = await MmapPcmSource.open(str(filename), 44100, 2, sample_size)
+    try:
+        # Each sample is reversed (little endian to big endian)
+        first = bytes(range(sample_size, 0, -1))
+        second = bytes(range(2 * sample_size, sample_size, -1))
+        assert await source.readframes(10) == first + second
+        assert not await source.readframes(10)
+    finally:
+        await source.close()
+
+
+@pytest.mark.parametrize(
+    "compression,expected",
+    [
+        (None, b"\x01\x02\x03\x04"),
+        (b"NONE", b"\x01\x02\x03\x04"),
+        (b"sowt", b"\x02\x01\x04\x03"),
+    ],
+)
+async def test_mmap_aiff(tmp_path, compression, expected):
+    filename = tmp_path / "test.aiff"
+    write_aiff(filename, b"\x01\x02\x03\x04", compression)
+
+    source = await MmapPcmSource.open(str(filename), 44100, 2, 2)
+    try:
+        assert source.sample_rate == 44100
+        assert await source.readframes(10) == expected
+    finally:
+        await source.close()
+
+
+async def test_mmap_unsupported_compression(tmp_path):
+    filename = tmp_path / "test.aiff"
+    write_aiff(filename, b"\x01\x02\x03\x04", b"ulaw")
+
+    with pytest.raises(NotSupportedError):
+        await MmapPcmSource.open(str(filename), 44100, 2, 2)
+
+
+async def test_mmap_not_audio_file():
+    with pytest.raises(NotSupportedError):
+        await MmapPcmSource.open(data_path("testfile.txt"), 44100, 2, 2)
+
+
+async def test_mmap_duration(tmp_path):
+    filename = tmp_path / "test.wav"
+    write_wav(filename, bytes(2 * 44100 * 4))
+
+    source = await MmapPcmSource.open(str(filename), 44100, 2, 2)
+    try:
+        assert source.duration == 2
+    finally:
+        await source.close()
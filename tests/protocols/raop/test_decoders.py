@@ -0,0 +1,158 @@
+"""Unit tests for pyatv.protocols.raop.decoders."""
+
+import subprocess
+import sys
+
+import pytest
+
+from pyatv.exceptions import NotSupportedError
+from pyatv.protocols.raop import audio_source, decoders
+from pyatv.protocols.raop.decoders import ffmpeg, raw
+
+from tests.utils import data_path
+
+pytestmark = pytest.mark.asyncio
+
+FAKE_FFMPEG = """#!{python}
+import sys
+{body}
+"""
+
+
+@pytest.fixture(name="fake_ffmpeg")
+def fake_ffmpeg_fixture(tmp_path, monkeypatch):
+    def _create(body: str) -> None:
+        binary = tmp_path / "ffmpeg"
+        binary.write_text(FAKE_FFMPEG.format(python=sys.executable, body=body))
+        binary.chmod(0o755)
+        monkeypatch.setattr(ffmpeg, "FFMPEG_BINARY", str(binary))
+
+    yield _create
+
+
+async def test_importing_raop_does_not_import_decoders():
+    code = (
+        "import sys, pyatv, pyatv.protocols.raop;"
+        "print('miniaudio' in sys.modules or 'pyatv.protocols.raop.decoders.raw'"
+        " in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+async def test_importing_raop_does_not_import_numpy():
+    code = "import sys, pyatv, pyatv.protocols.raop; print('numpy' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+async def test_moved_sources_available_from_audio_source():
+    assert audio_source.MmapPcmSource is raw.MmapPcmSource
+
+
+async def test_moved_source_with_missing_decoder_raises(monkeypatch):
+    monkeypatch.setitem(decoders.DECODERS, "raw", "pyatv.does_not_exist")
+    monkeypatch.setattr(decoders, "_LOADED", {})
+
+    with pytest.raises(ImportError, match="raw"):
+        audio_source.MmapPcmSource
+
+
+async def test_decoders_tried_in_order():
+    source = await decoders.open_source(
+        data_path("audio_3_packets.wav"), 44100, 2, 2, ["miniaudio", "raw"]
+    )
+    try:
+        assert not isinstance(source, raw.MmapPcmSource)
+    finally:
+        await source.close()
+
+
+async def test_unsupported_by_all_decoders_raises():
+    with pytest.raises(NotSupportedError):
+        await decoders.open_source(data_path("static_3sec.ogg"), 44100, 2, 2, ["raw"])
+
+
+async def test_unknown_decoder_raises():
+    with pytest.raises(NotSupportedError):
+        await decoders.open_source(data_path("static_3sec.ogg"), 44100, 2, 2, ["foo"])
+
+
+async def test_decoder_with_missing_dependency_skipped(monkeypatch):
+    monkeypatch.setitem(decoders.DECODERS, "missing", "pyatv.does_not_exist")
+    monkeypatch.setattr(decoders, "_LOADED", {})
+
+    source = await decoders.open_source(
+        data_path("audio_3_packets.wav"), 44100, 2, 2, ["missing", "raw"]
+    )
+    try:
+        assert isinstance(source, raw.MmapPcmSource)
+    finally:
+        await source.close()
+
+
+async def test_ffmpeg_not_installed(monkeypatch):
+    monkeypatch.setattr(ffmpeg, "FFMPEG_BINARY", "does-not-exist")
+
+    with pytest.raises(NotSupportedError):
+        await ffmpeg.open_source(data_path("static_3sec.ogg"), 44100, 2, 2)
+
+
+async def test_ffmpeg_read_frames(fake_ffmpeg):
+    # Output three frames and a partial frame
+    fake_ffmpeg("sys.stdout.buffer.write(bytes(range(14)))")
+
+    source = await ffmpeg.open_source(data_path("static_3sec.ogg"), 44100, 2, 2)
+    try:
+        assert await source.readframes(2) == bytes(range(8))
+        assert await source.readframes(2) == bytes(range(8, 12))
+        assert not await source.readframes(2)
+    finally:
+        await source.close()
+
+
+async def test_ffmpeg_decode_error(fake_ffmpeg):
+    fake_ffmpeg("sys.stderr.write('invalid data'); sys.exit(1)")
+
+    with pytest.raises(NotSupportedError, match="invalid data"):
+        await ffmpeg.open_source(data_path("testfile.txt"), 44100, 2, 2)
+
+
+async def test_ffmpeg_with_lots_of_error_output(fake_ffmpeg):
+    fake_ffmpeg(
+        "sys.stderr.write('warning\\n' * 100000); sys.stderr.flush();"
+        "sys.stdout.buffer.write(bytes(range(8)))"
+    )
+
+    source = await ffmpeg.open_source(data_path("static_3sec.ogg"), 44100, 2, 2)
+    try:
+        assert await source.readframes(2) == bytes(range(8))
+    finally:
+        await source.close()
+
+
+async def test_unavailable_decoder_error_not_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(ffmpeg, "FFMPEG_BINARY", "does-not-exist")
+    corrupt = tmp_path / "corrupt.mp3"
+    corrupt.write_bytes(1000 * b"\x00")
+
+    with pytest.raises(NotSupportedError, match="unsupported file"):
+        await decoders.open_source(str(corrupt), 44100, 2, 2, ["miniaudio", "ffmpeg"])
+
+
+async def test_errors_from_all_decoders_combined(tmp_path, monkeypatch):
+    monkeypatch.setattr(ffmpeg, "FFMPEG_BINARY", "does-not-exist")
+    corrupt = tmp_path / "corrupt.mp3"
+    corrupt.write_bytes(1000 * b"\x00")
+
+    with pytest.raises(NotSupportedError) as exc_info:
+        await decoders.open_source(str(corrupt), 44100, 2, 2)
+
+    message = str(exc_info.value)
+    assert "raw: " in message
+    assert "miniaudio: unsupported file" in message
+    assert "ffmpeg" not in message
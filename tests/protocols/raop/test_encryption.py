@@ -0,0 +1,96 @@
+"""Unit tests for pyatv.protocols.raop.encryption."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from chacha20poly1305_reuseable import ChaCha20Poly1305Reusable as ChaCha20Poly1305
+import pytest
+
+from pyatv.protocols.raop.encryption import TRAILER_SIZE, AudioPacketEncryptor
+from pyatv.protocols.raop.packets import AudioPacketHeader
+from pyatv.support.chacha20 import Chacha20Cipher8byteNonce
+
+pytestmark = pytest.mark.asyncio
+
+KEY = bytes(range(32))
+HEADER_SIZE = AudioPacketHeader.length
+
+
+def make_packet(audio: bytes, timestamp: int = 1234) -> memoryview:
+    packet = memoryview(bytearray(HEADER_SIZE + len(audio) + TRAILER_SIZE))
+    AudioPacketHeader.encode_into(packet, 0, 0x80, 0x60, 1, timestamp, 5678)
+    packet[HEADER_SIZE : HEADER_SIZE + len(audio)] = audio
+    return packet
+
+
+def decrypt(packet: memoryview) -> bytes:
+    nonce = bytes(4) + bytes(packet[-8:])
+    return ChaCha20Poly1305(KEY).decrypt(
+        nonce, bytes(packet[HEADER_SIZE:-8]), bytes(packet[4:12])
+    )
+
+
+async def test_encrypt_in_place():
+    packet = make_packet(b"audio data")
+
+    size = AudioPacketEncryptor(KEY).encrypt(packet, 10)
+
+    assert size == HEADER_SIZE + 10 + TRAILER_SIZE
+    assert decrypt(packet[0:size]) == b"audio data"
+
+
+async def test_encrypt_same_as_chacha20_cipher():
+    cipher = Chacha20Cipher8byteNonce(KEY, KEY)
+    encryptor = AudioPacketEncryptor(KEY)
+
+    for i in range(3):
+        audio = bytes([i]) * 20
+        packet = make_packet(audio, timestamp=i)
+        nonce = cipher.out_nonce
+        expected = cipher.encrypt(audio, aad=bytes(packet[4:12])) + nonce[-8:]
+
+        size = encryptor.encrypt(packet, len(audio))
+        assert packet[HEADER_SIZE:size] == expected
+
+
+async def test_encrypt_nonce_from_counter():
+    encryptor = AudioPacketEncryptor(KEY)
+    encryptor.encrypt(make_packet(b"abc"), 3)
+    packet = make_packet(b"abc")
+
+    size = encryptor.encrypt(packet, 3)
+
+    assert packet[size - 8 : size] == b"\x01\x00\x00\x00\x00\x00\x00\x00"
+    assert encryptor.counter == 2
+
+
+async def test_encrypt_many_same_as_encrypt():
+    audio = [bytes([i]) * (10 + i) for i in range(5)]
+    single = [make_packet(data) for data in audio]
+    many = [make_packet(data) for data in audio]
+
+    encryptor = AudioPacketEncryptor(KEY)
+    sizes = [
+        encryptor.encrypt(packet, len(data)) for packet, data in zip(single, audio)
+    ]
+
+    assert (
+        AudioPacketEncryptor(KEY).encrypt_many(
+            [(packet, len(data)) for packet, data in zip(many, audio)]
+        )
+        == sizes
+    )
+    assert [bytes(packet) for packet in many] == [bytes(packet) for packet in single]
+
+
+async def test_encrypt_many_in_executor():
+    audio = [bytes([i]) * 32 for i in range(4)]
+    packets = [make_packet(data) for data in audio]
+
+    encryptor = AudioPacketEncryptor(KEY)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        sizes = await encryptor.encrypt_many_in_executor(
+            [(packet, len(data)) for packet, data in zip(packets, audio)], executor
+        )
+
+    assert encryptor.counter == 4
+    assert [decrypt(packet[0:size]) for packet, size in zip(packets, sizes)] == audio
@@ -0,0 +1,234 @@
+"""Unit tests for pyatv.protocols.raop.fanout."""
+
+import asyncio
+
+import pytest
+
+from pyatv.exceptions import InvalidStateError
+from pyatv.interface import MediaMetadata
+from pyatv.protocols.raop import timing
+from pyatv.protocols.raop.audio_source import AudioSource
+from pyatv.protocols.raop.fanout import AudioFanout
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeSource(AudioSource):
+    def __init__(self, chunks: int) -> None:
+        self.chunks = chunks
+        self.reads = 0
+        self.metadata_reads = 0
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+    async def readframes(self, nframes: int) -> bytes:
+        if self.reads >= self.chunks:
+            return AudioSource.NO_FRAMES
+        self.reads += 1
+        return bytes([self.reads]) * nframes * 4
+
+    def frames_ready(self, nframes: int) -> bool:
+        return False
+
+    async def get_metadata(self) -> MediaMetadata:
+        self.metadata_reads += 1
+        return MediaMetadata(title="test")
+
+    @property
+    def sample_rate(self) -> int:
+        return 44100
+
+    @property
+    def channels(self) -> int:
+        return 2
+
+    @property
+    def sample_size(self) -> int:
+        return 2
+
+    @property
+    def duration(self) -> int:
+        return 0
+
+
+def chunk(value: int) -> bytes:
+    # Two frames (two channels, two bytes per sample)
+    return bytes([value]) * 8
+
+
+@pytest.fixture(name="source")
+def source_fixture():
+    yield FakeSource(3)
+
+
+async def read_all(reader):
+    frames = []
+    while chunk := await reader.readframes(2):
+        frames.append(chunk)
+    return frames
+
+
+async def test_decode_once_for_all_readers(source):
+    fanout = AudioFanout(source)
+    readers = [fanout.create_reader() for _ in range(3)]
+
+    results = await asyncio.gather(*[read_all(reader) for reader in readers])
+
+    assert results == 3 * [[chunk(1), chunk(2), chunk(3)]]
+    assert source.reads == 3
+
+
+async def test_release_chunks_read_by_all_readers(source):
+    fanout = AudioFanout(source)
+    reader1 = fanout.create_reader()
+    reader2 = fanout.create_reader()
+
+    await reader1.readframes(2)
+    await reader1.readframes(2)
+    assert fanout.size == 2
+
+    await reader2.readframes(2)
+    assert fanout.size == 1
+
+    await reader2.readframes(2)
+    assert fanout.size == 0
+
+
+async def test_frames_ready_when_chunk_is_decoded(source):
+    fanout = AudioFanout(source)
+    reader1 = fanout.create_reader()
+    reader2 = fanout.create_reader()
+    assert not reader1.frames_ready(2)
+
+    await reader1.readframes(2)
+    assert not reader1.frames_ready(2)
+    assert reader2.frames_ready(2)
+
+    await read_all(reader1)
+    assert reader1.frames_ready(2)
+
+
+async def test_closed_reader_releases_chunks(source):
+    fanout = AudioFanout(source)
+    reader1 = fanout.create_reader()
+    reader2 = fanout.create_reader()
+
+    await reader1.readframes(2)
+    await reader1.readframes(2)
+    await reader2.close()
+
+    assert fanout.size == 0
+    assert not await reader2.readframes(2)
+    assert not source.closed
+
+
+async def test_new_reader_starts_at_current_position(source):
+    fanout = AudioFanout(source)
+    reader1 = fanout.create_reader()
+    await reader1.readframes(2)
+
+    reader2 = fanout.create_reader()
+    assert await read_all(reader2) == [chunk(2), chunk(3)]
+    assert await read_all(reader1) == [chunk(2), chunk(3)]
+
+
+async def test_new_reader_starts_at_later_time(source):
+    fanout = AudioFanout(source)
+    reader1 = fanout.create_reader()
+    await reader1.readframes(2)
+
+    reader2 = fanout.create_reader()
+    assert reader1.start_time == fanout.start_time
+    assert reader2.start_time == fanout.start_time + timing.ts2ntp(2, 44100)
+
+
+async def test_slow_reader_detached(source):
+    fanout = AudioFanout(source, max_chunks=1)
+    reader1 = fanout.create_reader()
+    reader2 = fanout.create_reader()
+
+    await reader1.readframes(2)
+    await reader1.readframes(2)
+    assert fanout.size == 1
+
+    with pytest.raises(InvalidStateError):
+        await reader2.readframes(2)
+    assert not reader2.active
+    assert not await reader2.readframes(2)
+
+    # Chunks are no longer kept for detached reader
+    assert await reader1.readframes(2) == chunk(3)
+    assert fanout.size == 0
+
+
+async def test_invalid_max_chunks(source):
+    with pytest.raises(ValueError):
+        AudioFanout(source, max_chunks=0)
+
+
+async def test_metadata_retrieved_once(source):
+    fanout = AudioFanout(source)
+    reader1 = fanout.create_reader()
+    reader2 = fanout.create_reader()
+
+    assert (await reader1.get_metadata()).title == "test"
+    assert (await reader2.get_metadata()).title == "test"
+    assert source.metadata_reads == 1
+
+
+async def test_shared_start_time(source):
+    fanout = AudioFanout(source)
+    reader1 = fanout.create_reader()
+    reader2 = fanout.create_reader()
+
+    assert reader1.start_time == reader2.start_time == fanout.start_time
+
+
+async def test_close_closes_source(source):
+    fanout = AudioFanout(source)
+    await fanout.close()
+    assert source.closed
+
+
+async def test_converted_readers_share_conversion(source):
+    fanout = AudioFanout(source)
+    reader1 = fanout.create_converted_reader(44100, 1, 2)
+    reader2 = fanout.create_converted_reader(44100, 1, 2)
+
+    assert reader1.fanout is reader2.fanout
+    assert reader1.channels == 1
+    assert await reader1.readframes(2) == b"\x01" * 4
+    assert await reader2.readframes(2) == b"\x01" * 4
+    assert reader1.start_time == fanout.start_time
+
+
+async def test_late_converted_reader_starts_at_later_time(source):
+    fanout = AudioFanout(source)
+    await fanout.create_reader().readframes(2)
+
+    reader1 = fanout.create_converted_reader(22050, 2, 2)
+    assert reader1.start_time == fanout.start_time + timing.ts2ntp(2, 44100)
+
+    await reader1.readframes(1)
+    reader2 = fanout.create_converted_reader(22050, 2, 2)
+    assert reader2.start_time == reader1.start_time + timing.ts2ntp(1, 22050)
+
+
+async def test_converted_reader_with_same_format(source):
+    fanout = AudioFanout(source)
+    assert fanout.create_converted_reader(44100, 2, 2).fanout is fanout
+
+
+async def test_closing_converted_readers_stops_conversion(source):
+    fanout = AudioFanout(source)
+    reader = fanout.create_converted_reader(22050, 2, 2)
+    await reader.close()
+
+    new_reader = fanout.create_converted_reader(22050, 2, 2)
+    assert new_reader.fanout is not reader.fanout
+    await new_reader.close()
+
+    await fanout.create_reader().readframes(2)
+    assert fanout.size == 0
@@ -124,3 +124,49 @@ def test_repr():
     fifo[1] = 2
     fifo[2] = 3
     assert repr(fifo) == "{1: 2, 2: 3}"
+
+
+def test_invalid_upper_limit():
+    with pytest.raises(ValueError):
+        PacketFifo(0)
+
+
+def test_sequence_number_wraparound():
+    fifo = PacketFifo(4)
+    for seqno in range(2**16 - 2, 2**16 + 2):
+        fifo[seqno % 2**16] = seqno
+
+    assert list(fifo) == [65534, 65535, 0, 1]
+    assert fifo[65535] == 65535
+    assert fifo[0] == 2**16
+
+    fifo[2] = 2
+    assert list(fifo) == [65535, 0, 1, 2]
+    assert 65534 not in fifo
+
+
+def test_same_slot_replaces_item():
+    fifo = PacketFifo(3)
+    fifo[1] = 1
+    fifo[2] = 2
+    fifo[5] = 5
+
+    assert len(fifo) == 2
+    assert 1 not in fifo
+    assert list(fifo) == [2, 5]
+
+    fifo[6] = 6
+    fifo[7] = 7
+    assert len(fifo) == 3
+    assert list(fifo) == [5, 6, 7]
+
+
+def test_clear_and_reuse_fifo():
+    fifo = PacketFifo(2)
+    fifo[0] = 1
+    fifo[1] = 2
+    fifo.clear()
+
+    fifo[1] = 3
+    assert list(fifo) == [1]
+    assert fifo[1] == 3
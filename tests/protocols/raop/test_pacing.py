@@ -0,0 +1,179 @@
+"""Unit tests for pyatv.protocols.raop.pacing."""
+
+import asyncio
+import socket
+
+import pytest
+import pytest_asyncio
+
+from pyatv.protocols.raop import pacing
+from pyatv.protocols.raop.pacing import PacingScheduler, ThreadedPacketSender
+
+pytestmark = pytest.mark.asyncio
+
+SAMPLE_RATE = 44100
+FRAMES_PER_PACKET = 352
+PACKET_TIME_NS = -(-FRAMES_PER_PACKET * 10**9 // SAMPLE_RATE)
+
+
+class FakeClock:
+    def __init__(self, now: int = 0) -> None:
+        self.now = now
+        self.sleeps = []
+
+    def monotonic_ns(self) -> int:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += round(delay * 10**9)
+
+
+@pytest.fixture(name="clock")
+def clock_fixture(monkeypatch):
+    clock = FakeClock(1000)
+    monkeypatch.setattr(pacing, "monotonic_ns", clock.monotonic_ns)
+    monkeypatch.setattr(pacing.asyncio, "sleep", clock.sleep)
+    yield clock
+
+
+async def test_invalid_batch_size():
+    with pytest.raises(ValueError):
+        PacingScheduler(SAMPLE_RATE, batch_size=0)
+
+
+async def test_deadlines_do_not_drift():
+    scheduler = PacingScheduler(SAMPLE_RATE, start_ns=0)
+
+    # One second is 125.28 packets, so deadlines must not be rounded per packet
+    assert scheduler.deadline(0) == 0
+    assert scheduler.deadline(1) == PACKET_TIME_NS
+    assert scheduler.deadline(44100) == 352 * 10**9
+
+
+async def test_first_batch_sent_immediately(clock):
+    scheduler = PacingScheduler(SAMPLE_RATE)
+
+    assert await scheduler.next_batch() == 1
+    assert clock.sleeps == []
+
+
+async def test_sleep_until_deadline(clock):
+    scheduler = PacingScheduler(SAMPLE_RATE)
+
+    await scheduler.next_batch()
+    assert await scheduler.next_batch() == 1
+    assert clock.now == scheduler.deadline(1)
+
+
+async def test_batches_aligned_to_deadline_of_first_packet(clock):
+    scheduler = PacingScheduler(SAMPLE_RATE, batch_size=4)
+
+    assert await scheduler.next_batch() == 4
+    assert await scheduler.next_batch() == 4
+    assert clock.now == scheduler.deadline(4)
+    assert scheduler.scheduled_packets == 8
+
+
+async def test_late_wakeups_do_not_accumulate(clock):
+    scheduler = PacingScheduler(SAMPLE_RATE)
+
+    for _ in range(100):
+        await scheduler.next_batch()
+        clock.now += PACKET_TIME_NS // 10  # Simulate time spent sending
+
+    assert clock.now < scheduler.deadline(100)
+    assert scheduler.scheduled_packets == 100
+
+
+async def test_catch_up_limited_when_late(clock):
+    scheduler = PacingScheduler(SAMPLE_RATE, batch_size=2, max_catch_up=3)
+
+    clock.now = scheduler.deadline(10)  # 11 packets due
+    assert await scheduler.next_batch() == 5
+    assert scheduler.packets_behind == 6
+    assert await scheduler.next_batch() == 5
+    assert scheduler.packets_behind == 1
+    assert await scheduler.next_batch() == 2
+    assert scheduler.packets_behind == 0
+
+
+async def test_statistics(clock):
+    scheduler = PacingScheduler(SAMPLE_RATE, start_ns=clock.now)
+    assert scheduler.statistics.batches == 0
+
+    await scheduler.next_batch()  # On time
+    clock.now = scheduler.deadline(1) + 2000
+    await scheduler.next_batch()  # 2µs late
+
+    stats = scheduler.statistics
+    assert stats.batches == 2
+    assert stats.mean_lateness == pytest.approx(1e-6)
+    assert stats.max_lateness == pytest.approx(2e-6)
+    assert stats.jitter == pytest.approx(1e-6)
+
+
+@pytest_asyncio.fixture(name="udp")
+async def udp_fixture():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(5.0)
+    transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+        asyncio.DatagramProtocol, remote_addr=receiver.getsockname()
+    )
+    yield transport, receiver
+    transport.close()
+    receiver.close()
+
+
+async def test_threaded_sender_sends_packets_in_order(udp):
+    transport, receiver = udp
+    scheduler = PacingScheduler(SAMPLE_RATE, batch_size=2)
+    sender = ThreadedPacketSender(scheduler, transport, lookahead=4)
+    sender.start()
+    try:
+        for i in range(10):
+            await sender.wait_for_space()
+            assert sender.pending < 4
+            sender.sendto(bytes([i]))
+        await sender.drain()
+        assert sender.pending == 0
+
+        assert [receiver.recv(10) for _ in range(10)] == [bytes([i]) for i in range(10)]
+        assert scheduler.statistics.batches >= 5
+    finally:
+        sender.close()
+
+
+async def test_threaded_sender_queue_created_by_thread(udp):
+    transport, _ = udp
+    sender = ThreadedPacketSender(PacingScheduler(SAMPLE_RATE), transport)
+    assert sender._queue is None
+
+    # Packets queued before the thread has started are sent as well
+    sender.sendto(b"a")
+    sender.start()
+    try:
+        assert sender._queue is not None
+        await sender.drain()
+        assert sender.pending == 0
+    finally:
+        sender.close()
+
+
+async def test_threaded_sender_retries_when_socket_buffer_full(udp, monkeypatch):
+    # Pretend socket buffer is full, so nothing is sent by send_datagrams
+    monkeypatch.setattr(pacing, "send_datagrams", lambda sock, packets: 0)
+
+    transport, receiver = udp
+    scheduler = PacingScheduler(SAMPLE_RATE, batch_size=3)
+    sender = ThreadedPacketSender(scheduler, transport)
+    sender.start()
+    try:
+        for i in range(6):
+            sender.sendto(bytes([i]))
+        await sender.drain()
+
+        assert [receiver.recv(10) for _ in range(6)] == [bytes([i]) for i in range(6)]
+    finally:
+        sender.close()
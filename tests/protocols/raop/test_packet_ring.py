@@ -0,0 +1,71 @@
+"""Unit tests for pyatv.protocols.raop.packet_ring."""
+
+import pytest
+
+from pyatv.protocols.raop.packet_ring import PacketRing
+
+
+def test_zero_slots_raises():
+    with pytest.raises(ValueError):
+        PacketRing(0)
+
+
+def test_next_slot_not_allocated_raises():
+    ring = PacketRing(2)
+
+    with pytest.raises(RuntimeError):
+        ring.next_slot()
+
+
+def test_allocate_slots():
+    ring = PacketRing(3)
+    ring.allocate(10)
+    assert ring.slots == 3
+    assert ring.slot_size == 10
+    assert len(ring.next_slot()) == 10
+
+
+def test_slots_are_writable_and_independent():
+    ring = PacketRing(2)
+    ring.allocate(4)
+
+    first = ring.next_slot()
+    second = ring.next_slot()
+    first[:] = b"aaaa"
+    second[:] = b"bbbb"
+
+    assert first == b"aaaa"
+    assert second == b"bbbb"
+
+
+def test_slots_wrap_around():
+    ring = PacketRing(2)
+    ring.allocate(4)
+
+    first = ring.next_slot()
+    first[:] = b"aaaa"
+    ring.next_slot()
+
+    # Third slot is the same memory as the first one
+    third = ring.next_slot()
+    third[:] = b"cccc"
+    assert first == b"cccc"
+
+
+def test_allocate_resets_index():
+    ring = PacketRing(2)
+    ring.allocate(4)
+    ring.next_slot()[:] = b"aaaa"
+
+    ring.allocate(4)
+    assert ring.next_slot() == b"aaaa"
+
+
+def test_release():
+    ring = PacketRing(2)
+    ring.allocate(4)
+    ring.release()
+    assert ring.slot_size == 0
+
+    with pytest.raises(RuntimeError):
+        ring.next_slot()
@@ -4,9 +4,11 @@ import pytest
 
 from pyatv.exceptions import ProtocolError
 from pyatv.protocols.raop.parsers import (
+    CompressionType,
     EncryptionType,
     MetadataType,
     get_audio_properties,
+    get_compression_types,
     get_encryption_types,
     get_metadata_types,
 )
@@ -82,3 +84,23 @@ def test_parse_encryption_include_unknown_type():
 )
 def test_parse_metadata_types(properties, expected):
     assert get_metadata_types(properties) == expected
+
+
+@pytest.mark.parametrize(
+    "properties,expected",
+    [
+        ({}, CompressionType.Unknown),
+        ({"cn": "foobar"}, CompressionType.Unknown),
+        ({"cn": "0"}, CompressionType.PCM),
+        ({"cn": "1"}, CompressionType.ALAC),
+        (
+            {"cn": "0,1,2,3"},
+            CompressionType.PCM
+            | CompressionType.ALAC
+            | CompressionType.AAC
+            | CompressionType.AAC_ELD,
+        ),
+    ],
+)
+def test_parse_compression_types(properties, expected):
+    assert get_compression_types(properties) == expected
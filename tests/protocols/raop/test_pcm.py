@@ -0,0 +1,103 @@
+"""Unit tests for pyatv.protocols.raop.pcm."""
+
+import array
+import io
+import sys
+
+import pytest
+
+from pyatv.exceptions import NotSupportedError
+from pyatv.protocols.raop import pcm
+from pyatv.protocols.raop.audio_source import open_source
+from pyatv.protocols.raop.pcm import convert_samples, to_audio_samples
+
+from tests.utils import data_path
+
+pytestmark = pytest.mark.skipif(
+    sys.byteorder != "little", reason="conversion only tested on little endian"
+)
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "fallback"], autouse=True)
+def numpy_fixture(request, monkeypatch):
+    if request.param:
+        if pcm.load_numpy() is None:
+            pytest.skip("numpy not installed")
+    else:
+        monkeypatch.setattr(pcm, "load_numpy", lambda: None)
+
+
+@pytest.mark.parametrize(
+    "sample_size,data,expected",
+    [
+        (1, b"\x01\x02\x03\x04", b"\x01\x02\x03\x04"),
+        (2, b"\x01\x02\x03\x04", b"\x02\x01\x04\x03"),
+        (3, b"\x01\x02\x03\x04\x05\x06", b"\x03\x02\x01\x06\x05\x04"),
+        (4, b"\x01\x02\x03\x04\x05\x06\x07\x08", b"\x04\x03\x02\x01\x08\x07\x06\x05"),
+    ],
+)
+def test_convert_samples(sample_size, data, expected):
+    output = bytearray(len(data))
+    assert convert_samples(data, sample_size, output) == len(data)
+    assert output == expected
+
+
+def test_convert_and_narrow_samples():
+    output = bytearray(6)
+    assert convert_samples(b"\x01\x02\x03\x04\x05\x06\x07\x08", 3, output, 4) == 6
+    assert output == b"\x04\x03\x02\x08\x07\x06"
+
+
+def test_convert_to_larger_sample_size_not_supported():
+    with pytest.raises(NotSupportedError):
+        convert_samples(b"\x01\x02\x03\x04", 4, bytearray(8), 2)
+
+
+def test_convert_into_part_of_buffer():
+    output = bytearray(6)
+    convert_samples(b"\x01\x02", 2, memoryview(output)[2:4])
+    assert output == b"\x00\x00\x02\x01\x00\x00"
+
+
+def test_convert_only_whole_samples():
+    output = bytearray(5)
+    assert convert_samples(b"\x01\x02\x03\x04\x05", 2, output) == 4
+    assert output == b"\x02\x01\x04\x03\x00"
+
+
+def test_convert_from_array():
+    assert to_audio_samples(array.array("h", [0x0102, 0x0304]), 2) == (
+        b"\x01\x02\x03\x04"
+    )
+
+
+def test_output_too_small():
+    with pytest.raises(ValueError):
+        convert_samples(b"\x01\x02\x03\x04", 2, bytearray(2))
+
+
+def test_unsupported_sample_size():
+    with pytest.raises(NotSupportedError):
+        convert_samples(b"\x01\x02\x03\x04\x05", 5, bytearray(5))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sample_size", [2, 3, 4])
+@pytest.mark.parametrize("buffered", [False, True])
+async def test_source_sample_sizes(sample_size, buffered):
+    filename = data_path("audio_10_frames.wav")
+    with io.open(filename, "rb") as handle:
+        source = await open_source(
+            handle if buffered else filename, 44100, 2, sample_size
+        )
+        try:
+            frames = await source.readframes(10)
+        finally:
+            await source.close()
+
+    assert source.sample_size == sample_size
+
+    # Each sample in frame N is 0xNN in all bytes (16 bit), which is placed in the
+    # most significant bytes when converted to other sample sizes
+    padding = bytes(sample_size - 2)
+    assert frames == b"".join(2 * (bytes([i, i]) + padding) for i in range(10))
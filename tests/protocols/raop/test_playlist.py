@@ -0,0 +1,135 @@
+"""Unit tests for pyatv.protocols.raop.playlist."""
+
+from collections import deque
+
+import pytest
+
+from pyatv.interface import MediaMetadata
+from pyatv.protocols.raop.audio_source import AudioSource
+from pyatv.protocols.raop.playlist import PlaylistSource
+
+from tests.utils import until
+
+pytestmark = pytest.mark.asyncio
+
+FRAME_SIZE = 4
+
+
+class FakeSource(AudioSource):
+    def __init__(self, value: int, frames: int, sample_rate: int = 44100) -> None:
+        self.value = value
+        self.frames = frames
+        self.closed = False
+        self._sample_rate = sample_rate
+
+    async def close(self) -> None:
+        self.closed = True
+
+    async def readframes(self, nframes: int) -> bytes:
+        nframes = min(nframes, self.frames)
+        self.frames -= nframes
+        return bytes([self.value]) * nframes * FRAME_SIZE
+
+    async def get_metadata(self) -> MediaMetadata:
+        return MediaMetadata(title=str(self.value))
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def channels(self) -> int:
+        return 2
+
+    @property
+    def sample_size(self) -> int:
+        return 2
+
+    @property
+    def duration(self) -> int:
+        return self.value
+
+
+@pytest.fixture(name="opened")
+def opened_fixture():
+    yield []
+
+
+@pytest.fixture(name="opener")
+def opener_fixture(opened):
+    async def _opener(source):
+        if source is None:
+            raise Exception("failed to open")
+        opened.append(source)
+        return source, await source.get_metadata()
+
+    yield _opener
+
+
+async def test_play_queued_sources_without_gap(opener, opened):
+    changes = []
+    first = FakeSource(1, 3)
+    second = FakeSource(2, 3)
+    playlist = PlaylistSource(
+        first,
+        MediaMetadata(title="1"),
+        deque([second]),
+        opener,
+        lambda source, metadata: changes.append(metadata.title),
+    )
+
+    # Next source is opened in advance
+    await until(lambda: opened == [second])
+    assert await playlist.readframes(2) == b"\x01" * 2 * FRAME_SIZE
+
+    assert await playlist.readframes(2) == b"\x01" * FRAME_SIZE + b"\x02" * FRAME_SIZE
+    assert first.closed
+    assert changes == ["2"]
+    assert playlist.duration == 2
+    assert (await playlist.get_metadata()).title == "2"
+
+    assert await playlist.readframes(4) == b"\x02" * 2 * FRAME_SIZE
+    assert await playlist.readframes(4) == AudioSource.NO_FRAMES
+    assert second.closed
+    assert playlist.finished
+
+
+async def test_prefetch_queued_while_playing(opener, opened):
+    queue = deque()
+    playlist = PlaylistSource(FakeSource(1, 1), MediaMetadata(), queue, opener)
+
+    second = FakeSource(2, 1)
+    queue.append(second)
+    playlist.prefetch()
+
+    assert await playlist.readframes(2) == b"\x01" * FRAME_SIZE + b"\x02" * FRAME_SIZE
+    assert opened == [second]
+
+
+async def test_skip_sources_failing_to_open(opener):
+    third = FakeSource(3, 1)
+    playlist = PlaylistSource(
+        FakeSource(1, 1), MediaMetadata(), deque([None, third]), opener
+    )
+
+    assert await playlist.readframes(2) == b"\x01" * FRAME_SIZE + b"\x03" * FRAME_SIZE
+
+
+async def test_skip_sources_with_different_format(opener):
+    other = FakeSource(2, 1, sample_rate=22050)
+    playlist = PlaylistSource(FakeSource(1, 1), MediaMetadata(), deque([other]), opener)
+
+    assert await playlist.readframes(2) == b"\x01" * FRAME_SIZE
+    assert other.closed
+
+
+async def test_close_closes_prefetched_source(opener, opened):
+    first = FakeSource(1, 1)
+    second = FakeSource(2, 1)
+    playlist = PlaylistSource(first, MediaMetadata(), deque([second]), opener)
+
+    await until(lambda: opened)
+    await playlist.close()
+
+    assert first.closed
+    assert second.closed
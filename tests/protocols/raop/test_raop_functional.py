@@ -20,8 +20,15 @@ from pyatv import connect, exceptions
 from pyatv.const import DeviceState, FeatureName, FeatureState, MediaType, Protocol
 from pyatv.exceptions import AuthenticationError
 from pyatv.interface import FeatureInfo, MediaMetadata, Playing, PushListener
+from pyatv.protocols import raop
 from pyatv.protocols.airplay.utils import dbfs_to_pct
+from pyatv.protocols.raop.audio_cache import AudioCache
+from pyatv.protocols.raop.audio_source import open_source
+from pyatv.protocols.raop.fanout import AudioFanout
+from pyatv.settings import AudioCodec
+from pyatv.storage.memory_storage import MemoryStorage
 
+from tests.protocols.raop.test_audio_codec import alac_decode
 from tests.utils import data_path, stub_sleep, until
 
 pytestmark = pytest.mark.asyncio
@@ -590,6 +597,17 @@ async def test_stream_from_buffer(raop_client, raop_state):
     # assert await audio_matches(raop_state.raw_audio, frames=FRAMES_PER_PACKET)
 
 
+@pytest.mark.parametrize("raop_properties", [{"et": "0", "md": "0"}])
+async def test_stream_from_buffer_reports_read_ahead(raop_client):
+    reported = []
+    raop_client.stream.get(Protocol.RAOP).read_ahead_hook = reported.append
+    with io.open(data_path("audio_1_packet_metadata.wav"), "rb") as source_file:
+        await raop_client.stream.stream_file(source_file)
+
+    assert reported
+    assert reported[-1].underruns == 0
+
+
 @pytest.mark.parametrize(
     "raop_properties,button",
     [({"et": "0"}, "stop"), ({"et": "0"}, "pause")],  # We treat pause as stop for now
@@ -641,3 +659,342 @@ async def test_stream_volume_set_after_stream_start(
 
     assert math.isclose(raop_client.audio.volume, volume)
     assert math.isclose(dbfs_to_pct(raop_state.volume), volume)
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0", "cn": "0,1"}])
+async def test_stream_alac(raop_conf, raop_state):
+    storage = MemoryStorage()
+    settings = await storage.get_settings(raop_conf)
+    settings.protocols.raop.audio_codec = AudioCodec.ALAC
+
+    client = await connect(raop_conf, loop=asyncio.get_running_loop(), storage=storage)
+    try:
+        await client.stream.stream_file(data_path("audio_10_frames.wav"))
+    finally:
+        await asyncio.gather(*client.close())
+
+    # Each frame in the test file consists of samples with the frame number in each
+    # byte, e.g. frame 1 is 0x0101 in all channels
+    packet = raop_state.audio_packets[raop_state.initial_audio_packet]
+    samples = alac_decode(packet, CHANNELS)
+    assert samples[0 : 2 * 10] == [0x0101 * (i // 2) for i in range(2 * 10)]
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+@pytest.mark.parametrize(
+    "packets_per_batch,pacing_thread", [(1, True), (3, False), (3, True)]
+)
+async def test_stream_with_pacing_settings(
+    raop_conf, raop_state, packets_per_batch, pacing_thread
+):
+    storage = MemoryStorage()
+    settings = await storage.get_settings(raop_conf)
+    settings.protocols.raop.packets_per_batch = packets_per_batch
+    settings.protocols.raop.pacing_thread = pacing_thread
+
+    client = await connect(raop_conf, loop=asyncio.get_running_loop(), storage=storage)
+    try:
+        await client.stream.stream_file(data_path("audio_3_packets.wav"))
+    finally:
+        await asyncio.gather(*client.close())
+
+    assert await audio_matches(raop_state.raw_audio, frames=3 * FRAMES_PER_PACKET)
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_stream_inserts_silence_on_underrun(raop_conf, raop_state, monkeypatch):
+    open_source = raop.open_source
+    data_available = asyncio.Event()
+
+    async def _open_slow_source(*args):
+        source = await open_source(*args)
+        readframes = source.readframes
+
+        # Make first read slow (asyncio.sleep is stubbed, so use call_later)
+        async def _slow_readframes(nframes):
+            if not data_available.is_set():
+                asyncio.get_running_loop().call_later(0.05, data_available.set)
+                await data_available.wait()
+            return await readframes(nframes)
+
+        source.readframes = _slow_readframes
+        source.frames_ready = lambda nframes: data_available.is_set()
+        return source
+
+    monkeypatch.setattr(raop, "open_source", _open_slow_source)
+
+    storage = MemoryStorage()
+    settings = await storage.get_settings(raop_conf)
+    settings.protocols.raop.silence_on_underrun = True
+
+    client = await connect(raop_conf, loop=asyncio.get_running_loop(), storage=storage)
+    try:
+        await client.stream.stream_file(data_path("audio_10_frames.wav"))
+    finally:
+        await asyncio.gather(*client.close())
+
+    # Silence packets are sent until first frames have been read (frame 0 is also
+    # silence, so look for frame 1)
+    audio = raop_state.raw_audio
+    audio_start = audio.index(b"\x01" * 4) - 4
+    assert audio_start > 0
+    assert audio_start % ONE_FRAME_IN_BYTES == 0
+    assert await audio_matches(audio[audio_start:], frames=10)
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_stream_reads_ready_source_without_timeout(
+    raop_conf, raop_state, monkeypatch
+):
+    open_source = raop.open_source
+
+    async def _open_slow_source(*args):
+        source = await open_source(*args)
+        readframes = source.readframes
+
+        # Slow reads, but source claims frames are ready so no silence is inserted
+        async def _slow_readframes(nframes):
+            data_available = asyncio.Event()
+            asyncio.get_running_loop().call_later(0.05, data_available.set)
+            await data_available.wait()
+            return await readframes(nframes)
+
+        source.readframes = _slow_readframes
+        return source
+
+    monkeypatch.setattr(raop, "open_source", _open_slow_source)
+
+    storage = MemoryStorage()
+    settings = await storage.get_settings(raop_conf)
+    settings.protocols.raop.silence_on_underrun = True
+
+    client = await connect(raop_conf, loop=asyncio.get_running_loop(), storage=storage)
+    try:
+        await client.stream.stream_file(data_path("audio_10_frames.wav"))
+    finally:
+        await asyncio.gather(*client.close())
+
+    assert await audio_matches(raop_state.raw_audio, frames=10)
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_stream_keep_session(raop_client, raop_state):
+    await raop_client.stream.stream_file(
+        data_path("audio_10_frames.wav"), keep_session=True
+    )
+    assert not raop_state.teardown_called
+
+    await raop_client.stream.stream_file(
+        data_path("audio_10_frames.wav"), keep_session=True
+    )
+    assert not raop_state.teardown_called
+    assert raop_state.setup_count == 1
+    assert raop_state.flush_count == 2
+
+    await raop_client.stream.stream_file(data_path("audio_10_frames.wav"))
+    assert raop_state.teardown_called
+    assert raop_state.setup_count == 1
+    assert raop_state.flush_count == 3
+
+    # All files are played in the same session, i.e. audio of all files is received
+    frames_1_to_3 = b"\x01" * 4 + b"\x02" * 4 + b"\x03" * 4
+    await until(lambda: raop_state.raw_audio.count(frames_1_to_3) == 3)
+    assert await audio_matches(raop_state.raw_audio, frames=10)
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_stream_keep_session_dropped_by_receiver(
+    raop_client, raop_state, raop_usecase
+):
+    await raop_client.stream.stream_file(
+        data_path("audio_10_frames.wav"), keep_session=True
+    )
+    assert raop_state.setup_count == 1
+
+    raop_usecase.drop_session()
+
+    await raop_client.stream.stream_file(
+        data_path("audio_10_frames.wav"), keep_session=True
+    )
+    assert raop_state.setup_count == 2
+    assert not raop_state.session_dropped
+    assert await audio_matches(raop_state.raw_audio, frames=10)
+
+    # New session is kept for later playback
+    await raop_client.stream.stream_file(data_path("audio_10_frames.wav"))
+    assert raop_state.setup_count == 2
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_stream_kept_session_ended_on_close(raop_conf, raop_state):
+    client = await connect(raop_conf, loop=asyncio.get_running_loop())
+    try:
+        await client.stream.stream_file(
+            data_path("audio_10_frames.wav"), keep_session=True
+        )
+        assert not raop_state.teardown_called
+    finally:
+        await asyncio.gather(*client.close())
+
+    assert raop_state.teardown_called
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_enqueue_files_played_gaplessly(raop_client, raop_state):
+    assert (
+        raop_client.features.get_feature(FeatureName.EnqueueFile).state
+        == FeatureState.Available
+    )
+
+    await raop_client.stream.enqueue(data_path("audio_10_frames.wav"))
+    await raop_client.stream.enqueue(data_path("audio_10_frames.wav"))
+    await until(lambda: raop_state.teardown_called)
+
+    # Second file continues right after the first one, in the same stream
+    assert raop_state.setup_count == 1
+    assert raop_state.flush_count == 1
+    assert await audio_matches(raop_state.raw_audio, frames=10)
+    assert await audio_matches(
+        raop_state.raw_audio[10 * CHANNELS * SAMPLE_WIDTH :], frames=10
+    )
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_enqueue_updates_metadata_of_next_file(raop_client, raop_state):
+    playing_titles = []
+
+    class PushListener:
+        def playstatus_update(self, updater, playstatus: Playing) -> None:
+            playing_titles.append(playstatus.title)
+
+        def playstatus_error(self, updater, exception) -> None:
+            pass
+
+    listener = PushListener()
+    raop_client.push_updater.listener = listener
+    raop_client.push_updater.start()
+
+    await raop_client.stream.enqueue(data_path("audio_10_frames.wav"))
+    await raop_client.stream.enqueue(data_path("audio_1_packet_metadata.wav"))
+    await until(lambda: raop_state.teardown_called)
+
+    await until(lambda: "pyatv" in playing_titles)
+    assert raop_state.flush_count == 1
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_enqueue_failure_reported_to_listener(raop_client, tmp_path):
+    errors = []
+
+    class PushListener:
+        def playstatus_update(self, updater, playstatus: Playing) -> None:
+            pass
+
+        def playstatus_error(self, updater, exception) -> None:
+            errors.append(exception)
+
+    listener = PushListener()
+    raop_client.push_updater.listener = listener
+    raop_client.push_updater.start()
+
+    await raop_client.stream.enqueue(str(tmp_path / "missing.wav"))
+    await until(lambda: errors)
+
+    assert not raop_client.stream.get(Protocol.RAOP).is_playing_queue
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_clear_queue_cancels_next_track_update(raop_client, monkeypatch):
+    started = asyncio.Event()
+
+    async def _start_next_track(self, metadata, duration):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(raop.StreamClient, "start_next_track", _start_next_track)
+    raop_stream = raop_client.stream.get(Protocol.RAOP)
+
+    await raop_client.stream.enqueue(data_path("audio_10_frames.wav"))
+    await raop_client.stream.enqueue(data_path("audio_10_frames.wav"))
+    await asyncio.wait_for(started.wait(), 5)
+    tasks = set(raop_stream._track_tasks)
+
+    await asyncio.wait_for(raop_stream.clear_queue(), 5)
+
+    assert tasks
+    assert all(task.cancelled() for task in tasks)
+    assert not raop_stream._track_tasks
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_enqueue_queue_stopped_on_close(raop_conf, raop_state):
+    client = await connect(raop_conf, loop=asyncio.get_running_loop())
+    try:
+        await client.stream.enqueue(data_path("audio_10_frames.wav"))
+        await client.stream.enqueue(data_path("audio_10_frames.wav"))
+        await until(lambda: raop_state.streaming_started)
+    finally:
+        await asyncio.gather(*client.close())
+
+    assert raop_state.teardown_called
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_enqueue_while_streaming_file_fails(raop_client):
+    result = await asyncio.gather(
+        raop_client.stream.stream_file(data_path("audio_3_packets.wav")),
+        raop_client.stream.enqueue(data_path("audio_10_frames.wav")),
+        return_exceptions=True,
+    )
+
+    assert result[0] is None
+    assert isinstance(result[1], exceptions.InvalidStateError)
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0"}])
+async def test_stream_from_fanout(raop_client, raop_state):
+    fanout = AudioFanout(
+        await open_source(data_path("audio_10_frames.wav"), 44100, 2, 2)
+    )
+    try:
+        await raop_client.stream.stream_file(fanout.create_reader())
+    finally:
+        await fanout.close()
+
+    assert await audio_matches(raop_state.raw_audio, frames=10)
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0", "sr": "22050"}])
+async def test_stream_from_fanout_converts_format(raop_client, raop_state):
+    fanout = AudioFanout(
+        await open_source(data_path("audio_10_frames.wav"), 44100, 2, 2)
+    )
+    try:
+        await raop_client.stream.stream_file(fanout.create_reader())
+    finally:
+        await fanout.close()
+
+    # Every other frame is kept when halving sample rate
+    frame_size = CHANNELS * SAMPLE_WIDTH
+    await until(lambda: len(raop_state.raw_audio) >= 5 * frame_size)
+    assert raop_state.raw_audio[0 : 5 * frame_size] == b"".join(
+        bytes([i]) * frame_size for i in range(0, 10, 2)
+    )
+
+
+@pytest.mark.parametrize("raop_properties", [{"et": "0", "md": "0"}])
+async def test_stream_from_audio_cache(raop_client, raop_state):
+    cache = AudioCache()
+
+    await raop_client.stream.stream_file(
+        data_path("audio_1_packet_metadata.wav"), audio_cache=cache
+    )
+    assert len(cache) == 1
+
+    raop_state.metadata = None
+    await raop_client.stream.stream_file(
+        data_path("audio_1_packet_metadata.wav"), audio_cache=cache
+    )
+    assert len(cache) == 1
+    assert raop_state.metadata.title == "pyatv"
+    assert await audio_matches(raop_state.raw_audio, frames=FRAMES_PER_PACKET)
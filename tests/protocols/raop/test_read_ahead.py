@@ -0,0 +1,112 @@
+"""Unit tests for pyatv.protocols.raop.read_ahead."""
+
+import math
+
+import pytest
+
+from pyatv.protocols.raop.read_ahead import (
+    JITTER_FACTOR,
+    MAX_DEPTH,
+    MIN_DEPTH,
+    REPORT_INTERVAL,
+    UNDERRUN_STEP,
+    ReadAheadDepth,
+)
+
+BYTES_PER_SECOND = 1000
+
+
+@pytest.mark.parametrize(
+    "bytes_per_second,min_depth,max_depth",
+    [(0, 1.0, 2.0), (1000, 0.0, 2.0), (1000, 2.0, 1.0)],
+)
+def test_invalid_arguments(bytes_per_second, min_depth, max_depth):
+    with pytest.raises(ValueError):
+        ReadAheadDepth(bytes_per_second, min_depth, max_depth)
+
+
+def test_minimum_depth_with_steady_network():
+    depth = ReadAheadDepth(BYTES_PER_SECOND)
+    for _ in range(10):
+        # Reading one second of audio faster than real time is not a delay
+        depth.chunk_read(0.5, BYTES_PER_SECOND)
+
+    assert depth.jitter == 0.0
+    assert depth.target == MIN_DEPTH
+    assert depth.target_size == math.ceil(MIN_DEPTH * BYTES_PER_SECOND)
+
+
+def test_depth_grows_with_jitter():
+    depth = ReadAheadDepth(BYTES_PER_SECOND)
+    depth.chunk_read(0.0, 0)
+    depth.chunk_read(2.0, 0)
+
+    assert depth.jitter == pytest.approx(0.5)
+    assert depth.target == pytest.approx(MIN_DEPTH + JITTER_FACTOR * 0.5)
+
+
+def test_depth_shrinks_when_network_recovers():
+    depth = ReadAheadDepth(BYTES_PER_SECOND)
+    depth.chunk_read(0.0, 0)
+    depth.chunk_read(2.0, 0)
+    jittery_target = depth.target
+
+    for _ in range(50):
+        depth.chunk_read(0.0, 0)
+
+    assert depth.target < jittery_target
+    assert depth.target == pytest.approx(MIN_DEPTH, abs=0.01)
+
+
+def test_depth_grows_with_underruns():
+    depth = ReadAheadDepth(BYTES_PER_SECOND)
+    depth.underrun()
+    depth.underrun()
+
+    assert depth.underruns == 2
+    assert depth.target == MIN_DEPTH + 2 * UNDERRUN_STEP
+
+
+def test_depth_limited_by_max_depth():
+    depth = ReadAheadDepth(BYTES_PER_SECOND)
+    for _ in range(100):
+        depth.underrun()
+
+    assert depth.target == MAX_DEPTH
+
+
+def test_statistics():
+    depth = ReadAheadDepth(BYTES_PER_SECOND)
+    depth.underrun()
+
+    stats = depth.statistics(500, download_rate=128.0)
+    assert stats.fill_level == 0.5
+    assert stats.target_depth == MIN_DEPTH + UNDERRUN_STEP
+    assert stats.jitter == 0.0
+    assert stats.underruns == 1
+    assert stats.download_rate == 128.0
+
+
+def test_report_at_most_once_per_interval():
+    reported = []
+    depth = ReadAheadDepth(BYTES_PER_SECOND)
+    depth.hook = reported.append
+
+    depth.report(500, 128.0, now=0.0)
+    depth.report(500, now=REPORT_INTERVAL / 2)
+    assert len(reported) == 1
+    assert reported[0].fill_level == 0.5
+    assert reported[0].download_rate == 128.0
+
+    depth.report(0, force=True, now=REPORT_INTERVAL / 2)
+    depth.report(0, now=REPORT_INTERVAL * 2)
+    assert len(reported) == 3
+
+
+def test_report_ignores_failing_hook():
+    def _hook(stats):
+        raise Exception("fail")
+
+    depth = ReadAheadDepth(BYTES_PER_SECOND)
+    depth.hook = _hook
+    depth.report(0)
@@ -0,0 +1,203 @@
+"""Unit tests for pyatv.protocols.raop.resample."""
+
+import math
+
+import pytest
+
+from pyatv.exceptions import NotSupportedError
+from pyatv.interface import MediaMetadata
+from pyatv.protocols.raop import resample
+from pyatv.protocols.raop.audio_source import AudioSource
+from pyatv.protocols.raop.resample import ResampledSource
+from pyatv.settings import ResampleQuality
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeSource(AudioSource):
+    def __init__(
+        self,
+        samples,
+        sample_rate=44100,
+        channels=2,
+        sample_size=2,
+        max_frames=None,
+    ) -> None:
+        self.data = b"".join(
+            sample.to_bytes(sample_size, "big", signed=True) for sample in samples
+        )
+        self.closed = False
+        self._sample_rate = sample_rate
+        self._channels = channels
+        self._sample_size = sample_size
+        self._max_frames = max_frames
+        self.ready = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+    async def readframes(self, nframes: int) -> bytes:
+        nframes = min(nframes, self._max_frames or nframes)
+        size = nframes * self._channels * self._sample_size
+        data, self.data = self.data[0:size], self.data[size:]
+        return data
+
+    def frames_ready(self, nframes: int) -> bool:
+        return self.ready
+
+    async def get_metadata(self) -> MediaMetadata:
+        return MediaMetadata(title="test")
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def channels(self) -> int:
+        return self._channels
+
+    @property
+    def sample_size(self) -> int:
+        return self._sample_size
+
+    @property
+    def duration(self) -> int:
+        return 1
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "fallback"], autouse=True)
+def numpy_fixture(request, monkeypatch):
+    if request.param:
+        if resample.load_numpy() is None:
+            pytest.skip("numpy not installed")
+    else:
+        monkeypatch.setattr(resample, "load_numpy", lambda: None)
+
+
+async def read_all(source, nframes=100) -> bytes:
+    data = b""
+    while frames := await source.readframes(nframes):
+        data += frames
+    return data
+
+
+def samples(data: bytes, sample_size: int = 2):
+    return [
+        int.from_bytes(data[i : i + sample_size], "big", signed=True)
+        for i in range(0, len(data), sample_size)
+    ]
+
+
+async def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        ResampledSource(FakeSource([]), 0, 2, 2)
+    with pytest.raises(NotSupportedError):
+        ResampledSource(FakeSource([]), 44100, 2, 5)
+
+
+@pytest.mark.parametrize("quality", list(ResampleQuality))
+async def test_same_format_unchanged(quality):
+    values = list(range(-1000, 1000, 7))
+    source = ResampledSource(FakeSource(values, max_frames=3), 44100, 2, 2, quality)
+
+    assert samples(await read_all(source)) == values
+
+
+async def test_halve_sample_rate():
+    source = ResampledSource(FakeSource([1, 1, 2, 2, 3, 3, 4, 4]), 22050, 2, 2)
+
+    assert samples(await read_all(source)) == [1, 1, 3, 3]
+
+
+async def test_double_sample_rate_interpolates():
+    source = ResampledSource(FakeSource([0, 100], channels=1), 88200, 1, 2)
+
+    assert samples(await read_all(source))[0:3] == [0, 50, 100]
+
+
+async def test_downmix_to_mono():
+    source = ResampledSource(FakeSource([100, 200, -100, 300]), 44100, 1, 2)
+
+    assert samples(await read_all(source)) == [150, 100]
+
+
+async def test_upmix_to_stereo():
+    source = ResampledSource(FakeSource([100, 200], channels=1), 44100, 2, 2)
+
+    assert samples(await read_all(source)) == [100, 100, 200, 200]
+
+
+@pytest.mark.parametrize(
+    "frame,expected",
+    [
+        ([1000, 0, 0, 0, 0, 0], [414, 0]),  # Front left
+        ([0, 0, 1000, 0, 0, 0], [293, 293]),  # Center
+        ([0, 0, 0, 1000, 0, 0], [0, 0]),  # LFE
+        ([0, 0, 0, 0, 1000, 0], [293, 0]),  # Surround left
+        ([0, 0, 0, 0, 0, 1000], [0, 293]),  # Surround right
+    ],
+)
+async def test_downmix_5_1_to_stereo(frame, expected):
+    source = ResampledSource(FakeSource(frame, channels=6), 44100, 2, 2)
+
+    assert samples(await read_all(source)) == expected
+
+
+async def test_downmix_center_to_both_sides():
+    source = ResampledSource(FakeSource([0, 0, 1000], channels=3), 44100, 2, 2)
+
+    assert samples(await read_all(source)) == [414, 414]
+
+
+async def test_unsupported_channel_conversion():
+    with pytest.raises(NotSupportedError):
+        ResampledSource(FakeSource([], channels=2), 44100, 6, 2)
+    with pytest.raises(NotSupportedError):
+        ResampledSource(FakeSource([], channels=9), 44100, 2, 2)
+
+
+@pytest.mark.parametrize(
+    "sample_size,expected", [(1, b"\x81\x7f"), (3, b"\x01\x00\x00\xff\x00\x00")]
+)
+async def test_convert_sample_size(sample_size, expected):
+    source = ResampledSource(FakeSource([256, -256], channels=1), 44100, 1, sample_size)
+
+    assert await read_all(source) == expected
+
+
+@pytest.mark.parametrize("quality", list(ResampleQuality))
+async def test_resample_sine(quality):
+    sine = [
+        round(10000 * math.sin(2 * math.pi * 1000 * i / 44100)) for i in range(4410)
+    ]
+    source = ResampledSource(FakeSource(sine, channels=1), 48000, 1, 2, quality)
+
+    output = samples(await read_all(source, 352))
+    assert len(output) == 4800
+    for i in range(10, 4790):
+        expected = 10000 * math.sin(2 * math.pi * 1000 * i / 48000)
+        assert output[i] == pytest.approx(expected, abs=100)
+
+
+async def test_frames_ready_from_buffer_or_source():
+    fake = FakeSource([1, 1, 2, 2, 3, 3, 4, 4])
+    source = ResampledSource(fake, 44100, 2, 2)
+    assert not source.frames_ready(1)
+
+    fake.ready = True
+    assert source.frames_ready(1)
+    await read_all(source)
+
+    # End of source has been reached, so reads never wait
+    fake.ready = False
+    assert source.frames_ready(100)
+
+
+async def test_metadata_and_close_from_source():
+    fake = FakeSource([])
+    source = ResampledSource(fake, 22050, 1, 2)
+
+    assert (await source.get_metadata()).title == "test"
+    assert source.duration == 1
+    await source.close()
+    assert fake.closed
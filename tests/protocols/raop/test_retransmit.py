@@ -0,0 +1,99 @@
+"""Unit tests for pyatv.protocols.raop.retransmit."""
+
+import pytest
+
+from pyatv.protocols.raop.fifo import PacketFifo
+from pyatv.protocols.raop.packets import RetransmitReqeust
+from pyatv.protocols.raop.protocols import StreamContext
+from pyatv.protocols.raop.retransmit import COALESCE_WINDOW, RetransmitTracker
+from pyatv.protocols.raop.stream_client import ControlClient
+
+ADDRESS = ("10.0.0.1", 1234)
+
+
+class FakeTransport:
+    def __init__(self) -> None:
+        self.sent = []
+
+    def sendto(self, data, addr) -> None:
+        self.sent.append(data)
+
+    def close(self) -> None:
+        pass
+
+
+def retransmit_request(lost_seqno: int, lost_packets: int) -> bytes:
+    return RetransmitReqeust.encode(0x80, 0x55 | 0x80, 0, lost_seqno, lost_packets)
+
+
+def test_invalid_window():
+    with pytest.raises(ValueError):
+        RetransmitTracker(-1.0)
+
+
+def test_request_returns_lost_packets():
+    tracker = RetransmitTracker()
+    assert tracker.request(10, 3, now=0.0) == [10, 11, 12]
+
+
+def test_request_wraps_sequence_number():
+    tracker = RetransmitTracker()
+    assert tracker.request(0xFFFF, 2, now=0.0) == [0xFFFF, 0]
+
+
+def test_overlapping_requests_coalesced():
+    tracker = RetransmitTracker()
+    tracker.request(10, 3, now=0.0)
+
+    assert tracker.request(11, 3, now=COALESCE_WINDOW / 2) == [13]
+    assert tracker.statistics.coalesced == 2
+
+
+def test_packets_resent_again_after_window():
+    tracker = RetransmitTracker()
+    tracker.request(10, 2, now=0.0)
+
+    assert tracker.request(10, 2, now=COALESCE_WINDOW) == [10, 11]
+    assert tracker.statistics.coalesced == 0
+
+
+def test_statistics():
+    tracker = RetransmitTracker()
+    tracker.request(10, 2, now=0.0)
+    tracker.request(20, 1, now=0.0)
+    tracker.request(30, 2, now=0.0)
+    tracker.served()
+    tracker.missing()
+
+    stats = tracker.statistics
+    assert stats.requests == 3
+    assert stats.requested == 5
+    assert stats.served == 1
+    assert stats.missing == 1
+    assert stats.bursts == {1: 1, 2: 2}
+    assert stats.max_burst == 2
+
+
+def test_control_client_resends_from_backlog():
+    reported = []
+    backlog = PacketFifo(10)
+    backlog[1] = b"\x80\x60\x00\x01audio"
+
+    client = ControlClient(
+        StreamContext(), backlog, lambda addr, stats: reported.append((addr, stats))
+    )
+    client.connection_made(FakeTransport())
+    client.datagram_received(retransmit_request(1, 2), ADDRESS)
+    client.datagram_received(retransmit_request(1, 1), ADDRESS)
+
+    assert client.transport.sent == [b"\x80\xd6\x00\x01\x80\x60\x00\x01audio"]
+
+    client.report_statistics()
+    client.report_statistics()  # Not reported again as nothing changed
+    assert len(reported) == 1
+
+    stats = reported[0][1]
+    assert stats.requested == 3
+    assert stats.served == 1
+    assert stats.missing == 1
+    assert stats.coalesced == 1
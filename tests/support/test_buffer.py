@@ -270,3 +270,46 @@ def test_seek_current_position_ok(buffer):
     buffer.get(HEADROOM)
     assert not buffer.seek(1)
     assert buffer.seek(2)
+
+
+def test_add_and_get_wraps_around(buffer):
+    assert buffer.add(b"abcd") == 4
+    assert buffer.get(3) == b"abc"
+
+    # Data is added after "d", wrapping around to beginning of internal buffer
+    assert buffer.add(b"efgh") == 4
+    assert not buffer.fits(1)
+    assert buffer.get(5) == b"defgh"
+    assert buffer.empty()
+
+
+def test_get_view_does_not_copy(buffer):
+    buffer.add(b"abc")
+
+    view = buffer.get_view(2)
+    assert isinstance(view, memoryview)
+    assert view == b"ab"
+    assert buffer.get(1) == b"c"
+
+
+def test_get_view_copies_when_wrapping(buffer):
+    buffer.add(b"abcd")
+    buffer.get(3)
+    buffer.add(b"ef")
+
+    assert buffer.get_view(3) == b"def"
+
+
+def test_add_memoryview(buffer):
+    assert buffer.add(memoryview(b"abc")) == 3
+    assert buffer.get(3) == b"abc"
+
+
+def test_headroom_kept_when_wrapping(headroom_buffer):
+    headroom_buffer.add(b"abcd")
+    assert headroom_buffer.get(3) == b"abc"
+    assert not headroom_buffer.seek(0)
+
+    # Headroom was discarded, so there is room for more data
+    assert headroom_buffer.add(b"efgh") == 4
+    assert headroom_buffer.get(5) == b"defgh"
@@ -93,3 +93,33 @@ def test_get_latest_identifier(cache):
 
     cache.get(ID1)
     assert cache.latest() == ID1
+
+
+def test_max_size_removes_oldest():
+    cache = Cache(limit=10, max_size=5)
+    cache.put(ID1, b"12")
+    cache.put(ID2, b"34")
+    assert cache.size == 4
+
+    cache.put(ID3, b"567")
+    assert cache.size == 5
+    assert ID1 not in cache
+    assert ID2 in cache
+    assert ID3 in cache
+
+
+def test_max_size_replace_updates_size():
+    cache = Cache(limit=10, max_size=5)
+    cache.put(ID1, b"12")
+    cache.put(ID1, b"1234")
+    assert cache.size == 4
+
+
+def test_max_size_item_too_large():
+    cache = Cache(limit=10, max_size=5)
+    cache.put(ID1, b"12")
+
+    assert not cache.put(ID2, b"123456")
+    assert ID2 not in cache
+    assert ID1 in cache
+    assert cache.size == 2
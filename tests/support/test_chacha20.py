@@ -2,6 +2,8 @@
 
 import logging
 
+import pytest
+
 from pyatv.support import chacha20
 
 fake_key = b"k" * 32
@@ -21,3 +23,69 @@ def test_8_bytes_nonce():
     assert len(cipher.in_nonce) == chacha20.NONCE_LENGTH
     result = cipher.encrypt(b"test")
     assert cipher.decrypt(result) == b"test"
+
+
+def test_nonce_from_counter():
+    cipher = chacha20.Chacha20Cipher(fake_key, fake_key, 12)
+    cipher._out_counter = 0x0102030405060708090A
+    assert cipher.out_nonce == 0x0102030405060708090A.to_bytes(12, "little")
+
+    cipher = chacha20.Chacha20Cipher8byteNonce(fake_key, fake_key)
+    cipher._in_counter = 0x0102
+    assert cipher.in_nonce == b"\x00\x00\x00\x00\x02\x01\x00\x00\x00\x00\x00\x00"
+
+
+def test_nonce_advances_after_encrypt():
+    cipher = chacha20.Chacha20Cipher(fake_key, fake_key, 12)
+    nonce = cipher.out_nonce
+    encrypted = cipher.encrypt(b"test", aad=b"aad")
+    assert cipher.decrypt(encrypted, nonce=nonce, aad=b"aad") == b"test"
+    assert cipher.out_nonce == (1).to_bytes(12, "little")
+
+
+def test_invalid_nonce_length():
+    with pytest.raises(ValueError):
+        chacha20.Chacha20Cipher(fake_key, fake_key, 13)
+
+
+def test_encrypt_into_appends_to_buffer():
+    cipher = chacha20.Chacha20Cipher8byteNonce(fake_key, fake_key)
+    reference = chacha20.Chacha20Cipher8byteNonce(fake_key, fake_key)
+
+    output = bytearray(b"header")
+    size = cipher.encrypt_into(b"test", output, aad=b"aad")
+
+    assert output == b"header" + reference.encrypt(b"test", aad=b"aad")
+    assert size == len(output) - 6
+
+    decrypted = bytearray()
+    assert cipher.decrypt_into(output[6:], decrypted, aad=b"aad") == 4
+    assert decrypted == b"test"
+
+
+def test_encrypt_many_same_as_encrypt():
+    messages = [bytes([i]) * i for i in range(5)]
+    aads = [bytes([i]) for i in range(5)]
+    cipher = chacha20.Chacha20Cipher(fake_key, fake_key)
+    reference = chacha20.Chacha20Cipher(fake_key, fake_key)
+
+    encrypted = cipher.encrypt_many(messages, aads)
+
+    assert encrypted == [
+        reference.encrypt(message, aad=aad) for message, aad in zip(messages, aads)
+    ]
+    assert cipher.decrypt_many(encrypted, aads) == messages
+    assert cipher.out_nonce == cipher.in_nonce == reference.out_nonce
+
+
+def test_encrypt_many_without_aad():
+    cipher = chacha20.Chacha20Cipher(fake_key, fake_key, 12)
+    assert cipher.decrypt_many(cipher.encrypt_many([b"a", b"b"])) == [b"a", b"b"]
+
+
+def test_encrypt_many_aads_mismatch():
+    cipher = chacha20.Chacha20Cipher(fake_key, fake_key)
+    with pytest.raises(ValueError):
+        cipher.encrypt_many([b"a", b"b"], [b"aad"])
+    with pytest.raises(ValueError):
+        cipher.decrypt_many([b"a"], [])
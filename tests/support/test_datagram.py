@@ -0,0 +1,158 @@
+"""Unit tests for pyatv.support.datagram."""
+
+import asyncio
+import errno
+import socket
+
+import pytest
+import pytest_asyncio
+
+from pyatv.support import datagram
+from pyatv.support.datagram import (
+    BatchedDatagramTransport,
+    has_sendmmsg,
+    send_datagrams,
+    sendmmsg,
+)
+
+requires_sendmmsg = pytest.mark.skipif(
+    not has_sendmmsg(), reason="sendmmsg not supported"
+)
+
+DATAGRAMS = [b"first", bytearray(b"second"), memoryview(bytearray(b"xthirdx"))[1:6]]
+
+
+@pytest.fixture(name="sockets")
+def sockets_fixture():
+    sender, receiver = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    receiver.settimeout(5.0)
+    yield sender, receiver
+    sender.close()
+    receiver.close()
+
+
+@pytest.fixture(name="no_sendmmsg")
+def no_sendmmsg_fixture(monkeypatch):
+    monkeypatch.setattr(datagram, "_sendmmsg", None)
+
+
+@pytest_asyncio.fixture(name="udp")
+async def udp_fixture():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(5.0)
+    transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+        asyncio.DatagramProtocol, remote_addr=receiver.getsockname()
+    )
+    yield transport, receiver
+    transport.close()
+    receiver.close()
+
+
+def receive(sock, count):
+    return [sock.recv(100) for _ in range(count)]
+
+
+@requires_sendmmsg
+def test_sendmmsg_sends_all_datagrams(sockets):
+    sender, receiver = sockets
+
+    assert sendmmsg(sender.fileno(), DATAGRAMS) == 3
+    assert receive(receiver, 3) == [b"first", b"second", b"third"]
+
+
+@requires_sendmmsg
+def test_sendmmsg_empty_datagram(sockets):
+    sender, receiver = sockets
+
+    assert sendmmsg(sender.fileno(), [b"", b"a"]) == 2
+    assert receive(receiver, 2) == [b"", b"a"]
+
+
+@requires_sendmmsg
+def test_sendmmsg_raises_on_error():
+    with pytest.raises(OSError) as exc:
+        sendmmsg(-1, [b"a"])
+    assert exc.value.errno == errno.EBADF
+
+
+@pytest.mark.usefixtures("no_sendmmsg")
+def test_sendmmsg_not_supported():
+    with pytest.raises(NotImplementedError):
+        sendmmsg(0, [b"a"])
+
+
+@pytest.mark.parametrize("supported", [True, False])
+def test_send_datagrams(sockets, monkeypatch, supported):
+    sender, receiver = sockets
+    if not supported:
+        monkeypatch.setattr(datagram, "_sendmmsg", None)
+
+    send_datagrams(sender, DATAGRAMS)
+    assert receive(receiver, 3) == [b"first", b"second", b"third"]
+
+
+@pytest.mark.parametrize("supported", [True, False])
+def test_send_datagrams_stops_when_buffer_full(sockets, monkeypatch, supported):
+    sender, _ = sockets
+    sender.setblocking(False)
+    if not supported:
+        monkeypatch.setattr(datagram, "_sendmmsg", None)
+
+    datagrams = [bytes(1024)] * 10000
+    sent = send_datagrams(sender, datagrams)
+    assert 0 < sent < len(datagrams)
+    assert send_datagrams(sender, datagrams) == 0
+
+
+@pytest.mark.asyncio
+async def test_batched_transport_sends_on_flush(udp):
+    transport, receiver = udp
+    receiver.setblocking(False)
+
+    batched = BatchedDatagramTransport(transport)
+    assert batched.batching == has_sendmmsg()
+
+    for data in DATAGRAMS:
+        batched.sendto(data)
+    with pytest.raises(BlockingIOError):
+        receiver.recv(100)
+
+    batched.flush()
+    receiver.setblocking(True)
+    assert receive(receiver, 3) == [b"first", b"second", b"third"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("no_sendmmsg")
+async def test_batched_transport_without_sendmmsg(udp):
+    transport, receiver = udp
+
+    batched = BatchedDatagramTransport(transport)
+    assert not batched.batching
+
+    for data in DATAGRAMS:
+        batched.sendto(data)
+    batched.flush()
+
+    assert receive(receiver, 3) == [b"first", b"second", b"third"]
+
+
+@requires_sendmmsg
+@pytest.mark.asyncio
+async def test_batched_transport_falls_back_on_error(udp, monkeypatch):
+    transport, receiver = udp
+
+    def _sendmmsg(fd, messages, count, flags):
+        return -1
+
+    monkeypatch.setattr(datagram, "_sendmmsg", _sendmmsg)
+    monkeypatch.setattr(datagram.ctypes, "get_errno", lambda: errno.EPERM)
+
+    batched = BatchedDatagramTransport(transport)
+    for data in DATAGRAMS:
+        batched.sendto(data)
+    batched.flush()
+
+    assert not batched.batching
+    assert receive(receiver, 3) == [b"first", b"second", b"third"]
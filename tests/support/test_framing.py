@@ -0,0 +1,126 @@
+"""Unit tests for pyatv.support.framing."""
+
+import pytest
+
+from pyatv.support.framing import FrameBuffer
+from pyatv.support.variant import write_variant
+
+
+@pytest.fixture(name="buffer")
+def buffer_fixture() -> FrameBuffer:
+    yield FrameBuffer(compact_threshold=4)
+
+
+def test_invalid_compact_threshold():
+    with pytest.raises(ValueError):
+        FrameBuffer(compact_threshold=-1)
+
+
+def test_empty_buffer(buffer):
+    assert len(buffer) == 0
+    assert not buffer
+    assert buffer.read() == b""
+    assert buffer.read_variant_frame() is None
+    assert buffer.read_frame(4) is None
+
+
+def test_append_and_read(buffer):
+    buffer.append(b"abc")
+    buffer.append(b"def")
+    assert len(buffer) == 6
+    assert buffer.read(2) == b"ab"
+    assert buffer.read() == b"cdef"
+    assert len(buffer) == 0
+
+
+def test_peek_does_not_consume(buffer):
+    buffer.append(b"abcdef")
+    assert buffer.peek(3) == b"abc"
+    assert buffer.peek() == b"abcdef"
+    assert len(buffer) == 6
+
+
+def test_skip(buffer):
+    buffer.append(b"abcdef")
+    buffer.skip(2)
+    assert buffer.peek() == b"cdef"
+    buffer.skip(10)
+    assert len(buffer) == 0
+
+
+def test_clear(buffer):
+    buffer.append(b"abcdef")
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.read() == b""
+
+
+def test_compact_after_threshold(buffer):
+    buffer.append(b"abcdefghij")
+    buffer.skip(3)
+    assert buffer._offset == 3
+
+    buffer.skip(2)
+    assert buffer._offset == 0
+    assert buffer.peek() == b"fghij"
+
+
+def test_read_variant_frames(buffer):
+    buffer.append(write_variant(3) + b"abc" + write_variant(300) + b"d" * 300)
+    assert buffer.read_variant_frame() == b"abc"
+    assert buffer.read_variant_frame() == b"d" * 300
+    assert buffer.read_variant_frame() is None
+
+
+def test_read_variant_frame_split_over_appends(buffer):
+    data = write_variant(300) + b"d" * 300
+    for i in range(len(data) - 1):
+        buffer.append(data[i : i + 1])
+        assert buffer.read_variant_frame() is None
+    buffer.append(data[-1:])
+    assert buffer.read_variant_frame() == b"d" * 300
+    assert len(buffer) == 0
+
+
+def test_read_variant_frame_invalid_variant(buffer):
+    buffer.append(b"\xff" * 10)
+    with pytest.raises(ValueError):
+        buffer.read_variant_frame()
+
+
+def test_read_frame_length_excluding_header(buffer):
+    buffer.append(b"\x08\x00\x00\x03abc\x08\x00\x00\x02d")
+    assert buffer.read_frame(4, length_offset=1) == b"\x08\x00\x00\x03abc"
+    assert buffer.read_frame(4, length_offset=1) is None
+    buffer.append(b"e")
+    assert buffer.read_frame(4, length_offset=1) == b"\x08\x00\x00\x02de"
+
+
+def test_read_frame_length_including_header(buffer):
+    buffer.append(b"\x00\x00\x00\x07\xff\xffabc")
+    frame = buffer.read_frame(6, length_size=4, includes_header=True)
+    assert frame == b"\x00\x00\x00\x07\xff\xffa"
+    assert buffer.peek() == b"bc"
+
+
+def test_read_http_frames(buffer):
+    buffer.append(
+        b"POST /command RTSP/1.0\r\ncontent-length: 3\r\n\r\nabc"
+        b"GET /info RTSP/1.0\r\nCSeq: 1\r\n\r\n"
+    )
+    assert (
+        buffer.read_http_frame()
+        == b"POST /command RTSP/1.0\r\ncontent-length: 3\r\n\r\nabc"
+    )
+    assert buffer.read_http_frame() == b"GET /info RTSP/1.0\r\nCSeq: 1\r\n\r\n"
+    assert buffer.read_http_frame() is None
+
+
+def test_read_http_frame_split_over_appends(buffer):
+    data = b"POST / RTSP/1.0\r\nContent-Length: 4\r\n\r\nabcd"
+    for i in range(len(data) - 1):
+        buffer.append(data[i : i + 1])
+        assert buffer.read_http_frame() is None
+    buffer.append(data[-1:])
+    assert buffer.read_http_frame() == data
+    assert len(buffer) == 0
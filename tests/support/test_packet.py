@@ -38,3 +38,9 @@ def test_extend_decode():
 def test_message_length():
     assert Foo.length == 3
     assert Bar.length == 3 + 4
+
+
+def test_encode_into_buffer():
+    buffer = bytearray(5)
+    Foo.encode_into(buffer, 2, b"\x16", 0x123)
+    assert buffer == b"\x00\x00\x16\x01\x23"